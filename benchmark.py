@@ -0,0 +1,431 @@
+#######################
+# 합성 데이터 성능 벤치마크
+#
+#   $ python benchmark.py                                  # 10k / 100k / 1M 행, 결과 JSON을 stdout으로
+#   $ python benchmark.py --sizes 10000 5000000 --out bench.json
+#   $ python benchmark.py --baseline bench_main.json      # 이전 결과 대비 회귀 검사
+#
+# 번들 CSV의 실제 행을 복원 추출해 10k~5M 행의 합성 데이터를 만든다(12개 컬럼 스키마 유지).
+# 조사시도/조사시군구/발간기관/유적성격/시대 값은 실제 값 풀에서만 나오므로 카디널리티가 그대로이고,
+# 시대는 쉼표 태그 문자열, 조사기간은 "YYYY년MM월DD일~YYYY년MM월DD일" 형식을 유지한다.
+#
+# 단계별로 따로 잰다: 로드(콜드/웜), 색인 구축(유사 중복 묶음 포함), 사이드바 필터 각각, 키워드 검색,
+# 패널별 집계·차트 생성.
+# 각 단계의 중앙값을 benchmark_thresholds.json의 허용치(allowed_ms)와 비교해 넘으면 종료 코드 1로 끝난다(CI용).
+# 로드·색인 구축·프레임 전체를 훑는 패널은 행 수에 선형인 허용치, 색인으로 답하는 질의(필터·검색·큐브 패널)는
+# √(행 수)와 결과 행 수에만 비례하는 허용치라 전체 스캔으로 퇴행하면 큰 크기에서 잡힌다. 파티션 요약(sketches.py)을 병합한 값은 같은 행의 정확값과
+# 비교해 오차를 기록하고, 문서화된 한계(SKETCH_ERROR_BOUNDS)를 넘어도 회귀로 본다.
+import argparse
+import json
+import math
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import charts
+from data_layer import (
+    DATA_PATH, SOURCE_ENCODING, load_reports, load_store, load_store_summaries, parse_survey_period, prune_partitions,
+    read_source_csv, store_manifest,
+)
+from filter_engine import FilterIndex
+from near_duplicates import NearDuplicates
+from panel_pool import PanelBatch, make_executor
+from pipeline import PandasEngine
+from report_cube import ReportCube
+from search_index import OPTIONAL_SEARCH_COLUMNS, SEARCH_COLUMNS, SearchIndex
+from sketches import COUNTER_COLUMNS, DISTINCT_COLUMNS, QUANTILE_COLUMNS, SKETCH_ERROR_BOUNDS, merge_summaries
+
+THRESHOLDS_PATH = Path(__file__).with_name("benchmark_thresholds.json")
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+SEARCH_QUERIES = {
+    "single": "고분",
+    "and": "유적 발굴",
+    "phrase": '"시굴조사 보고서"',
+    "prefix": "왕궁*",
+    "extended": "익산",
+}
+
+
+#######################
+# 합성 데이터
+def synthesize(n_rows, source=DATA_PATH, seed=0):
+    """실제 행을 복원 추출하고 날짜·면적·이름만 흔들어 n_rows 행의 원본 형식 프레임을 만든다."""
+    rng = np.random.default_rng(seed)
+    real = read_source_csv(source)
+    picks = rng.integers(0, len(real), n_rows)
+    df = real.iloc[picks].reset_index(drop=True)
+
+    df["연번"] = np.arange(1, n_rows + 1)
+
+    # 이름은 복원 추출 회차를 붙여 행 수에 비례하는 카디널리티 유지(검색 색인 크기도 현실적으로)
+    lap = pd.Series(np.arange(n_rows) // len(real), dtype="int64").astype(str)
+    df["보고서명"] = df["보고서명"].astype(str) + " " + lap + "권"
+    df["유적사업명"] = df["유적사업명"].astype(str) + " " + lap + "차"
+
+    # 제출일과 조사기간을 같은 일수만큼 이동(실제 범위 안에서)
+    submitted = pd.to_datetime(df["제출일"], errors="coerce")
+    lo, hi = submitted.min(), submitted.max()
+    shift = pd.to_timedelta(rng.integers(-365, 366, n_rows), unit="D")
+    moved = submitted + shift
+    moved = moved.where((moved >= lo) & (moved <= hi), submitted)
+    offset = moved - submitted
+    df["제출일"] = moved.dt.strftime("%Y-%m-%d")
+
+    start, end, _ = parse_survey_period(df["조사기간"])
+    period = (start + offset).dt.strftime("%Y년%m월%d일") + "~" + (end + offset).dt.strftime("%Y년%m월%d일")
+    df["조사기간"] = period.where(start.notna() & end.notna(), df["조사기간"])
+
+    area = pd.to_numeric(df["조사면적"], errors="coerce")
+    df["조사면적"] = (area * rng.lognormal(0.0, 0.1, n_rows)).round(0)
+    return df
+
+
+def write_source(frame, directory):
+    path = Path(directory) / f"synthetic_{len(frame)}.csv"
+    frame.to_csv(path, index=False, encoding=SOURCE_ENCODING, errors="replace")
+    return path
+
+
+#######################
+# 측정
+class Timer:
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.stages = {}
+
+    def record(self, stage, seconds):
+        self.stages.setdefault(stage, []).append(seconds * 1000)
+
+    def measure(self, stage, fn, repeat=None):
+        """fn을 repeat번 실행해 기록하고 마지막 결과를 반환."""
+        result = None
+        for _ in range(repeat or self.repeat):
+            t0 = time.perf_counter()
+            result = fn()
+            self.record(stage, time.perf_counter() - t0)
+        return result
+
+    def summary(self):
+        return {
+            stage: {
+                "median_ms": round(float(np.median(runs)), 3),
+                "min_ms": round(float(np.min(runs)), 3),
+                "runs": len(runs),
+            }
+            for stage, runs in self.stages.items()
+        }
+
+
+def filter_specs(df, filter_index):
+    """필터 케이스별 spec. 값은 빈도 상위에서 골라 실제 사용과 비슷한 선택도를 낸다."""
+    def top_values(column, k):
+        return df[column].value_counts().index[:k].tolist()
+
+    years = df["제출연도"].dropna()
+    area = df["조사면적"].dropna()
+    # 시대는 태그 문자열이 아니라 태그 단위로 선택
+    tags = filter_index.tag_counts("시대").sort_values(ascending=False).index[:2].tolist()
+    year_range = (int(years.max()) - 2, int(years.max()))
+    area_range = (float(area.quantile(0.25)), float(area.quantile(0.75)))
+
+    specs = {
+        "조사시도": {"facets": {"조사시도": top_values("조사시도", 2)}},
+        "조사시군구": {"facets": {"조사시군구": top_values("조사시군구", 5)}},
+        "시대_any": {"facets": {"시대": tags}, "facet_modes": {"시대": "any"}},
+        "시대_all": {"facets": {"시대": tags}, "facet_modes": {"시대": "all"}},
+        "유적성격": {"facets": {"유적성격": top_values("유적성격", 3)}},
+        "발간기관": {"facets": {"발간기관": top_values("발간기관", 5)}},
+        "year_range": {"year_range": year_range},
+        "area_range": {"area_range": area_range},
+        "combined": {
+            "facets": {"조사시도": top_values("조사시도", 3), "시대": tags[:1]},
+            "year_range": year_range,
+            "area_range": area_range,
+        },
+    }
+    return specs
+
+
+def panel_stages(view):
+    """streamlit_app.py의 패널 순서대로 (이름, 집계 준비, 차트 생성 또는 None). 행이 필요한 패널도 뷰 인터페이스로."""
+    cube = view.cube
+    return [
+        ("kpi", lambda: (cube.totals(), cube.rollup(["제출연도"])), None),
+        ("era_donut", lambda: charts.prepare_era_counts(view), charts.fig_era_donut),
+        ("type_donut", lambda: charts.prepare_type_counts(cube), charts.fig_type_donut),
+        ("sido_bar", lambda: charts.prepare_sido_agg(cube), lambda agg: charts.fig_sido_bar(agg, "건수")),
+        ("sigungu_rank", lambda: charts.prepare_sigungu_top(cube, "건수", 15),
+         lambda top: charts.fig_sigungu_rank(top, "건수")),
+        ("heatmap", lambda: charts.prepare_year_month_pivot(cube), charts.fig_year_month_heatmap),
+        ("summary_table", lambda: charts.prepare_summary_table(view), None),
+        ("rank_sido", lambda: charts.prepare_rank_agg(cube, "조사시도"),
+         lambda agg: charts.fig_rank_bar(agg, "조사시도", "건수", 10)),
+        ("rank_org", lambda: charts.prepare_rank_agg(cube, "발간기관"),
+         lambda agg: charts.fig_rank_bar(agg, "발간기관", "건수", 10)),
+        ("top_area", lambda: charts.prepare_top_area_reports(view), charts.fig_top_area_reports),
+        ("scatter", lambda: charts.prepare_scatter(view), lambda data: charts.fig_area_duration_scatter(*data)),
+        # 대용량 모드(LARGE_N_ROWS 초과) 경로: 첫 페이지(정렬 포함)
+        ("scatter_bins", lambda: charts.prepare_scatter_bins(view), charts.fig_area_duration_bins),
+        ("table_page", lambda: charts.table_page(view, "제출일", False, 0, 100), None),
+    ]
+
+
+def bench_panels(timer, view, prefix="panel"):
+    """패널별로 집계 준비와 차트 생성을 따로 잰다."""
+    for name, prepare, figure in panel_stages(view):
+        data = timer.measure(f"{prefix}.{name}.prepare", _unmemoized(view, prepare))
+        if figure is not None:
+            timer.measure(f"{prefix}.{name}.figure", lambda: figure(data))
+
+
+def _unmemoized(view, prepare):
+    # 뷰 메모(건수·정렬 순서 등)를 비우고 재서 반복 측정이 첫 리런 비용을 나타내게
+    def run():
+        view.memo.clear()
+        return prepare()
+    return run
+
+
+def _build_panel(prepare, figure):
+    data = prepare()
+    return data if figure is None else figure(data)
+
+
+def bench_panel_pool(timer, view, workers=4, prefix="panels"):
+    """패널 전체를 한 리런처럼 제출·수거한 벽시계 시간: 순차 vs 워커 스레드 풀(panel_pool)."""
+    stages = panel_stages(view)
+
+    def run(executor):
+        batch = PanelBatch(executor, timeout=None)
+        for name, prepare, figure in stages:
+            batch.submit(name, _build_panel, prepare, figure)
+        for name, _, _ in stages:
+            batch.result(name)
+
+    timer.measure(f"{prefix}.sequential", lambda: run(None))
+    executor = make_executor(workers)
+    try:
+        timer.measure(f"{prefix}.parallel", lambda: run(executor))
+    finally:
+        executor.shutdown()
+
+
+def run_size(n_rows, repeat=3, seed=0, workdir=None, engines=("pandas",)):
+    timer = Timer(repeat)
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        source = write_source(synthesize(n_rows, seed=seed), tmp)
+        cache_dir = Path(tmp) / "cache"
+
+        # 콜드: CSV 파싱 + 타입 고정 + 사이드카 기록 / 웜: 사이드카 읽기
+        df = timer.measure("load.cold", lambda: load_reports(source, cache_dir), repeat=1)
+        df = timer.measure("load.warm", lambda: load_reports(source, cache_dir))
+
+        filter_index = timer.measure("index.filter", lambda: FilterIndex(df), repeat=1)
+        search_index = timer.measure("index.search", lambda: SearchIndex(df), repeat=1)
+        report_cube = timer.measure("index.cube", lambda: ReportCube(df), repeat=1)
+        duplicates = timer.measure("index.dedup", lambda: NearDuplicates.build(df), repeat=1)
+        engine = PandasEngine(df, filter_index, search_index, report_cube)
+
+        result_rows = {"dedup.clusters": duplicates.summary(df["연번"].to_numpy())["clusters"]}
+        for name, spec in filter_specs(df, filter_index).items():
+            view = timer.measure(f"filter.{name}", lambda: engine.view(("bench", name), spec))
+            result_rows[f"filter.{name}"] = view.n_rows
+
+        for name, query in SEARCH_QUERIES.items():
+            columns = SEARCH_COLUMNS + (OPTIONAL_SEARCH_COLUMNS if name == "extended" else [])
+            rows = timer.measure(f"search.{name}", lambda: search_index.search(query, columns))
+            result_rows[f"search.{name}"] = len(rows)
+
+        # 패널은 기본 화면(필터 없음)의 뷰 기준
+        bench_panels(timer, engine.view(("bench", "all"), {}))
+        bench_panel_pool(timer, engine.view(("bench", "all"), {}))
+
+        # 파티션 저장소: 전체 로드 vs 최근 2개 연도만(가지치기)
+        from ingest import init_store
+
+        store_dir = Path(tmp) / "store"
+        timer.measure("store.init", lambda: init_store(df, store_dir, by_sido=True), repeat=1)
+        manifest = store_manifest(store_dir)
+        latest = int(df["제출연도"].max())
+        recent = prune_partitions(manifest["partitions"], (latest - 1, latest))
+        timer.measure("store.load.full", lambda: load_store(store_dir, manifest))
+        recent_df = timer.measure("store.load.recent", lambda: load_store(store_dir, manifest, recent))
+        result_rows["store.load.recent"] = len(recent_df)
+
+        # 파티션 요약 병합(전체 / 최근 2개 연도) vs 같은 행의 정확값
+        summaries = timer.measure("sketch.load", lambda: load_store_summaries(store_dir, manifest))
+        merged = timer.measure("sketch.merge", lambda: merge_summaries(summaries.values()))
+        sketch = {
+            "all": sketch_errors(df, merged),
+            "recent": sketch_errors(recent_df, merge_summaries(summaries[name] for name in recent)),
+        }
+
+        if "sqlite" in engines:
+            from sql_backend import SqlEngine, build_database
+
+            db_path = Path(tmp) / "reports.sqlite"
+            timer.measure("sqlite.build", lambda: build_database(source, db_path, store_dir=Path(tmp) / "no-store"), repeat=1)
+            sql_engine = SqlEngine(db_path)
+            for name, spec in filter_specs(df, filter_index).items():
+                # 뷰는 WHERE 절만 만들므로 건수(COUNT)까지 재야 pandas filter 단계와 비교 가능
+                view = timer.measure(f"sqlite.filter.{name}", lambda: _counted(sql_engine.view(("bench", name), spec)))
+                result_rows[f"sqlite.filter.{name}"] = view.n_rows
+            bench_panels(timer, sql_engine.view(("bench", "all"), {}), prefix="sqlite.panel")
+
+    return {"rows": n_rows, "stages": timer.summary(), "result_rows": result_rows, "sketch_errors": sketch}
+
+
+def _counted(view):
+    view.n_rows
+    return view
+
+
+#######################
+# 스케치 정확도
+def sketch_errors(frame, summary):
+    """병합 요약 vs 정확값. 분위수는 순위 오차(추정값의 실제 순위와 q의 차), 고유 개수·카운터는 상대 오차."""
+    errors = {"rows": abs(summary.rows - len(frame)) / max(len(frame), 1)}
+    for column in QUANTILE_COLUMNS:
+        values = np.sort(frame[column].dropna().to_numpy(dtype="float64"))
+        if not len(values):
+            continue
+        for q in SKETCH_ERROR_BOUNDS["rank"]:
+            estimate, = summary.quantiles(column, [q])
+            # 추정값(보간)을 감싸는 실제 값 a ≤ 추정값 ≤ b가 차지하는 순위 구간 안이면 오차 0
+            # (정수 일수처럼 같은 값이 많은 컬럼은 보간값이 두 값 사이에 놓여도 정확한 것으로 본다)
+            a = values[max(np.searchsorted(values, estimate, "right") - 1, 0)]
+            b = values[min(np.searchsorted(values, estimate, "left"), len(values) - 1)]
+            lo = np.searchsorted(values, a, "left") / len(values)
+            hi = np.searchsorted(values, b, "right") / len(values)
+            errors[f"{column}.q{q:g}"] = 0.0 if lo <= q <= hi else min(abs(lo - q), abs(hi - q))
+    for column in DISTINCT_COLUMNS:
+        exact = frame[column].nunique()
+        if exact:
+            errors[f"{column}.distinct"] = abs(summary.n_distinct(column) - exact) / exact
+    for column in COUNTER_COLUMNS:
+        exact = float(frame[column].sum())
+        if exact:
+            errors[f"{column}.sum"] = abs(summary.counters[column]["sum"] - exact) / abs(exact)
+    return {name: round(float(e), 6) for name, e in errors.items()}
+
+
+def sketch_error_bound(name):
+    """오차 이름 → 문서화된 한계. 카운터(행 수·합계)는 부동소수 합 순서 차이만 허용."""
+    if ".q" in name:
+        return SKETCH_ERROR_BOUNDS["rank"][float(name.rsplit(".q", 1)[1])]
+    if name.endswith(".distinct"):
+        return SKETCH_ERROR_BOUNDS["distinct"]
+    return 1e-9
+
+
+#######################
+# 회귀 판정
+def allowed_ms(stage, n_rows, thresholds, rows_out=0):
+    """단계 허용치. 단계 이름의 가장 긴 접두 규칙을 쓴다(예: "panel.scatter" → "panel").
+    floor_ms + ms_per_100k_rows·(n/10만) + ms_per_sqrt_100k_rows·√(n/10만) + ms_per_100k_rows_out·(결과 행/10만).
+    색인으로 답하는 질의 단계는 입력 행에 대한 선형 항 없이 √ 항과 결과 행 항만 두어,
+    선택도가 낮은 필터·검색이 전체 스캔(O(n))으로 돌아가면 큰 크기에서 허용치를 넘게 한다."""
+    rules = thresholds.get("stages", {})
+    rule = thresholds.get("default", {})
+    parts = stage.split(".")
+    for i in range(len(parts), 0, -1):
+        prefix = ".".join(parts[:i])
+        if prefix in rules:
+            rule = rules[prefix]
+            break
+    scale = n_rows / 100_000
+    return (rule.get("floor_ms", 0) + rule.get("ms_per_100k_rows", 0) * scale
+            + rule.get("ms_per_sqrt_100k_rows", 0) * math.sqrt(scale)
+            + rule.get("ms_per_100k_rows_out", 0) * (rows_out or 0) / 100_000)
+
+
+def find_regressions(results, thresholds, baseline=None, tolerance=1.5):
+    regressions = []
+    base_runs = {r["rows"]: r["stages"] for r in (baseline or {}).get("results", [])}
+    for run in results:
+        n_rows = run["rows"]
+        for stage, stats in run["stages"].items():
+            limit = allowed_ms(stage, n_rows, thresholds, run.get("result_rows", {}).get(stage))
+            if stats["median_ms"] > limit:
+                regressions.append({"rows": n_rows, "stage": stage, "median_ms": stats["median_ms"],
+                                    "limit_ms": round(limit, 3), "reason": "threshold"})
+            prev = base_runs.get(n_rows, {}).get(stage)
+            # 아주 짧은 단계는 잡음이 커서 허용치 floor 이상일 때만 기준선과 비교
+            floor = allowed_ms(stage, 0, thresholds)
+            if prev and stats["median_ms"] > max(prev["median_ms"] * tolerance, floor):
+                regressions.append({"rows": n_rows, "stage": stage, "median_ms": stats["median_ms"],
+                                    "limit_ms": round(prev["median_ms"] * tolerance, 3), "reason": "baseline"})
+        for scope, errors in run.get("sketch_errors", {}).items():
+            for name, error in errors.items():
+                if error > sketch_error_bound(name):
+                    regressions.append({"rows": n_rows, "stage": f"sketch.{scope}.{name}", "error": error,
+                                        "limit": sketch_error_bound(name), "reason": "accuracy"})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="합성 데이터로 로드·필터·검색·패널 단계별 성능 측정")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="합성 행 수 (10k~5M)")
+    parser.add_argument("--repeat", type=int, default=3, help="단계별 반복 횟수(중앙값 보고)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--engines", nargs="+", default=["pandas"], choices=["pandas", "sqlite"])
+    parser.add_argument("--thresholds", default=str(THRESHOLDS_PATH), help="회귀 허용치 JSON")
+    parser.add_argument("--baseline", help="이전 실행 결과 JSON (단계별 중앙값 비교)")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="기준선 대비 허용 배수")
+    parser.add_argument("--workdir", help="합성 CSV·캐시를 둘 임시 디렉터리 위치")
+    parser.add_argument("--out", help="결과 JSON 경로 (기본: stdout)")
+    args = parser.parse_args(argv)
+
+    with open(args.thresholds, "r", encoding="utf-8") as f:
+        thresholds = json.load(f)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = []
+    for n_rows in args.sizes:
+        print(f"[benchmark] {n_rows:,} rows ...", file=sys.stderr)
+        results.append(run_size(n_rows, args.repeat, args.seed, args.workdir, args.engines))
+
+    regressions = find_regressions(results, thresholds, baseline, args.tolerance)
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "engines": args.engines,
+        },
+        "results": results,
+        "regressions": regressions,
+    }
+
+    text = json.dumps(report, ensure_ascii=False, indent=1)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    for r in regressions:
+        if r["reason"] == "accuracy":
+            print(f"[regression] {r['rows']:,} rows {r['stage']}: error {r['error']:.4%} > {r['limit']:.4%} (accuracy)",
+                  file=sys.stderr)
+            continue
+        print(f"[regression] {r['rows']:,} rows {r['stage']}: {r['median_ms']:.1f} ms > {r['limit_ms']:.1f} ms ({r['reason']})",
+              file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
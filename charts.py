@@ -0,0 +1,301 @@
+#######################
+# 패널별 집계 준비 + plotly 차트 생성
+#
+# streamlit_app.py의 각 패널과 benchmark.py가 같은 함수를 쓴다.
+# prepare_* 는 필터 뷰/큐브 슬라이스에서 차트 입력을 만들고, fig_* 는 plotly Figure만 만든다.
+# 행이 필요한 패널(표·Top 면적·산점도)도 뷰의 rows()/chunks()로 필요한 컬럼·행만 꺼낸다(SQL 엔진은 LIMIT까지 DB에서).
+# plotly는 fig_* 안에서 가져온다(첫 화면의 사이드바·KPI가 plotly 임포트를 기다리지 않도록,
+# Figure 캐시 적중 시에는 아예 필요 없음).
+import numpy as np
+import pandas as pd
+
+SUMMARY_COLUMNS = ["보고서명", "제출일", "제출연도", "조사시도", "조사시군구", "조사면적", "시대", "유적성격", "발간기관"]
+SCATTER_COLUMNS = ["조사_일수", "조사면적", "보고서명", "조사시도", "조사시군구", "제출연도"]
+
+
+#######################
+# 요약 KPI 패널
+def prepare_era_counts(view):
+    # 태그별 비트맵 ∩ 필터 마스크의 popcount(복수 시대 보고서는 각 시대에 집계)
+    era_counts = view.tag_counts("시대").reset_index()
+    era_counts.columns = ["시대", "건수"]
+    return era_counts
+
+
+def fig_era_donut(era_counts):
+    import plotly.express as px
+
+    fig_era = px.pie(
+        era_counts,
+        names="시대",
+        values="건수",
+        hole=0.55,
+        title="시대 분포"
+    )
+    fig_era.update_layout(
+        margin=dict(l=0, r=0, t=40, b=0),
+        height=300,
+        showlegend=True
+    )
+    return fig_era
+
+
+def prepare_type_counts(cube, top_n=6):
+    """유적성격 분포 (Top N + 기타)."""
+    type_counts = (
+        cube.rollup(["유적성격"])[["유적성격", "건수"]]
+            .sort_values("건수", ascending=False)
+            .reset_index(drop=True)
+    )
+    if len(type_counts) > top_n:
+        top = type_counts.iloc[:top_n].copy()
+        other_sum = int(type_counts.iloc[top_n:]["건수"].sum())
+        top.loc[len(top)] = ["기타", other_sum]
+        type_counts = top
+    return type_counts
+
+
+def fig_type_donut(type_counts):
+    import plotly.express as px
+
+    fig_type = px.pie(
+        type_counts,
+        names="유적성격",
+        values="건수",
+        hole=0.55,
+        title="유적성격 분포"
+    )
+    fig_type.update_layout(
+        margin=dict(l=0, r=0, t=40, b=0),
+        height=300,
+        showlegend=True
+    )
+    return fig_type
+
+
+#######################
+# 메인 시각화 패널
+def prepare_sido_agg(cube):
+    return cube.rollup(["조사시도"])[["조사시도", "건수", "합계면적"]]
+
+
+def fig_region_choropleth(agg, geojson, location, metric):
+    """행정구역 choropleth. geojson은 geo_assets가 만든 FeatureCollection(또는 그 정적 URL), 피처 id = location 값."""
+    import plotly.express as px
+
+    fig_map = px.choropleth(
+        agg,
+        geojson=geojson,
+        locations=location,
+        color=metric,
+        hover_name=location,
+        hover_data={location: False, "건수": True, "합계면적": ":,.0f"},
+    )
+    fig_map.update_geos(fitbounds="locations", visible=False)
+    fig_map.update_layout(margin=dict(l=0, r=0, t=10, b=0), height=420)
+    return fig_map
+
+
+def fig_sido_choropleth(sido_agg, geojson, metric):
+    return fig_region_choropleth(sido_agg, geojson, "조사시도", metric)
+
+
+def fig_sido_bar(sido_agg, metric):
+    import plotly.express as px
+
+    order = sido_agg.sort_values(metric, ascending=False)
+    fig_bar = px.bar(
+        order.head(17),
+        x="조사시도", y=metric,
+        hover_data=["건수", "합계면적"],
+        title=None
+    )
+    fig_bar.update_layout(margin=dict(l=0, r=0, t=10, b=0), height=420, xaxis_tickangle=-30)
+    return fig_bar
+
+
+def prepare_sigungu_top(cube, metric, top_n):
+    by_sigungu = cube.rollup(["조사시도", "조사시군구"])[["조사시도", "조사시군구", "건수", "합계면적"]]
+    top = by_sigungu.sort_values(metric, ascending=False).head(top_n).copy()
+    top["라벨"] = top["조사시도"].astype(str) + " " + top["조사시군구"].astype(str)
+    return top
+
+
+def prepare_sigungu_agg(cube):
+    """시군구 전체 집계 + 지도 id와 같은 "시도 시군구" 라벨."""
+    agg = cube.rollup(["조사시도", "조사시군구"])[["조사시도", "조사시군구", "건수", "합계면적"]].copy()
+    agg["라벨"] = agg["조사시도"].astype(str) + " " + agg["조사시군구"].astype(str)
+    return agg
+
+
+def fig_sigungu_choropleth(sigungu_agg, geojson, metric):
+    return fig_region_choropleth(sigungu_agg, geojson, "라벨", metric)
+
+
+def fig_sigungu_rank(top, metric):
+    import plotly.express as px
+
+    fig_rank = px.bar(
+        top.sort_values(metric, ascending=True),
+        x=metric, y="라벨", orientation="h",
+        hover_data=["건수", "합계면적"],
+        title=None
+    )
+    fig_rank.update_layout(margin=dict(l=0, r=0, t=10, b=0), height=420)
+    return fig_rank
+
+
+def has_year_month(cube):
+    return (
+        "제출연도" in cube.dimensions and "제출월" in cube.dimensions
+        and len(cube.rollup(["제출연도", "제출월"]).dropna()) > 0
+    )
+
+
+def prepare_year_month_pivot(cube):
+    pivot = cube.pivot("제출연도", "제출월")
+
+    # 1~12월 컬럼 보장
+    for m in range(1, 13):
+        if m not in pivot.columns:
+            pivot[m] = 0
+    return pivot[sorted(pivot.columns)]
+
+
+def fig_year_month_heatmap(pivot):
+    import plotly.express as px
+
+    fig_heat = px.imshow(
+        pivot.values,
+        labels=dict(x="월", y="연도", color="건수"),
+        x=[f"{m}월" for m in pivot.columns],
+        y=[str(y) for y in pivot.index],
+        text_auto=True,
+        aspect="auto"
+    )
+    fig_heat.update_layout(margin=dict(l=0, r=0, t=10, b=10), height=400)
+    return fig_heat
+
+
+def summary_columns(view):
+    return [c for c in SUMMARY_COLUMNS if c in view.columns]
+
+
+def table_page(view, sort_by, ascending, page, page_size):
+    """정렬 순서에서 한 페이지만 꺼낸다(엔진에서 잘라 오고, 브라우저로도 이 페이지만 직렬화)."""
+    return view.rows(summary_columns(view), sort_by, ascending, limit=page_size, offset=page * page_size)
+
+
+def prepare_summary_table(view, limit=None):
+    base_cols = summary_columns(view)
+    if not base_cols:
+        return None
+    return view.rows(base_cols, sort_by="제출일" if "제출일" in base_cols else None, limit=limit)
+
+
+#######################
+# 랭킹 & 인사이트 패널
+def prepare_rank_agg(cube, column, with_area=True):
+    return cube.rollup([column])[[column, "건수"] + (["합계면적"] if with_area else [])]
+
+
+def fig_rank_bar(agg, column, metric, top_n):
+    import plotly.express as px
+
+    top = agg.sort_values(metric, ascending=False).head(top_n)
+    fig = px.bar(
+        top.sort_values(metric, ascending=True),
+        x=metric, y=column, orientation="h",
+        hover_data=agg.columns.tolist(), title=None
+    )
+    fig.update_layout(margin=dict(l=0, r=0, t=10, b=0), height=350)
+    return fig
+
+
+def prepare_top_area_reports(view, n=10):
+    cols = ["보고서명", "조사면적", "조사시도", "조사시군구"]
+    if "제출연도" in view.columns:
+        cols.append("제출연도")
+    return view.rows(cols, sort_by="조사면적", ascending=False, limit=n)
+
+
+def fig_top_area_reports(top_reports):
+    import plotly.express as px
+
+    fig3 = px.bar(
+        top_reports.sort_values("조사면적"),
+        x="조사면적", y="보고서명", orientation="h",
+        hover_data=[c for c in top_reports.columns if c != "조사면적"],
+        title=None
+    )
+    fig3.update_layout(margin=dict(l=0, r=0, t=10, b=0), height=350)
+    return fig3
+
+
+def prepare_scatter(view):
+    """(산점도 행, 점 크기 힌트). 조사_일수는 로드 단계에서 미리 계산됨. 두 값이 다 있는 행의 그릴 컬럼만 읽는다."""
+    columns = [c for c in SCATTER_COLUMNS if c in view.columns]
+    tmp = view.rows(columns, notna=("조사면적", "조사_일수"))
+    tmp = tmp[tmp["조사면적"] >= 0].copy()
+    tmp["조사_일수"] = tmp["조사_일수"].astype("float64")
+    return tmp, tmp["조사면적"].rank(pct=True)
+
+
+def fig_area_duration_scatter(tmp, size_hint):
+    import plotly.express as px
+
+    hover_cols = [c for c in ["보고서명", "조사시도", "조사시군구", "제출연도"] if c in tmp.columns]
+    fig_scatter = px.scatter(
+        tmp, x="조사_일수", y="조사면적",
+        size=size_hint, size_max=18,
+        hover_data=hover_cols,
+        labels={"조사_일수": "조사 일수", "조사면적": "조사면적(㎡)"},
+        title="조사면적 vs 조사 기간(일)"
+    )
+    fig_scatter.update_layout(margin=dict(l=0, r=0, t=30, b=0), height=360)
+    return fig_scatter
+
+
+# 대용량 모드: 점 대신 로그 구간 2D 히스토그램(서버에서 집계, 브라우저로는 격자만 전송)
+def _scatter_values(view):
+    """(조사_일수, 조사면적) 묶음 순회 — 두 값이 다 있고 면적이 0 이상인 행, 1 미만은 1로."""
+    for chunk in view.chunks(["조사_일수", "조사면적"], notna=("조사면적", "조사_일수")):
+        days = chunk["조사_일수"].to_numpy(dtype="float64")
+        area = chunk["조사면적"].to_numpy(dtype="float64")
+        ok = area >= 0
+        yield np.clip(days[ok], 1, None), np.clip(area[ok], 1, None)
+
+
+def prepare_scatter_bins(view, bins=48):
+    """(구간 경계 x, 구간 경계 y, 건수 격자). 1 미만 값은 첫 구간에 포함.
+    두 번 훑는다(최댓값 → 구간 경계, 그다음 묶음별 히스토그램 누적) — 필터 결과 행 전체를 한 번에 두지 않음."""
+    days_max = area_max = 0.0
+    for days, area in _scatter_values(view):
+        if len(days):
+            days_max, area_max = max(days_max, days.max()), max(area_max, area.max())
+    if days_max == 0:
+        return None
+    x_edges = np.logspace(0, np.log10(days_max) + 1e-9, bins + 1)
+    y_edges = np.logspace(0, np.log10(area_max) + 1e-9, bins + 1)
+    counts = np.zeros((bins, bins))
+    for days, area in _scatter_values(view):
+        counts += np.histogram2d(days, area, bins=[x_edges, y_edges])[0]
+    return x_edges, y_edges, counts.T.astype("int64")
+
+
+def fig_area_duration_bins(binned):
+    import plotly.graph_objects as go
+
+    x_edges, y_edges, counts = binned
+    z = np.where(counts > 0, np.log10(np.maximum(counts, 1)), np.nan)
+    fig = go.Figure(go.Heatmap(
+        x=x_edges, y=y_edges, z=z,
+        customdata=counts,
+        colorscale="Viridis",
+        colorbar=dict(title="건수", tickvals=[0, 1, 2, 3, 4, 5], ticktext=["1", "10", "100", "1k", "10k", "100k"]),
+        hovertemplate="조사 일수 %{x:,.0f}<br>조사면적 %{y:,.0f}㎡<br>건수 %{customdata:,}<extra></extra>",
+    ))
+    fig.update_xaxes(type="log", title="조사 일수")
+    fig.update_yaxes(type="log", title="조사면적(㎡)")
+    fig.update_layout(title="조사면적 vs 조사 기간(일) — 밀도", margin=dict(l=0, r=0, t=30, b=0), height=360)
+    return fig
@@ -0,0 +1,411 @@
+#######################
+# 국가유산청 발굴보고서 데이터 로드 계층
+#
+# - CSV(cp949)는 한 번만 파싱하고 컬럼 타입을 고정한다.
+# - 파싱 결과는 원본 파일의 mtime/해시로 키잉한 Parquet 사이드카에 저장해
+#   다음 프로세스부터는 CSV 디코딩 없이 바로 읽는다.
+# - Streamlit 쪽 캐싱(세션 간 공유)은 streamlit_app.py에서 담당한다.
+# - ingest.py로 월별 배치를 적재하면 store/ 아래 제출연도 파티션 저장소가 만들어지고,
+#   이후에는 CSV 대신 저장소가 데이터 원천이 된다(load_dataset). 파티션 통계로
+#   연도 범위·시도 선택과 겹치지 않는 파티션은 읽지 않는다(prune_partitions).
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+import pandas as pd
+
+from sketches import Summary
+
+DATA_PATH = Path(__file__).with_name("국가유산청_발굴보고서.csv")
+CACHE_DIR = Path(__file__).with_name(".cache")
+STORE_DIR = Path(__file__).with_name("store")
+SOURCE_ENCODING = "cp949"
+
+# 사이드카 포맷이 바뀌면 올려서 기존 캐시를 무효화
+SIDECAR_VERSION = 3
+
+# 저카디널리티 문자열 컬럼 → category (시대는 "청동기,초기철기" 같은 조합 문자열이지만 조합 수가 적다)
+CATEGORY_COLUMNS = ["조사시도", "조사시군구", "유적성격", "발간기관", "시대"]
+# 메모리 압축용 dtype. 조사면적은 합계를 ㎡ 단위까지 보여주므로 float64 유지(float32면 합계가 어긋남)
+COMPACT_DTYPES = {"연번": "int32", "제출연도": "Int16", "제출월": "Int8", "조사_일수": "Int32"}
+DATE_COLUMNS = ["제출일", "조사시작", "조사종료"]
+DATE_DTYPE = "date32[pyarrow]"
+# 결측을 "미상"으로 채워 쓰는 컬럼은 카테고리에 미리 포함
+UNKNOWN_LABEL = "미상"
+
+# 저장소 파티션 키 / (선택) 하위 파티션 키 / 배치 중복 제거 키
+PARTITION_COLUMN = "제출연도"
+SUBPARTITION_COLUMN = "조사시도"
+KEY_COLUMN = "연번"
+
+
+#######################
+# 원본 파일 식별
+def source_fingerprint(path=DATA_PATH, cache_dir=CACHE_DIR):
+    """원본 파일의 mtime/size/sha1을 반환. mtime·size가 같으면 해시를 재계산하지 않는다."""
+    path = Path(path)
+    stat = path.stat()
+    manifest_path = Path(cache_dir) / f"{path.stem}.manifest.json"
+
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("mtime_ns") == stat.st_mtime_ns and manifest.get("size") == stat.st_size:
+            return manifest
+    except (OSError, ValueError):
+        pass
+
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    manifest = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha1": digest.hexdigest()}
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        _atomic_write_text(manifest_path, json.dumps(manifest))
+    except OSError:
+        pass
+    return manifest
+
+
+def _atomic_write_text(path, text):
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+#######################
+# 조사기간 파서(벡터화)
+# 실제 포맷: "2017년05월31일~2017년06월05일"
+# 변형 허용: "2017.05.31 ~ 2017.06.05", "2017-05-31~2017-06-05", "2017/5/31 - 2017/6/5"
+_DATE_PART = r"(\d{4})\s*[년.\-/]\s*(\d{1,2})\s*[월.\-/]\s*(\d{1,2})\s*일?"
+PERIOD_PATTERN = re.compile(rf"^\s*{_DATE_PART}\s*[~〜～\-–—]\s*{_DATE_PART}\s*$")
+
+
+def _assemble_dates(year, month, day):
+    parts = pd.DataFrame({"year": year, "month": month, "day": day})
+    parts = parts.apply(lambda col: pd.to_numeric(col, errors="coerce").astype("float64"))
+    return pd.to_datetime(parts, errors="coerce")
+
+
+def parse_survey_period(period):
+    """조사기간 문자열 Series → (조사시작, 조사종료, 조사_일수).
+
+    정규식 추출과 날짜 조립을 컬럼 단위로 처리하며, 종료일이 시작일보다 앞서거나
+    형식이 맞지 않으면 세 값 모두 결측으로 둔다.
+    """
+    parts = period.astype("string").str.extract(PERIOD_PATTERN)
+    start = _assemble_dates(parts[0], parts[1], parts[2])
+    end = _assemble_dates(parts[3], parts[4], parts[5])
+
+    valid = start.notna() & end.notna() & (end >= start)
+    start = start.where(valid)
+    end = end.where(valid)
+    days = ((end - start).dt.days + 1).astype("Int32")
+    return start, end, days
+
+
+def period_parse_failures(df):
+    """조사기간 값은 있으나 일수로 변환하지 못한 행 수."""
+    if "조사기간" not in df.columns or "조사_일수" not in df.columns:
+        return 0
+    return int((df["조사기간"].notna() & df["조사_일수"].isna()).sum())
+
+
+#######################
+# 파싱 & 타입 고정
+def read_source_csv(path=DATA_PATH):
+    return pd.read_csv(path, encoding=SOURCE_ENCODING)
+
+
+def prepare_frame(raw):
+    """원본 프레임의 타입을 고정하고 파생 컬럼(제출연도/제출월, 조사시작/조사종료/조사_일수)을 한 번에 만든다."""
+    df = raw.copy()
+
+    if "제출일" in df.columns:
+        df["제출일"] = pd.to_datetime(df["제출일"], errors="coerce")
+        df["제출연도"] = df["제출일"].dt.year.astype("Int32")
+        df["제출월"] = df["제출일"].dt.month.astype("Int32")
+
+    if "조사기간" in df.columns:
+        df["조사시작"], df["조사종료"], df["조사_일수"] = parse_survey_period(df["조사기간"])
+
+    if "조사면적" in df.columns:
+        df["조사면적"] = pd.to_numeric(df["조사면적"], errors="coerce").astype("float64")
+
+    return compact_frame(df)
+
+
+def compact_frame(df):
+    """메모리 압축 표현: category + 좁은 정수 + date32 날짜. 자유 텍스트는 pandas 기본 arrow 문자열 그대로."""
+    df = apply_categories(df)
+    for c, t in COMPACT_DTYPES.items():
+        if c in df.columns and str(df[c].dtype) != t:
+            values = pd.to_numeric(df[c], errors="coerce")
+            if t[0] == "i" and values.isna().any():
+                t = t.capitalize()  # 결측이 있으면 nullable 정수
+            df[c] = values.astype(t)
+    for c in DATE_COLUMNS:
+        if c in df.columns and str(df[c].dtype) != pd.api.types.pandas_dtype(DATE_DTYPE).name:
+            df[c] = pd.to_datetime(df[c], errors="coerce").astype(DATE_DTYPE)
+    return df
+
+
+def memory_report(df):
+    """컬럼별 메모리 사용량 표(운영 확인용). object_bytes는 같은 값을 object dtype으로 들고 있을 때의 크기."""
+    rows = []
+    for c in df.columns:
+        s = df[c]
+        used = int(s.memory_usage(deep=True, index=False))
+        baseline = int(s.astype("object").memory_usage(deep=True, index=False))
+        rows.append({
+            "컬럼": c,
+            "dtype": str(s.dtype),
+            "bytes": used,
+            "object_bytes": baseline,
+            "압축비": round(baseline / used, 2) if used else None,
+        })
+    report = pd.DataFrame(rows)
+    total = {"컬럼": "(합계)", "dtype": "", "bytes": int(report["bytes"].sum()),
+             "object_bytes": int(report["object_bytes"].sum())}
+    total["압축비"] = round(total["object_bytes"] / total["bytes"], 2) if total["bytes"] else None
+    return pd.concat([report, pd.DataFrame([total])], ignore_index=True)
+
+
+def apply_categories(df):
+    """저카디널리티 컬럼을 category로(결측 대체값 "미상"도 카테고리에 포함). 파티션 병합 후에도 사용."""
+    for c in CATEGORY_COLUMNS:
+        if c in df.columns:
+            cat = df[c].astype("category")
+            if UNKNOWN_LABEL not in cat.cat.categories:
+                cat = cat.cat.add_categories([UNKNOWN_LABEL])
+            df[c] = cat
+    return df
+
+
+#######################
+# Parquet 사이드카
+def sidecar_path(fingerprint, path=DATA_PATH, cache_dir=CACHE_DIR):
+    return Path(cache_dir) / f"{Path(path).stem}-{fingerprint['sha1'][:16]}-v{SIDECAR_VERSION}.parquet"
+
+
+def load_reports(path=DATA_PATH, cache_dir=CACHE_DIR):
+    """타입이 고정된 보고서 프레임을 반환. 사이드카가 있으면 CSV를 읽지 않는다."""
+    try:
+        fingerprint = source_fingerprint(path, cache_dir)
+        sidecar = sidecar_path(fingerprint, path, cache_dir)
+    except OSError:
+        return prepare_frame(read_source_csv(path))
+
+    if sidecar.exists():
+        try:
+            return pd.read_parquet(sidecar)
+        except Exception:
+            pass  # 손상되었거나 pyarrow가 없으면 CSV로 재생성
+
+    df = prepare_frame(read_source_csv(path))
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f"{sidecar}.tmp-{os.getpid()}"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, sidecar)
+        # 같은 원본의 이전 버전 사이드카 정리
+        for old in Path(cache_dir).glob(f"{Path(path).stem}-*.parquet"):
+            if old != sidecar:
+                old.unlink(missing_ok=True)
+    except Exception:
+        pass  # 읽기 전용 환경 등 → 캐시 없이 동작
+
+    return df
+
+
+#######################
+# 제출연도 파티션 저장소 (ingest.py가 기록)
+# store/
+#   manifest.json              버전·파티션별 행 수/연번·제출일 범위/연도/시도 목록
+#                              + store_id(초기화마다 새로)·changes(버전별로 다시 쓴 파티션 — 파생 DB·산출물 증분 갱신용)
+#   _keys/<연번 // 1만>.parquet  연번 → 파티션 (재제출 중복 제거용, 연번 구간별 조각)
+#   제출연도=2023/part.parquet
+#   제출연도=2023/조사시도=경남/part.parquet   (ingest.py --init --by-sido)
+#   <파티션>/summary.json      병합 가능한 파티션 요약(sketches.Summary) — 파티션을 쓸 때 함께 갱신
+def partition_name(value):
+    return f"{PARTITION_COLUMN}={'__null__' if pd.isna(value) else int(value)}"
+
+
+def subpartition_name(value):
+    return f"{SUBPARTITION_COLUMN}={'__null__' if pd.isna(value) else value}"
+
+
+def partition_names(frame, subpartition=None):
+    """행별 파티션 이름(저장소 기준 상대 경로). subpartition이 있으면 "제출연도=2023/조사시도=경남"."""
+    names = frame[PARTITION_COLUMN].astype("object").map(partition_name)
+    if subpartition:
+        names = names + "/" + frame[subpartition].astype("object").map(subpartition_name)
+    return names
+
+
+def prune_partitions(partitions, year_range=None, regions=None):
+    """연도 범위·시도 선택과 겹치는 파티션 이름(정렬된 튜플). partitions는 manifest["partitions"].
+
+    연도 범위가 있으면 제출연도 결측 파티션은 제외(필터 마스크와 같은 기준). 빈 시도 선택은 전체.
+    통계(year/regions)가 없는 옛 파티션은 항상 포함한다.
+    """
+    selected = set(regions) if regions else None
+    names = []
+    for name, stats in partitions.items():
+        if year_range and "year" in stats:
+            year = stats["year"]
+            if year is None or not year_range[0] <= year <= year_range[1]:
+                continue
+        if selected is not None and stats.get("regions") and selected.isdisjoint(stats["regions"]):
+            continue
+        names.append(name)
+    return tuple(sorted(names))
+
+
+def store_catalog(manifest):
+    """파티션 통계만으로 만든 저장소 목록: 연도 범위, 시도 선택지("미상" 포함), 파티션 통계.
+    데이터 파일은 읽지 않는다. 통계가 없는 옛 저장소면 None(전체 로드로 동작)."""
+    partitions = manifest["partitions"]
+    if not partitions or any("year" not in p or "regions" not in p for p in partitions.values()):
+        return None
+    years = [p["year"] for p in partitions.values() if p["year"] is not None]
+    return {
+        "years": (min(years), max(years)) if years else None,
+        "regions": sorted({r for p in partitions.values() for r in p["regions"]}),
+        "partitions": partitions,
+    }
+
+
+def store_changes(manifest, store_id, version):
+    """(store_id, version) 시점 이후 다시 쓴 파티션 이름 집합(ingest가 manifest["changes"]에 남긴 기록).
+    같은 버전이면 빈 집합. 다른 저장소(재초기화)이거나 기록이 그 사이 버전을 다 덮지 못하면 None → 전체 재구성."""
+    if manifest is None or store_id is None or store_id != manifest.get("store_id") or version is None:
+        return None
+    if version > manifest["version"]:
+        return None
+    log = {entry["version"]: entry["partitions"] for entry in manifest.get("changes", [])}
+    needed = range(version + 1, manifest["version"] + 1)
+    if any(v not in log for v in needed):
+        return None
+    return {name for v in needed for name in log[v]}
+
+
+def store_manifest(store_dir=STORE_DIR):
+    try:
+        with open(Path(store_dir) / "manifest.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_store_manifest(manifest, store_dir=STORE_DIR):
+    _atomic_write_text(Path(store_dir) / "manifest.json", json.dumps(manifest, ensure_ascii=False, indent=1))
+
+
+def load_partition(name, store_dir=STORE_DIR):
+    return pd.read_parquet(Path(store_dir) / name / "part.parquet")
+
+
+def load_store(store_dir=STORE_DIR, manifest=None, partitions=None):
+    """저장소 파티션을 파티션 키 순서로 이어 붙인다. partitions를 주면 그 파티션만 읽는다."""
+    manifest = manifest or store_manifest(store_dir)
+    names = sorted(manifest["partitions"]) if partitions is None else sorted(partitions)
+    parts = [load_partition(name, store_dir) for name in names]
+    if parts:
+        df = pd.concat(parts, ignore_index=True)
+    elif manifest["partitions"]:
+        # 겹치는 파티션이 없으면 스키마만 유지한 빈 프레임
+        df = load_partition(min(manifest["partitions"]), store_dir).iloc[:0]
+    else:
+        df = pd.DataFrame()
+    return compact_frame(df)
+
+
+#######################
+# 파티션 요약: 선택한 연도·시도 범위의 통계를 행을 읽지 않고 요약 병합으로
+SUMMARY_FILE = "summary.json"
+
+
+def pruning_stats(part):
+    """가지치기용 파티션 통계: 제출연도(한 파티션 = 한 연도)와 시도 목록(결측은 "미상", 필터 선택지와 같은 표기)."""
+    years = part[PARTITION_COLUMN].dropna()
+    regions = part[SUBPARTITION_COLUMN] if SUBPARTITION_COLUMN in part.columns else pd.Series(dtype="object")
+    return {
+        "year": int(years.iloc[0]) if len(years) else None,
+        "regions": sorted(regions.astype("object").where(regions.notna(), UNKNOWN_LABEL).unique()),
+    }
+
+
+def write_partition_summary(part, name, store_dir=STORE_DIR):
+    _atomic_write_text(Path(store_dir) / name / SUMMARY_FILE, json.dumps(Summary.of(part).to_dict()))
+
+
+def load_store_summaries(store_dir=STORE_DIR, manifest=None, partitions=None):
+    """{파티션 이름: Summary}. partitions를 주면 그 파티션만. 요약 파일이 없는 파티션(옛 저장소)이 하나라도 있으면 None."""
+    manifest = manifest or store_manifest(store_dir)
+    summaries = {}
+    for name in sorted(manifest["partitions"]) if partitions is None else sorted(partitions):
+        try:
+            with open(Path(store_dir) / name / SUMMARY_FILE, "r", encoding="utf-8") as f:
+                summaries[name] = Summary.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+    return summaries
+
+
+def frame_summaries(frame, subpartition=SUBPARTITION_COLUMN):
+    """메모리 프레임을 저장소와 같은 (제출연도, 조사시도) 단위로 요약 → (가지치기 통계, {이름: Summary}).
+    저장소가 없을 때(CSV 원천) 같은 병합 경로를 쓰기 위한 것."""
+    return chunk_summaries([frame], subpartition)
+
+
+def chunk_summaries(chunks, subpartition=SUBPARTITION_COLUMN, into=None):
+    """frame_summaries의 묶음 단위 판(iter_dataset_chunks 등): 묶음마다 요약해 파티션 이름별로 병합한다.
+    한 파티션이 여러 묶음에 걸쳐도 결과는 같다(통계의 시도 목록은 합집합). into=(통계, 요약)에 이어 쌓을 수 있다."""
+    stats, summaries = into if into is not None else ({}, {})
+    for frame in chunks:
+        sub = subpartition if subpartition in frame.columns else None
+        for name, part in frame.groupby(partition_names(frame, sub), sort=False):
+            part_stats, summary = pruning_stats(part), Summary.of(part)
+            if name in stats:
+                regions = set(stats[name]["regions"]) | set(part_stats["regions"])
+                stats[name] = {"year": stats[name]["year"], "regions": sorted(regions)}
+                summaries[name].merge(summary)
+            else:
+                stats[name], summaries[name] = part_stats, summary
+    order = sorted(stats)
+    return {name: stats[name] for name in order}, {name: summaries[name] for name in order}
+
+
+def dataset_version(path=DATA_PATH, store_dir=STORE_DIR):
+    """현재 데이터 원천의 버전 문자열(캐시 키). 저장소가 있으면 저장소 버전, 없으면 CSV mtime."""
+    manifest = store_manifest(store_dir)
+    if manifest is not None:
+        return f"store-{manifest['version']}"
+    return f"csv-{Path(path).stat().st_mtime_ns}"
+
+
+def load_dataset(path=DATA_PATH, store_dir=STORE_DIR, cache_dir=CACHE_DIR, partitions=None):
+    """대시보드 데이터 원천: 적재된 저장소가 있으면 저장소, 없으면 번들 CSV(사이드카 캐시).
+    partitions(prune_partitions 결과)는 저장소에만 적용된다."""
+    manifest = store_manifest(store_dir)
+    if manifest is not None:
+        return load_store(store_dir, manifest, partitions)
+    return load_reports(path, cache_dir)
+
+
+def iter_dataset_chunks(path=DATA_PATH, store_dir=STORE_DIR, chunk_rows=50_000):
+    """데이터 원천을 타입 고정된 묶음 단위로 순회(전체를 메모리에 올리지 않는 적재용)."""
+    manifest = store_manifest(store_dir)
+    if manifest is not None:
+        for name in sorted(manifest["partitions"]):
+            yield load_partition(name, store_dir)
+        return
+    for raw in pd.read_csv(path, encoding=SOURCE_ENCODING, chunksize=chunk_rows):
+        yield prepare_frame(raw)
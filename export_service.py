@@ -0,0 +1,100 @@
+#######################
+# 필터 결과 내보내기 (지연 실행 + 결과 캐시)
+#
+# - 다운로드 버튼을 누를 때만 직렬화한다(리런마다 to_csv 하지 않음).
+# - 결과는 (필터 키, 형식)으로 LRU 캐시해 같은 조건의 재다운로드·다른 세션과 공유한다.
+# - 결과는 파일 전체를 담은 bytes 한 덩어리다(스트리밍 아님): st.download_button이 내용 전체를 받아
+#   미디어 저장소에 올리므로 최종 파일 크기만큼은 메모리에 있어야 한다.
+#   CSV는 행 묶음 단위로 인코딩해 그 버퍼에 이어 쓰므로, 전체 CSV 문자열과 그 인코딩 사본을 따로 만들지 않아
+#   최대 메모리가 파일 크기 + 묶음 하나 정도로 줄어든다(22만 행: to_csv 한 번 대비 약 2.8배 → 1.5배).
+# - 내보낼 행은 캐시에 없을 때만 엔진에서 읽고(build), EXPORT_MAX_ROWS행까지만 담는다.
+import importlib.util
+import io
+import os
+import threading
+from collections import OrderedDict
+
+EXPORT_FORMATS = {
+    "csv": {"label": "CSV", "ext": "csv", "mime": "text/csv"},
+    "parquet": {"label": "Parquet", "ext": "parquet", "mime": "application/vnd.apache.parquet"},
+    "xlsx": {
+        "label": "Excel",
+        "ext": "xlsx",
+        "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    },
+}
+EXCEL_MAX_ROWS = 1_048_575  # 헤더 1행 제외
+# 한 번에 내보내는 최대 행 수(결과 파일 전체가 메모리에 있어야 하므로 상한을 둔다)
+EXPORT_MAX_ROWS = int(os.environ.get("DASHBOARD_EXPORT_MAX_ROWS", "1000000"))
+CSV_CHUNK_ROWS = 50_000
+
+
+def available_formats(n_rows=0):
+    """현재 환경·행 수에서 제공 가능한 형식 목록."""
+    formats = ["csv"]
+    if importlib.util.find_spec("pyarrow") is not None:
+        formats.append("parquet")
+    if importlib.util.find_spec("openpyxl") is not None and n_rows <= EXCEL_MAX_ROWS:
+        formats.append("xlsx")
+    return formats
+
+
+def iter_csv_chunks(frame, chunk_rows=CSV_CHUNK_ROWS):
+    """CSV(utf-8-sig)를 행 묶음 단위 바이트로 생성."""
+    yield "﻿".encode("utf-8")
+    for start in range(0, max(len(frame), 1), chunk_rows):
+        part = frame.iloc[start:start + chunk_rows]
+        yield part.to_csv(index=False, header=(start == 0)).encode("utf-8")
+
+
+def serialize(frame, fmt):
+    """프레임 → 내려받을 파일 전체 bytes(단일 버퍼)."""
+    buf = io.BytesIO()
+    if fmt == "csv":
+        for chunk in iter_csv_chunks(frame):
+            buf.write(chunk)
+    elif fmt == "parquet":
+        frame.to_parquet(buf, index=False)
+    elif fmt == "xlsx":
+        frame.to_excel(buf, index=False, sheet_name="발굴보고서", engine="openpyxl")
+    else:
+        raise ValueError(f"지원하지 않는 내보내기 형식: {fmt}")
+    return buf.getvalue()
+
+
+class ExportCache:
+    """(필터 키, 형식) → 직렬화 바이트 LRU. 다운로드 콜백은 별도 스레드에서 돌므로 잠금 사용."""
+
+    def __init__(self, max_entries=16, max_bytes=256 * 2**20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def export(self, key, build, fmt):
+        """build()는 내보낼 프레임을 만든다(캐시 적중이면 부르지 않음 — 행을 읽지 않는다)."""
+        cache_key = (key, fmt)
+        with self._lock:
+            if cache_key in self._entries:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return self._entries[cache_key]
+            self.misses += 1
+
+        data = serialize(build(), fmt)
+
+        with self._lock:
+            if cache_key not in self._entries and len(data) <= self.max_bytes:
+                self._entries[cache_key] = data
+                self._bytes += len(data)
+                while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                    _, old = self._entries.popitem(last=False)
+                    self._bytes -= len(old)
+        return data
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,68 @@
+#######################
+# plotly Figure 캐시 (집계 입력 지문 + 차트 파라미터 → Figure)
+#
+# - px.* 호출(트레이스 생성 + 검증)이 리런 시간의 큰 부분이라, 입력 집계가 그대로면 다시 만들지 않는다.
+# - 값은 검증이 끝난 Figure 객체다. st.plotly_chart는 Figure를 받으면 재검증이 거의 공짜이고
+#   (JSON/dict를 넘기면 전체를 다시 검증해 오히려 느림) 자체적으로 JSON 직렬화만 한다.
+# - 캐시된 Figure는 세션 간에 공유되므로 꺼낸 뒤 update_layout 등으로 수정하지 말 것.
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def fingerprint(obj):
+    """집계 입력의 내용 지문(작은 롤업·피벗 기준으로 설계 — 큰 프레임은 필터 키를 대신 쓸 것)."""
+    h = hashlib.blake2b(digest_size=16)
+    _update(h, obj)
+    return h.hexdigest()
+
+
+def _update(h, obj):
+    if isinstance(obj, pd.DataFrame):
+        h.update(repr((list(obj.columns), [str(t) for t in obj.dtypes])).encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, pd.Series):
+        h.update(repr((obj.name, str(obj.dtype))).encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, (tuple, list)):
+        h.update(b"(")
+        for item in obj:
+            _update(h, item)
+        h.update(b")")
+    else:
+        h.update(repr(obj).encode("utf-8"))
+
+
+class FigureCache:
+    """(차트 이름, 입력 지문, 파라미터) → Figure LRU. 세션들이 동시에 쓰므로 잠금 사용."""
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, name, key, params, build):
+        cache_key = (name, key, params)
+        with self._lock:
+            if cache_key in self._entries:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return self._entries[cache_key]
+            self.misses += 1
+
+        fig = build()
+
+        with self._lock:
+            self._entries[cache_key] = fig
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return fig
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,383 @@
+#######################
+# 사이드바 필터 엔진 (비트맵 인덱스)
+#
+# 로드 시점에 패싯 값마다 행 비트맵(np.packbits로 압축한 bool 배열)을 만들어 두고,
+# 필터 조합은 패싯 내부 OR · 패싯 간 AND 비트 연산으로만 계산한다.
+# 실제 행(DataFrame)은 마지막에 한 번만 꺼낸다.
+# save()/load()는 precompute.py가 만드는 사전 계산 산출물용(비트맵 행렬을 .npy로 저장하고 mmap으로 연다).
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+UNKNOWN_LABEL = "미상"
+
+# 다중선택 패싯(결측은 "미상"으로 취급)
+FACET_COLUMNS = ["조사시도", "조사시군구", "시대", "유적성격", "발간기관"]
+# 쉼표로 이어 붙인 다중값 태그 컬럼(예: "청동기,삼국") → 태그별 비트맵
+TAG_COLUMNS = ["시대"]
+TAG_SEPARATOR = ","
+# 계층 패싯: {하위 컬럼: 상위 컬럼}. 하위 선택지는 선택된 상위 값 아래의 값만 보여 준다.
+FACET_HIERARCHY = {"조사시군구": "조사시도"}
+YEAR_COLUMN = "제출연도"
+AREA_COLUMN = "조사면적"
+
+
+def _pack(bool_array):
+    return np.packbits(bool_array)
+
+
+def _stack(bitmaps, n_bytes):
+    bitmaps = list(bitmaps)
+    return np.stack(bitmaps) if bitmaps else np.zeros((0, n_bytes), dtype=np.uint8)
+
+
+# 바이트별 1비트 수. numpy 2.0+는 np.bitwise_count, 그 이전은 256칸 표
+if hasattr(np, "bitwise_count"):
+    def _popcount(bitmaps, axis=None):
+        return np.bitwise_count(bitmaps).sum(axis=axis, dtype=np.int64)
+else:
+    _POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(bitmaps, axis=None):
+        return _POPCOUNT[bitmaps].sum(axis=axis, dtype=np.int64)
+
+
+def split_tags(series):
+    """다중값 태그 컬럼 → (행 위치, 태그) 롱 포맷. 같은 행의 중복 태그("조선,조선")는 한 번만."""
+    series = series.reset_index(drop=True)
+    tags = (
+        series.astype("object").where(series.notna(), UNKNOWN_LABEL)
+              .str.split(TAG_SEPARATOR)
+              .explode()
+              .str.strip()
+    )
+    tags = tags[tags.notna() & (tags != "")]
+    pairs = pd.DataFrame({"row": tags.index.to_numpy(), "tag": tags.to_numpy()})
+    return pairs.drop_duplicates(ignore_index=True)
+
+
+class FilterIndex:
+    """보고서 프레임 하나에 대한 읽기 전용 비트맵 인덱스."""
+
+    def __init__(self, df, facets=FACET_COLUMNS, tag_columns=TAG_COLUMNS):
+        self.n_rows = len(df)
+        self._n_bytes = (self.n_rows + 7) // 8
+        self.bitmaps = {}
+        self._matrices = {}
+        self.tag_columns = {c for c in tag_columns if c in df.columns}
+
+        for c in facets:
+            if c in self.tag_columns:
+                table = self._build_tag_bitmaps(df[c])
+            elif c in df.columns:
+                table = self._build_bitmaps(df[c])
+            else:
+                continue
+            # 패싯 하나 = (값 수 × 바이트 수) 행렬, 값별 비트맵은 그 행(뷰) → 건수는 행렬 연산 한 번
+            self._set_matrix(c, list(table), _stack(table.values(), self._n_bytes))
+
+        # 계층: 상위 값 → 하위 값 목록(시도 → 시군구)
+        self.hierarchy = {}
+        for child, parent in FACET_HIERARCHY.items():
+            if child in self.bitmaps and parent in self.bitmaps and parent not in self.tag_columns:
+                self.hierarchy[child] = (parent, self._build_hierarchy(df[parent], df[child]))
+
+        # 연도: 값별 비트맵 → 범위는 해당 연도 비트맵들의 OR
+        if YEAR_COLUMN in df.columns:
+            years = df[YEAR_COLUMN].dropna()
+            self.year_bitmaps = {
+                int(y): _pack((df[YEAR_COLUMN] == y).fillna(False).to_numpy(dtype=bool))
+                for y in sorted(years.unique())
+            }
+        else:
+            self.year_bitmaps = {}
+
+        # 면적: 정렬 순서를 보관해 범위 질의를 searchsorted로 처리(결측 제외)
+        if AREA_COLUMN in df.columns:
+            area = df[AREA_COLUMN].to_numpy(dtype="float64", na_value=np.nan)
+            valid = np.flatnonzero(~np.isnan(area))
+            order = valid[np.argsort(area[valid], kind="stable")]
+            self._area_order = order
+            self._area_sorted = area[order]
+        else:
+            self._area_order = None
+            self._area_sorted = None
+
+    #######################
+    # 사전 계산 산출물(precompute.py)
+    def save(self, directory):
+        """패싯별 비트맵을 (값 수 × 바이트 수) 행렬 하나로 저장. 값 목록 등은 meta.json."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "n_rows": self.n_rows, "tag_columns": sorted(self.tag_columns), "facets": {}, "years": list(self.year_bitmaps),
+            "hierarchy": {child: {"parent": parent, "values": values} for child, (parent, values) in self.hierarchy.items()},
+        }
+        for i, (column, table) in enumerate(self.bitmaps.items()):
+            meta["facets"][column] = {"file": f"facet{i}.npy", "values": list(table)}
+            np.save(directory / f"facet{i}.npy", self._matrices[column])
+        np.save(directory / "years.npy", _stack(self.year_bitmaps.values(), self._n_bytes))
+        if self._area_order is not None:
+            np.save(directory / "area_order.npy", self._area_order)
+            np.save(directory / "area_sorted.npy", self._area_sorted)
+        with open(directory / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory):
+        """save()로 저장한 인덱스를 연다. 비트맵은 읽기 전용 mmap 행렬의 행(복사 없음)."""
+        directory = Path(directory)
+        with open(directory / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self = cls.__new__(cls)
+        self.n_rows = meta["n_rows"]
+        self._n_bytes = (self.n_rows + 7) // 8
+        self.tag_columns = set(meta["tag_columns"])
+        self.bitmaps = {}
+        self._matrices = {}
+        for column, info in meta["facets"].items():
+            self._set_matrix(column, info["values"], np.load(directory / info["file"], mmap_mode="r"))
+        self.hierarchy = {child: (h["parent"], h["values"]) for child, h in meta["hierarchy"].items()}
+        years = np.load(directory / "years.npy", mmap_mode="r")
+        self.year_bitmaps = {int(y): years[i] for i, y in enumerate(meta["years"])}
+        if (directory / "area_order.npy").exists():
+            self._area_order = np.load(directory / "area_order.npy", mmap_mode="r")
+            self._area_sorted = np.load(directory / "area_sorted.npy", mmap_mode="r")
+        else:
+            self._area_order = None
+            self._area_sorted = None
+        return self
+
+    #######################
+    # 증분 갱신(저장소 배치 적재 → precompute.update_artifacts)
+    def update(self, frame, start):
+        """frame(바뀐 뒤 전체 프레임)의 인덱스. 앞 start행은 이 인덱스의 행과 같다고 보고
+        그 비트는 바이트 단위로 복사하고, 뒤쪽 행(바뀐 파티션부터)의 비트만 새로 만든다.
+        계층(시도 → 시군구)은 상위·하위 두 컬럼의 고유 쌍이라 frame에서 다시 뽑는다."""
+        facets = [c for c in FACET_COLUMNS if c in frame.columns]
+        if facets != list(self.bitmaps) or (AREA_COLUMN in frame.columns) != (self._area_order is not None):
+            return FilterIndex(frame)  # 컬럼 구성이 바뀌면 전체 빌드
+
+        tail = FilterIndex(frame.iloc[start:].reset_index(drop=True), facets, self.tag_columns)
+        index = FilterIndex.__new__(FilterIndex)
+        index.n_rows = len(frame)
+        index._n_bytes = (index.n_rows + 7) // 8
+        index.tag_columns = set(self.tag_columns)
+        index.bitmaps = {}
+        index._matrices = {}
+        for column in facets:
+            values, matrix = index._splice(start, self.bitmaps[column], self._matrices[column],
+                                           tail.bitmaps[column], tail._matrices[column])
+            index._set_matrix(column, values, matrix)
+
+        index.hierarchy = {
+            child: (parent, self._build_hierarchy(frame[parent], frame[child]))
+            for child, (parent, _) in self.hierarchy.items()
+        }
+
+        years, matrix = index._splice(start, self.year_bitmaps, _stack(self.year_bitmaps.values(), self._n_bytes),
+                                      tail.year_bitmaps, _stack(tail.year_bitmaps.values(), tail._n_bytes))
+        index.year_bitmaps = {y: matrix[i] for i, y in enumerate(years)}
+
+        index._area_order = index._area_sorted = None
+        if self._area_order is not None:
+            # 앞부분 정렬 순서(위치 < start)와 뒤쪽 정렬 순서를 이어 안정 정렬 → 같은 값은 위치 순(전체 빌드와 같음)
+            keep = np.asarray(self._area_order) < start
+            order = np.concatenate([np.asarray(self._area_order)[keep], tail._area_order + start])
+            values = np.concatenate([np.asarray(self._area_sorted)[keep], tail._area_sorted])
+            merged = np.argsort(values, kind="stable")
+            index._area_order = order[merged]
+            index._area_sorted = values[merged]
+        return index
+
+    def _splice(self, start, old_table, old_matrix, new_table, new_matrix):
+        """값별 비트맵 행렬 두 개(앞 start행 기존 · 뒤쪽 새 행)를 self.n_rows행 행렬 하나로.
+        값 목록은 합집합(정렬), 어느 행에도 없게 된 값(재제출로 사라진 값)은 뺀다."""
+        values = sorted(set(old_table) | set(new_table))
+        index = {v: i for i, v in enumerate(values)}
+        old_rows = [index[v] for v in old_table]
+        new_rows = [index[v] for v in new_table]
+        head = start // 8  # 온전히 앞부분에 속한 바이트 수
+        out = np.zeros((len(values), self._n_bytes), dtype=np.uint8)
+        if old_rows:
+            out[old_rows, :head] = np.asarray(old_matrix)[:, :head]
+        bits = np.zeros((len(values), self.n_rows - head * 8), dtype=bool)
+        if old_rows and start > head * 8:
+            bits[old_rows, :start - head * 8] = np.unpackbits(
+                np.asarray(old_matrix)[:, head:head + 1], axis=1, count=start - head * 8
+            )
+        if new_rows:
+            bits[new_rows, start - head * 8:] = np.unpackbits(
+                np.asarray(new_matrix), axis=1, count=self.n_rows - start
+            )
+        out[:, head:] = np.packbits(bits, axis=1)
+        used = _popcount(out, axis=1) > 0
+        return [v for v, u in zip(values, used) if u], out[used]
+
+    def _set_matrix(self, column, values, matrix):
+        self._matrices[column] = matrix
+        self.bitmaps[column] = {v: matrix[i] for i, v in enumerate(values)}
+
+    def _build_bitmaps(self, series):
+        labels = series.astype("object").where(series.notna(), UNKNOWN_LABEL)
+        codes, uniques = pd.factorize(labels, sort=True)
+        return {value: _pack(codes == i) for i, value in enumerate(uniques)}
+
+    def _build_tag_bitmaps(self, series):
+        # 보고서×태그 희소 행렬을 태그(열)별 비트맵으로 보관
+        pairs = split_tags(series)
+        bitmaps = {}
+        for tag, rows in pairs.groupby("tag", sort=True)["row"]:
+            hit = np.zeros(self.n_rows, dtype=bool)
+            hit[rows.to_numpy()] = True
+            bitmaps[tag] = _pack(hit)
+        return bitmaps
+
+    @staticmethod
+    def _build_hierarchy(parent, child):
+        pairs = pd.DataFrame({
+            "parent": parent.astype("object").where(parent.notna(), UNKNOWN_LABEL),
+            "child": child.astype("object").where(child.notna(), UNKNOWN_LABEL),
+        }).drop_duplicates()
+        return {p: sorted(group) for p, group in pairs.groupby("parent", sort=True)["child"]}
+
+    #######################
+    # 비트맵 연산
+    def full(self):
+        # 패딩 비트까지 1이면 popcount가 틀어지므로 유효 행만 1로 설정
+        return _pack(np.ones(self.n_rows, dtype=bool))
+
+    def empty(self):
+        return np.zeros(self._n_bytes, dtype=np.uint8)
+
+    def _union(self, bitmaps):
+        bitmaps = list(bitmaps)
+        if not bitmaps:
+            return self.empty()
+        return np.bitwise_or.reduce(bitmaps)
+
+    def from_positions(self, positions):
+        """행 위치 배열(예: 검색 포스팅 리스트) → 비트맵."""
+        hit = np.zeros(self.n_rows, dtype=bool)
+        hit[positions] = True
+        return _pack(hit)
+
+    def facet_values(self, column):
+        return list(self.bitmaps.get(column, {}).keys())
+
+    def child_values(self, column, parent_values):
+        """계층 패싯의 하위 선택지: 선택된 상위 값 아래에 있는 값만(사전 계산된 계층 사용)."""
+        parent, values = self.hierarchy[column]
+        wanted = set()
+        for p in parent_values:
+            wanted.update(values.get(p, ()))
+        return [v for v in self.facet_values(column) if v in wanted]
+
+    def facet_mask(self, column, values, mode="any"):
+        """패싯 내부 조합. mode="any"는 OR, "all"은 AND(태그 컬럼에서 "모두 포함")."""
+        table = self.bitmaps.get(column)
+        if table is None:
+            return None
+        selected = set(values)
+        if mode != "all" and selected.issuperset(table):
+            return None  # 전체 선택 = 필터 없음("모두 포함"이면 모든 값을 가진 행만 남으므로 해당 없음)
+
+        if mode == "all":
+            if not selected.issubset(table):
+                return self.empty()
+            result = self.full()
+            for v in selected:
+                result &= table[v]
+            return result
+
+        # 단일값 컬럼은 선택하지 않은 값이 더 적으면 여집합으로 계산
+        # (태그 컬럼은 한 행이 여러 값에 걸치므로 여집합이 성립하지 않음)
+        rest = [bm for v, bm in table.items() if v not in selected]
+        if column not in self.tag_columns and len(rest) < len(table) - len(rest):
+            return self.full() & ~self._union(rest)
+        return self._union(bm for v, bm in table.items() if v in selected)
+
+    def year_mask(self, year_range):
+        if not self.year_bitmaps:
+            return None
+        lo, hi = year_range
+        return self._union(bm for y, bm in self.year_bitmaps.items() if lo <= y <= hi)
+
+    def area_mask(self, area_range):
+        if self._area_order is None:
+            return None
+        lo, hi = area_range
+        start = np.searchsorted(self._area_sorted, lo, side="left")
+        stop = np.searchsorted(self._area_sorted, hi, side="right")
+        hit = np.zeros(self.n_rows, dtype=bool)
+        hit[self._area_order[start:stop]] = True
+        return _pack(hit)
+
+    def mask(self, facets=None, year_range=None, area_range=None, facet_modes=None):
+        """패싯 간 AND. facets는 {컬럼: 선택값 목록}, 빈 목록/None은 필터 없음.
+        facet_modes는 {컬럼: "any" | "all"}로 패싯 내부 조합 방식을 지정한다."""
+        facet_modes = facet_modes or {}
+        parts = []
+        for column, values in (facets or {}).items():
+            if values:
+                parts.append(self.facet_mask(column, values, facet_modes.get(column, "any")))
+        if year_range:
+            parts.append(self.year_mask(year_range))
+        if area_range:
+            parts.append(self.area_mask(area_range))
+
+        result = self.full()
+        for p in parts:
+            if p is not None:
+                result &= p
+        return result
+
+    def facet_counts(self, facets=None, year_range=None, area_range=None, facet_modes=None, base=None):
+        """패싯 선택지별 건수 {컬럼: {값: 건수}}. 각 패싯은 자기 자신(과 하위 패싯)의 선택만 뺀
+        나머지 필터 기준으로 센다. base는 키워드 검색 등 추가 조건 비트맵.
+        패싯별 마스크는 한 번씩만 만들고, 값별 건수는 (행렬 & 범위)의 행 popcount 한 번."""
+        facet_modes = facet_modes or {}
+        common = self.mask(year_range=year_range, area_range=area_range)
+        if base is not None:
+            common &= base
+        parts = {
+            column: self.facet_mask(column, values, facet_modes.get(column, "any"))
+            for column, values in (facets or {}).items() if values
+        }
+
+        counts = {}
+        for column, matrix in self._matrices.items():
+            skip = {column} | {child for child, (parent, _) in self.hierarchy.items() if parent == column}
+            scope = common.copy()
+            for other, part in parts.items():
+                if other not in skip and part is not None:
+                    scope &= part
+            counts[column] = dict(zip(self.bitmaps[column], _popcount(matrix & scope, axis=1).tolist()))
+        return counts
+
+    #######################
+    # 결과 꺼내기
+    def count(self, bitmap):
+        return int(_popcount(bitmap))
+
+    def tag_counts(self, column, bitmap=None):
+        """필터 결과 안에서 태그별 보고서 수(보고서×태그 행렬의 열 합). 0건 태그는 제외."""
+        table = self.bitmaps.get(column, {})
+        counts = {}
+        for tag, bm in table.items():
+            n = self.count(bm if bitmap is None else bm & bitmap)
+            if n:
+                counts[tag] = n
+        return pd.Series(counts, dtype="int64").sort_values(ascending=False)
+
+    def to_bool(self, bitmap):
+        return np.unpackbits(bitmap, count=self.n_rows).astype(bool)
+
+    def row_positions(self, bitmap):
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.n_rows))
+
+    def select(self, df, bitmap):
+        """비트맵에 해당하는 행을 한 번에 꺼낸다."""
+        return df.iloc[self.row_positions(bitmap)]
@@ -0,0 +1,108 @@
+#######################
+# 사이드바 상태 → 정규화된 필터 시그니처 (+ URL 쿼리 파라미터)
+#
+# 같은 결과를 내는 사이드바 상태는 같은 시그니처가 되도록 정규화한다.
+# - 패싯 선택은 순서 무관(정렬된 튜플). 빈 선택과 "하나라도 포함" 모드의 전체 선택(= 필터 없음)은 둘 다 None
+# - "모두 포함" 모드는 값이 2개 이상 선택된 태그 패싯에서만 의미가 있으므로 그 밖에는 버림
+# - 연도·면적 범위는 슬라이더 경계로 자르고 정수로 맞춘다(전체 범위여도 결측 행을 빼므로 None과 다름)
+# - 키워드는 앞뒤 공백 제거 + 연속 공백 하나로, 검색 컬럼은 키워드가 있을 때만
+# 시그니처는 공유 뷰 캐시(pipeline.ViewCache)의 키이고, 같은 상태를 URL 쿼리 파라미터로도 적어
+# 링크를 연 사람이 같은 시그니처 → 이미 만들어진 뷰·집계·Figure를 그대로 쓰게 한다.
+import hashlib
+import json
+
+from filter_engine import TAG_COLUMNS
+
+# URL 파라미터 이름(패싯 값은 반복 파라미터: ?sido=경남&sido=부산)
+QUERY_FACETS = {"조사시도": "sido", "조사시군구": "sigungu", "시대": "era", "유적성격": "type", "발간기관": "org"}
+
+
+def clamp_range(value_range, bounds):
+    """(lo, hi)를 경계 안으로 자른 정수 범위. 경계와 겹치지 않으면 None."""
+    if not value_range:
+        return None
+    lo, hi = sorted(value_range)
+    if bounds:
+        lo, hi = max(lo, bounds[0]), min(hi, bounds[1])
+    return (int(lo), int(hi)) if lo <= hi else None
+
+
+def canonical_spec(spec, options=None, year_bounds=None, area_bounds=None):
+    """엔진 spec → 정규화된 spec. options={컬럼: 화면에 보인 선택지}로 전체 선택을 알아본다."""
+    options = options or {}
+    modes = spec.get("facet_modes") or {}
+    facets, facet_modes = {}, {}
+    for column, values in (spec.get("facets") or {}).items():
+        selected = tuple(sorted(set(values or ())))
+        all_mode = modes.get(column) == "all" and column in TAG_COLUMNS and len(selected) > 1
+        shown = options.get(column)
+        # 전체 선택 = 필터 없음은 "하나라도 포함"에서만("모두 포함"이면 모든 값을 가진 행만 남음)
+        if not selected or (not all_mode and shown is not None and set(shown) <= set(selected)):
+            continue
+        facets[column] = selected
+        if all_mode:
+            facet_modes[column] = "all"
+    keyword = " ".join((spec.get("keyword") or "").split())
+    return {
+        "facets": facets,
+        "facet_modes": facet_modes,
+        "year_range": clamp_range(spec.get("year_range"), year_bounds),
+        "area_range": clamp_range(spec.get("area_range"), area_bounds),
+        "keyword": keyword,
+        "keyword_columns": tuple(sorted(spec.get("keyword_columns") or ())) if keyword else None,
+    }
+
+
+def filter_signature(canon):
+    """정규화된 spec의 짧은 내용 지문(16자리 hex)."""
+    text = json.dumps(
+        {**canon, "facets": sorted(canon["facets"].items()), "facet_modes": sorted(canon["facet_modes"].items())},
+        ensure_ascii=False, sort_keys=True,
+    )
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+#######################
+# URL 쿼리 파라미터
+def to_query_params(canon, extended_search=False, year_bounds=None, area_bounds=None):
+    """정규화된 spec → {이름: 값 목록}. 기본값(필터 없음, 슬라이더 전체 범위)인 항목은 적지 않는다."""
+    params = {}
+    for column, name in QUERY_FACETS.items():
+        if canon["facets"].get(column):
+            params[name] = list(canon["facets"][column])
+    if canon["facet_modes"].get("시대") == "all":
+        params["era_mode"] = ["all"]
+    for name, value_range, bounds in (("year", canon["year_range"], year_bounds), ("area", canon["area_range"], area_bounds)):
+        if value_range and (bounds is None or value_range != tuple(bounds)):
+            params[name] = [f"{value_range[0]}-{value_range[1]}"]
+    if canon["keyword"]:
+        params["q"] = [canon["keyword"]]
+        if extended_search:
+            params["qx"] = ["1"]
+    return params
+
+
+def _parse_range(text):
+    try:
+        lo, hi = text.split("-", 1)
+        return int(lo), int(hi)
+    except (AttributeError, ValueError):
+        return None
+
+
+def from_query_params(params):
+    """{이름: 값 목록}(st.query_params.get_all) → 위젯 초기값. 알 수 없거나 잘못된 값은 무시."""
+    state = {"facets": {}}
+    for column, name in QUERY_FACETS.items():
+        if params.get(name):
+            state["facets"][column] = list(params[name])
+    if params.get("era_mode") == ["all"]:
+        state["era_mode"] = "all"
+    for name in ("year", "area"):
+        value_range = _parse_range((params.get(name) or [None])[0])
+        if value_range:
+            state[name] = value_range
+    if params.get("q"):
+        state["keyword"] = params["q"][0]
+        state["kw_extended"] = params.get("qx") == ["1"]
+    return state
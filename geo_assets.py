@@ -0,0 +1,353 @@
+#######################
+# 행정구역 경계 GeoJSON 자산 (시도 / 시군구 choropleth)
+#
+#   $ python geo_assets.py raw/ctprvn.geojson --level sido            # → static/geo/sido.geojson
+#   $ python geo_assets.py raw/sig.geojson --level sigungu --budget 40000
+#
+# 빌드 단계에서 원본 경계를 한 번 읽어
+# - 피처 id를 데이터셋 표기로 정규화한다(시도: "경남", 시군구: "경남 김해시").
+# - 이웃 행정구역과 공유하는 경계선(arc)을 한 번만 단순화해 경계가 벌어지거나 겹치지 않게 한다.
+#   (Douglas–Peucker 중요도를 arc별로 계산하고, 전체 꼭짓점 수 예산에 맞춰 한 번에 잘라냄)
+# - 좌표를 소수 5자리(약 1m)로 줄여 static/geo/<level>.geojson에 쓴다.
+# Streamlit 정적 파일 서빙이 켜져 있으면 지도는 이 파일의 URL만 참조하므로(브라우저가 한 번 받아 캐시)
+# 지도를 다시 그릴 때 오가는 것은 색상 값뿐이다. 런타임에는 load_boundaries()가 한 번만 읽는다.
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from data_layer import CACHE_DIR, _atomic_write_text
+
+STATIC_DIR = Path(__file__).with_name("static")
+ASSET_DIR = STATIC_DIR / "geo"
+LEVELS = ("sido", "sigungu")
+DEFAULT_BUDGET = {"sido": 15_000, "sigungu": 40_000}
+COORD_DIGITS = 5
+
+# 빌드된 자산이 없을 때 찾아보는 원본 경로(예전 배포 위치 포함) — 런타임에 한 번 가공해 .cache에 둔다
+RAW_CANDIDATES = {
+    "sido": ["korea_sido.geojson", "data/korea_sido.geojson", "/mnt/data/korea_sido.geojson"],
+    "sigungu": ["korea_sigungu.geojson", "data/korea_sigungu.geojson", "/mnt/data/korea_sigungu.geojson"],
+}
+
+# 시도 전체 이름 / 영문 이름 / 행정코드 앞 2자리 → 데이터셋 약칭
+SIDO_ALIASES = {
+    "서울": ["서울특별시", "서울시", "Seoul", "11"],
+    "부산": ["부산광역시", "부산시", "Busan", "26"],
+    "대구": ["대구광역시", "대구시", "Daegu", "27"],
+    "인천": ["인천광역시", "인천시", "Incheon", "28"],
+    "광주": ["광주광역시", "광주시", "Gwangju", "29"],
+    "대전": ["대전광역시", "대전시", "Daejeon", "30"],
+    "울산": ["울산광역시", "울산시", "Ulsan", "31"],
+    "세종": ["세종특별자치시", "세종시", "Sejong", "Sejongsi", "36"],
+    "경기": ["경기도", "Gyeonggi-do", "41"],
+    "강원": ["강원도", "강원특별자치도", "Gangwon-do", "42", "51"],
+    "충북": ["충청북도", "Chungcheongbuk-do", "43"],
+    "충남": ["충청남도", "Chungcheongnam-do", "44"],
+    "전북": ["전라북도", "전북특별자치도", "Jeollabuk-do", "45", "52"],
+    "전남": ["전라남도", "Jeollanam-do", "46"],
+    "경북": ["경상북도", "Gyeongsangbuk-do", "47"],
+    "경남": ["경상남도", "Gyeongsangnam-do", "48"],
+    "제주": ["제주특별자치도", "제주도", "Jeju-do", "Jeju", "50"],
+}
+_SIDO_LOOKUP = {alias: short for short, aliases in SIDO_ALIASES.items() for alias in [short] + aliases}
+
+NAME_KEYS = {"sido": ["CTP_KOR_NM", "CTPRVN_NM", "sidonm", "name", "NAME_1"], "sigungu": ["SIG_KOR_NM", "sggnm", "name", "NAME_2"]}
+CODE_KEYS = {"sido": ["CTPRVN_CD", "code"], "sigungu": ["SIG_CD", "code"]}
+# 일반구(수원시 장안구 등)는 데이터셋처럼 시 단위로 합친다
+_GU_OF_CITY = re.compile(r"^(\S+시)\s*\S+구$")
+
+
+def normalize_sido(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return _SIDO_LOOKUP.get(value) or _SIDO_LOOKUP.get(value[:2] if value[:2].isdigit() else value)
+
+
+def normalize_feature_id(properties, level):
+    """원본 피처 속성 → 데이터셋 표기 id. 알 수 없으면 None."""
+    names = [properties.get(k) for k in NAME_KEYS[level] if properties.get(k)]
+    codes = [str(properties.get(k)) for k in CODE_KEYS[level] if properties.get(k) is not None]
+    if level == "sido":
+        for v in names + codes:
+            if normalize_sido(v):
+                return normalize_sido(v)
+        return None
+
+    sido = next((normalize_sido(c[:2]) for c in codes if c[:2].isdigit()), None)
+    sido = sido or next((normalize_sido(properties.get(k)) for k in NAME_KEYS["sido"] if properties.get(k)), None)
+    if not names or sido is None:
+        return None
+    name = re.sub(r"\s+", " ", str(names[0]).strip())
+    m = _GU_OF_CITY.match(name)
+    if m and sido not in ("서울", "부산", "대구", "인천", "광주", "대전", "울산"):
+        name = m.group(1)
+    return f"{sido} {name}"
+
+
+#######################
+# 경계 공유를 유지하는 단순화
+def _rings(geometry):
+    """Polygon/MultiPolygon → [[ring(ndarray), ...] (폴리곤별)]."""
+    if geometry["type"] == "Polygon":
+        polys = [geometry["coordinates"]]
+    elif geometry["type"] == "MultiPolygon":
+        polys = geometry["coordinates"]
+    else:
+        return []
+    out = []
+    for poly in polys:
+        rings = []
+        for ring in poly:
+            arr = np.round(np.asarray(ring, dtype="float64")[:, :2], 7)
+            if len(arr) and not np.array_equal(arr[0], arr[-1]):
+                arr = np.vstack([arr, arr[:1]])
+            # 연속 중복점 제거
+            keep = np.ones(len(arr), dtype=bool)
+            keep[1:] = np.any(arr[1:] != arr[:-1], axis=1)
+            arr = arr[keep]
+            if len(arr) >= 4:
+                rings.append(arr)
+        if rings:
+            out.append(rings)
+    return out
+
+
+def _junctions(all_rings):
+    """둘 이상의 링이 만나는데 이웃점이 다른 점(공유 경계의 시작·끝) 집합."""
+    seen = {}
+    junctions = set()
+    for ring in all_rings:
+        pts = [tuple(p) for p in ring[:-1]]
+        n = len(pts)
+        for i, p in enumerate(pts):
+            pair = frozenset((pts[i - 1], pts[(i + 1) % n]))
+            prev = seen.get(p)
+            if prev is None:
+                seen[p] = pair
+            elif prev != pair:
+                junctions.add(p)
+    return junctions
+
+
+def _split_arcs(ring, junctions):
+    """링을 접합점에서 arc들로 자른다. 접합점이 없으면 링 전체가 닫힌 arc 하나."""
+    pts = ring[:-1]
+    idx = [i for i, p in enumerate(map(tuple, pts)) if p in junctions]
+    if not idx:
+        # 시작점을 정규화해 같은 링(섬과 그 구멍 등)이 같은 arc로 인식되게 함
+        start = int(np.lexsort((pts[:, 1], pts[:, 0]))[0])
+        pts = np.roll(pts, -start, axis=0)
+        return [np.vstack([pts, pts[:1]])]
+    pts = np.roll(pts, -idx[0], axis=0)
+    idx = [i - idx[0] for i in idx] + [len(pts)]
+    closed = np.vstack([pts, pts[:1]])
+    return [closed[a:b + 1] for a, b in zip(idx[:-1], idx[1:])]
+
+
+def _significance(arc):
+    """Douglas–Peucker 중요도(부모 이하로 제한해 단조). 끝점은 무한대."""
+    n = len(arc)
+    sig = np.full(n, np.inf)
+    if n <= 2:
+        return sig
+    sig[1:-1] = 0.0
+    stack = [(0, n - 1, np.inf)]
+    while stack:
+        i, j, cap = stack.pop()
+        if j - i < 2:
+            continue
+        seg = arc[i + 1:j]
+        a, b = arc[i], arc[j]
+        d = b - a
+        norm = np.hypot(*d)
+        if norm == 0:
+            dist = np.hypot(*(seg - a).T)
+        else:
+            dist = np.abs(d[0] * (seg[:, 1] - a[1]) - d[1] * (seg[:, 0] - a[0])) / norm
+        k = int(np.argmax(dist))
+        value = min(float(dist[k]), cap)
+        sig[i + 1 + k] = value
+        stack.append((i, i + 1 + k, value))
+        stack.append((i + 1 + k, j, value))
+    return sig
+
+
+def simplify_features(features, budget):
+    """[(id, geometry)] → [(id, [[ring, ...], ...])]. 공유 arc는 한 번만 단순화해 이웃이 같은 선을 쓴다."""
+    parsed = [(fid, _rings(geom)) for fid, geom in features]
+    all_rings = [ring for _, polys in parsed for rings in polys for ring in rings]
+    junctions = _junctions(all_rings)
+
+    arcs, sigs, arc_index = [], [], {}
+    refs = []  # 피처별 [[ [(arc_id, reversed), ...] 링 ], 폴리곤]
+    for fid, polys in parsed:
+        poly_refs = []
+        for rings in polys:
+            ring_refs = []
+            for ring in rings:
+                parts = []
+                for arc in _split_arcs(ring, junctions):
+                    fwd, rev = arc.tobytes(), arc[::-1].tobytes()
+                    key = min(fwd, rev)
+                    if key not in arc_index:
+                        arc_index[key] = len(arcs)
+                        arcs.append(arc if key == fwd else arc[::-1])
+                        sigs.append(_significance(arcs[-1]))
+                    parts.append((arc_index[key], key != fwd))
+                ring_refs.append(parts)
+            poly_refs.append(ring_refs)
+        refs.append((fid, poly_refs))
+
+    # 예산: 끝점은 모두 유지, 나머지는 중요도 상위만
+    interior = np.concatenate([s[np.isfinite(s)] for s in sigs]) if sigs else np.array([])
+    n_fixed = sum(int((~np.isfinite(s)).sum()) for s in sigs)
+    room = budget - n_fixed
+    if room >= len(interior):
+        threshold = -1.0
+    elif room <= 0:
+        threshold = np.inf
+    else:
+        threshold = float(np.sort(interior)[::-1][room - 1])
+    masks = [(s >= threshold) if threshold >= 0 else np.ones(len(s), dtype=bool) for s in sigs]
+    for m, s in zip(masks, sigs):
+        m |= ~np.isfinite(s)
+
+    def assemble(parts):
+        pieces = []
+        for arc_id, reverse in parts:
+            pts = arcs[arc_id][masks[arc_id]]
+            pts = pts[::-1] if reverse else pts
+            pieces.append(pts if not pieces else pts[1:])
+        return np.vstack(pieces)
+
+    # 너무 줄어 면이 사라진 링은 그 링의 arc에 점을 되살린다(공유 arc라면 이웃도 같은 점을 얻음)
+    out = []
+    for fid, poly_refs in refs:
+        polys = []
+        for ring_refs in poly_refs:
+            rings = []
+            for parts in ring_refs:
+                ring = assemble(parts)
+                while len(np.unique(ring[:-1], axis=0)) < 3:
+                    candidates = [(sigs[a][~masks[a]].max(), a) for a, _ in parts if (~masks[a]).any()]
+                    if not candidates:
+                        break
+                    _, a = max(candidates)
+                    hidden = np.where(~masks[a])[0]
+                    masks[a][hidden[np.argmax(sigs[a][hidden])]] = True
+                    ring = assemble(parts)
+                rings.append(parts)
+            polys.append(rings)
+        out.append((fid, polys))
+
+    return [(fid, [[assemble(parts) for parts in rings] for rings in polys]) for fid, polys in out]
+
+
+def build_feature_collection(raw, level, budget):
+    """원본 FeatureCollection → id 정규화·단순화된 FeatureCollection (같은 id는 MultiPolygon으로 합침)."""
+    features = []
+    for feature in raw.get("features", []):
+        fid = normalize_feature_id(feature.get("properties") or {}, level)
+        if fid is not None and feature.get("geometry"):
+            features.append((fid, feature["geometry"]))
+
+    merged = {}
+    for fid, polys in simplify_features(features, budget):
+        merged.setdefault(fid, []).extend(polys)
+
+    out = []
+    for fid in sorted(merged):
+        coords = [[np.round(ring, COORD_DIGITS).tolist() for ring in rings] for rings in merged[fid]]
+        out.append({
+            "type": "Feature",
+            "id": fid,
+            "properties": {"name": fid},
+            "geometry": {"type": "MultiPolygon", "coordinates": coords},
+        })
+    return {"type": "FeatureCollection", "features": out}
+
+
+def vertex_count(collection):
+    return sum(len(ring) for f in collection["features"] for rings in f["geometry"]["coordinates"] for ring in rings)
+
+
+#######################
+# 런타임 로드
+def asset_path(level):
+    return ASSET_DIR / f"{level}.geojson"
+
+
+def find_raw(level):
+    """RAW_CANDIDATES 중 존재하는 원본 경로(없으면 None)."""
+    for candidate in RAW_CANDIDATES[level]:
+        if os.path.exists(candidate):
+            return Path(candidate)
+    return None
+
+
+def load_boundaries(level, cache_dir=CACHE_DIR):
+    """가공된 경계(FeatureCollection, 경로)를 반환. 빌드 자산이 없으면 원본을 찾아 한 번 가공해 .cache에 둔다.
+
+    어느 쪽도 없으면 (None, None).
+    """
+    path = asset_path(level)
+    if not path.exists():
+        raw_path = find_raw(level)
+        if raw_path is None:
+            return None, None
+        digest = hashlib.sha1(raw_path.read_bytes()).hexdigest()[:16]
+        path = Path(cache_dir) / "geo" / f"{level}-{digest}-{DEFAULT_BUDGET[level]}.geojson"
+        if not path.exists():
+            with open(raw_path, "r", encoding="utf-8") as f:
+                collection = build_feature_collection(json.load(f), level, DEFAULT_BUDGET[level])
+            try:
+                os.makedirs(path.parent, exist_ok=True)
+                _atomic_write_text(path, json.dumps(collection, ensure_ascii=False, separators=(",", ":")))
+            except OSError:
+                return collection, None
+            return collection, path
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f), path
+
+
+def build_asset(source, level, budget=None, out=None):
+    """원본 GeoJSON → static/geo/<level>.geojson(또는 out). (출력 경로, 요약 문자열)을 반환."""
+    with open(source, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    before = sum(len(r) for _, geom in ((None, ft["geometry"]) for ft in raw["features"] if ft.get("geometry"))
+                 for rings in _rings(geom) for r in rings)
+    collection = build_feature_collection(raw, level, budget or DEFAULT_BUDGET[level])
+    unmatched = len(raw["features"]) - sum(
+        1 for ft in raw["features"] if normalize_feature_id(ft.get("properties") or {}, level) is not None
+    )
+
+    out = Path(out) if out else asset_path(level)
+    os.makedirs(out.parent, exist_ok=True)
+    _atomic_write_text(out, json.dumps(collection, ensure_ascii=False, separators=(",", ":")))
+    summary = (f"피처 {len(collection['features'])}개, 꼭짓점 {before:,} → {vertex_count(collection):,}"
+               + (f", id 미확인 {unmatched}개 제외" if unmatched else ""))
+    return out, summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="행정구역 경계 GeoJSON을 id 정규화·단순화해 static/geo에 기록")
+    parser.add_argument("source", help="원본 GeoJSON (시도: CTP_KOR_NM/CTPRVN_CD, 시군구: SIG_KOR_NM/SIG_CD 등)")
+    parser.add_argument("--level", choices=LEVELS, default="sido")
+    parser.add_argument("--budget", type=int, help="전체 꼭짓점 수 목표 (기본 시도 15,000 / 시군구 40,000)")
+    parser.add_argument("--out", help=f"출력 경로 (기본 {ASSET_DIR}/<level>.geojson)")
+    args = parser.parse_args(argv)
+
+    out, summary = build_asset(args.source, args.level, args.budget, args.out)
+    print(f"{out}: {summary}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
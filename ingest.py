@@ -0,0 +1,231 @@
+#######################
+# 신규 발굴보고서 배치 적재
+#
+#   $ python ingest.py 2023_08_batch.csv            # 배치 적재(저장소가 없으면 번들 CSV로 먼저 초기화)
+#   $ python ingest.py --init                       # 번들 CSV로 저장소만 초기화
+#   $ python ingest.py --init --by-sido             # 제출연도/조사시도 2단 파티션으로 초기화
+#
+# 연번을 키로 upsert한다(같은 연번 재제출 → 이전 행 교체). 배치에 포함된 제출연도 파티션과
+# 재제출 행이 원래 있던 파티션만 다시 쓰므로, 비용은 전체 이력이 아니라 배치와 해당 파티션 크기에 비례한다.
+# 연번 → 파티션 맵도 연번 구간(KEY_BUCKET_SIZE)별 조각으로 나눠 배치 연번이 속한 조각만 읽고 다시 쓴다.
+# 저장소 버전이 올라가면 대시보드는 다음 리런에서 새 버전을 읽는다.
+# 적재 뒤 이미 있는 파생물(sqlite 엔진 DB, precompute.py 산출물)도 바뀐 파티션만 반영해 새 버전으로 맞춘다.
+import argparse
+import os
+import shutil
+import sys
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+from data_layer import (
+    DATA_PATH, KEY_COLUMN, PARTITION_COLUMN, SOURCE_ENCODING, STORE_DIR, SUBPARTITION_COLUMN,
+    load_partition, load_reports, partition_names, prepare_frame, pruning_stats, store_manifest,
+    write_partition_summary, write_store_manifest,
+)
+from near_duplicates import SIGNATURE_DIR, Signatures
+from precompute import ARTIFACT_DIR, update_artifacts
+from sql_backend import database_path, sync_database
+
+
+def read_batch(path, encoding=SOURCE_ENCODING):
+    return prepare_frame(pd.read_csv(path, encoding=encoding))
+
+
+def _partition_stats(part):
+    dates = part["제출일"].dropna() if "제출일" in part.columns else pd.Series(dtype="datetime64[ns]")
+    return {
+        "rows": int(len(part)),
+        "min_key": int(part[KEY_COLUMN].min()),
+        "max_key": int(part[KEY_COLUMN].max()),
+        "min_date": dates.min().strftime("%Y-%m-%d") if len(dates) else None,
+        "max_date": dates.max().strftime("%Y-%m-%d") if len(dates) else None,
+        **pruning_stats(part),
+    }
+
+
+def _write_partition(part, name, store_dir):
+    target = Path(store_dir) / name
+    os.makedirs(target, exist_ok=True)
+    tmp = target / f"part.parquet.tmp-{os.getpid()}"
+    part.to_parquet(tmp, index=False)
+    os.replace(tmp, target / "part.parquet")
+    # 파티션 요약도 같이 다시 써서 데이터와 어긋나지 않게(요약은 파티션 크기에 비례하는 한 번의 스캔)
+    write_partition_summary(part, name, store_dir)
+    # 유사 중복 서명도 파티션 단위로 → 대시보드·precompute는 텍스트를 다시 읽지 않고 합치기만 한다
+    tmp = target / f"{SIGNATURE_DIR}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    Signatures.of(part).save(tmp)
+    shutil.rmtree(target / SIGNATURE_DIR, ignore_errors=True)
+    os.replace(tmp, target / SIGNATURE_DIR)
+
+
+# 변경 기록은 최근 이만큼의 버전만 둔다(그보다 오래된 파생 DB·산출물은 전체 재구성)
+CHANGE_LOG_SIZE = 100
+
+
+#######################
+# 연번 → 파티션 맵 (store/_keys/<연번 // KEY_BUCKET_SIZE>.parquet)
+KEY_BUCKET_SIZE = 10_000
+
+
+def _key_buckets(keys):
+    return pd.Series(keys).astype("int64") // KEY_BUCKET_SIZE
+
+
+def _migrate_keys(store_dir):
+    # 예전 저장소의 단일 _keys.parquet → 구간별 조각(한 번만)
+    legacy = store_dir / "_keys.parquet"
+    if legacy.exists():
+        _write_keys(pd.read_parquet(legacy), store_dir)
+        legacy.unlink()
+
+
+def _read_keys(keys, store_dir):
+    """배치 연번이 속한 조각만 읽어 그 연번들의 (연번, 파티션) 행."""
+    frames = []
+    for bucket in sorted(set(_key_buckets(keys))):
+        path = store_dir / "_keys" / f"{bucket}.parquet"
+        if path.exists():
+            frames.append(pd.read_parquet(path))
+    if not frames:
+        return pd.DataFrame({KEY_COLUMN: pd.Series(dtype="int64"), "partition": pd.Series(dtype="str")})
+    return pd.concat(frames, ignore_index=True)
+
+
+def _write_keys(keys, store_dir, buckets=None):
+    """keys의 구간별 조각을 쓴다. buckets(다시 쓸 조각 번호)에 있는데 keys에 행이 없는 조각은 지운다."""
+    directory = Path(store_dir) / "_keys"
+    os.makedirs(directory, exist_ok=True)
+    groups = dict(tuple(keys.groupby(_key_buckets(keys[KEY_COLUMN]).to_numpy(), sort=True)))
+    for bucket in sorted(set(groups) | set(buckets or ())):
+        path = directory / f"{bucket}.parquet"
+        if bucket not in groups:
+            path.unlink(missing_ok=True)
+            continue
+        tmp = directory / f"{bucket}.parquet.tmp-{os.getpid()}"
+        groups[bucket].reset_index(drop=True).to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+
+
+def _remove_partition(name, store_dir):
+    shutil.rmtree(store_dir / name, ignore_errors=True)
+    parent = (store_dir / name).parent
+    if parent != store_dir and parent.exists() and not any(parent.iterdir()):
+        parent.rmdir()  # 하위 파티션이 모두 비면 연도 디렉터리도 정리
+
+
+def init_store(frame, store_dir=STORE_DIR, by_sido=False):
+    """프레임 전체로 저장소를 새로 만든다. by_sido면 제출연도 아래 조사시도 하위 파티션으로 나눈다."""
+    store_dir = Path(store_dir)
+    if store_dir.exists():
+        shutil.rmtree(store_dir)
+    os.makedirs(store_dir)
+
+    subpartition = SUBPARTITION_COLUMN if by_sido and SUBPARTITION_COLUMN in frame.columns else None
+    manifest = {
+        "version": 1,
+        "store_id": uuid.uuid4().hex,
+        "partition_column": PARTITION_COLUMN,
+        "subpartition_column": subpartition,
+        "key_column": KEY_COLUMN,
+        "partitions": {},
+        "changes": [],
+    }
+    names = partition_names(frame, subpartition)
+    for name, part in frame.groupby(names, sort=True):
+        part = part.sort_values(KEY_COLUMN, kind="stable").reset_index(drop=True)
+        _write_partition(part, name, store_dir)
+        manifest["partitions"][name] = _partition_stats(part)
+
+    _write_keys(pd.DataFrame({KEY_COLUMN: frame[KEY_COLUMN].to_numpy(), "partition": names.to_numpy()}), store_dir)
+    write_store_manifest(manifest, store_dir)
+    return manifest
+
+
+def ingest_batch(batch, store_dir=STORE_DIR):
+    """배치를 upsert하고 {"added", "replaced", "partitions"} 요약을 반환."""
+    store_dir = Path(store_dir)
+    manifest = store_manifest(store_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"저장소가 없습니다: {store_dir} (먼저 --init)")
+
+    # 배치 내부 중복은 마지막 행 우선
+    batch = batch.drop_duplicates(subset=[KEY_COLUMN], keep="last")
+    batch_parts = partition_names(batch, manifest.get("subpartition_column"))
+
+    _migrate_keys(store_dir)
+    keys = _read_keys(batch[KEY_COLUMN], store_dir)  # 배치 연번 구간의 조각만
+    previous = keys[keys[KEY_COLUMN].isin(batch[KEY_COLUMN])]
+    affected = sorted(set(batch_parts) | set(previous["partition"]))
+
+    for name in affected:
+        if name in manifest["partitions"]:
+            part = load_partition(name, store_dir)
+            part = part[~part[KEY_COLUMN].isin(batch[KEY_COLUMN])]
+        else:
+            part = None
+        incoming = batch[batch_parts == name]
+        frames = [f for f in (part, incoming) if f is not None and len(f)]
+        if not frames:
+            # 재제출로 파티션이 비면 제거
+            _remove_partition(name, store_dir)
+            manifest["partitions"].pop(name, None)
+            continue
+        merged = pd.concat(frames, ignore_index=True).sort_values(KEY_COLUMN, kind="stable").reset_index(drop=True)
+        _write_partition(merged, name, store_dir)
+        manifest["partitions"][name] = _partition_stats(merged)
+
+    keys = pd.concat(
+        [keys[~keys[KEY_COLUMN].isin(batch[KEY_COLUMN])],
+         pd.DataFrame({KEY_COLUMN: batch[KEY_COLUMN].to_numpy(), "partition": batch_parts.to_numpy()})],
+        ignore_index=True,
+    )
+    _write_keys(keys, store_dir, buckets=set(_key_buckets(batch[KEY_COLUMN])))
+
+    manifest["version"] += 1
+    # 버전별로 다시 쓴 파티션 기록 → SQLite DB·precompute 산출물은 이 파티션만 갱신(data_layer.store_changes)
+    manifest.setdefault("store_id", uuid.uuid4().hex)  # 기록 이전 저장소는 다음 파생 갱신 때 한 번만 전체 재구성
+    change = {"version": manifest["version"], "partitions": affected}
+    manifest["changes"] = [*manifest.get("changes", []), change][-CHANGE_LOG_SIZE:]
+    write_store_manifest(manifest, store_dir)
+    return {"added": int(len(batch) - len(previous)), "replaced": int(len(previous)), "partitions": affected}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="발굴보고서 배치를 제출연도 파티션 저장소에 적재")
+    parser.add_argument("batches", nargs="*", help="적재할 배치 CSV 경로")
+    parser.add_argument("--init", action="store_true", help="번들 CSV로 저장소를 (재)초기화")
+    parser.add_argument("--encoding", default=SOURCE_ENCODING, help=f"배치 CSV 인코딩 (기본 {SOURCE_ENCODING})")
+    parser.add_argument("--store", default=str(STORE_DIR), help="저장소 경로")
+    parser.add_argument("--by-sido", action="store_true", help="초기화할 때 제출연도 아래 조사시도 하위 파티션 사용")
+    args = parser.parse_args(argv)
+
+    if args.init or store_manifest(args.store) is None:
+        manifest = init_store(load_reports(DATA_PATH), args.store, by_sido=args.by_sido)
+        print(f"저장소 초기화: {sum(p['rows'] for p in manifest['partitions'].values()):,}건, "
+              f"파티션 {len(manifest['partitions'])}개")
+
+    for path in args.batches:
+        result = ingest_batch(read_batch(path, args.encoding), args.store)
+        print(f"{path}: 추가 {result['added']:,}건 · 교체 {result['replaced']:,}건 · "
+              f"파티션 {', '.join(result['partitions'])}")
+
+    if args.batches:
+        refresh_derived(args.store)
+    return 0
+
+
+def refresh_derived(store_dir=STORE_DIR, artifact_root=ARTIFACT_DIR):
+    """이미 만들어 둔 파생물만 새 저장소 버전으로: sqlite DB는 바뀐 파티션 upsert, 산출물은 이전 버전에서 증분 갱신.
+    (없는 파생물은 만들지 않는다 — 앱이 처음 쓸 때 만든다.)"""
+    if database_path(store_dir=store_dir).exists():
+        print(f"sqlite DB 갱신: {sync_database(store_dir=store_dir)}")
+    if Path(artifact_root).is_dir() and any(Path(artifact_root).glob("store-*")):
+        target, timings = update_artifacts(store_dir=store_dir, root=artifact_root)
+        print(f"{target}: " + ", ".join(f"{k} {v:.2f}s" for k, v in timings.items()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
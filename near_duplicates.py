@@ -0,0 +1,317 @@
+#######################
+# 유사 중복 보고서 탐지 (문자 shingle MinHash + LSH 밴딩)
+#
+# 한 유적을 여러 권으로 나눴거나 다시 제출한 보고서(예: "왕궁리발굴중간보고 Ⅹ" 반복,
+# "2014년도 소규모 발굴조사 보고서 Ⅰ~ⅩⅩⅠ")를 묶어 건수 KPI의 부풀림을 드러낸다.
+#   1) 보고서명·유적사업명·주소를 정규화(NFKC, 소문자, 공백·문장부호 제거)해 문자 3-gram 집합으로
+#   2) 필드마다 MinHash 서명(SIGNATURE_SIZE개) → 두 행의 서명 일치 비율 ≈ 필드 Jaccard 유사도
+#   3) 보고서명·유적사업명 서명을 LSH_BANDS개 밴드로 잘라 같은 밴드 값을 가진 행만 후보 쌍으로
+#      (모든 쌍 O(n²) 비교 대신 거의 선형: 행마다 밴드 수만큼 해시·정렬, 버킷 안 비교는 BUCKET_WINDOW개까지)
+#   4) 후보 쌍은 필드 가중 유사도(SIMILARITY_WEIGHTS, 양쪽 다 값이 있는 필드만)가
+#      SIMILARITY_THRESHOLD 이상이면 같은 묶음 → 연결 요소가 중복 묶음
+# 결과는 연번 → 묶음 대표 연번(묶음에서 가장 작은 연번). 데이터 버전마다 한 번 만들고
+# precompute.py 산출물로 저장한다. 필터 뷰에는 연번으로 대응시키므로 가지치기·엔진과 무관하다.
+# 1~2)의 서명(Signatures)은 원천 묶음(파티션·CSV 조각)마다 따로 만들어 concat으로 합칠 수 있으므로
+# 전체 프레임 없이 만들 수 있고, 산출물에 함께 저장해 적재 후에는 바뀐 파티션의 서명만 다시 만든다.
+import json
+import re
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_layer import KEY_COLUMN, STORE_DIR, store_manifest
+
+DEDUP_COLUMNS = ["보고서명", "유적사업명", "주소"]
+LSH_COLUMNS = ["보고서명", "유적사업명"]
+SIMILARITY_WEIGHTS = {"보고서명": 0.6, "유적사업명": 0.25, "주소": 0.15}
+SIMILARITY_THRESHOLD = 0.7
+SHINGLE_SIZE = 3
+SIGNATURE_SIZE = 64
+LSH_BANDS = 16  # 밴드당 4행 → 후보가 될 확률이 1/2인 유사도 ≈ (1/16)^(1/4) = 0.5
+BUCKET_WINDOW = 32  # 버킷 안에서 행마다 비교할 앞 행 수(이보다 작은 버킷은 모든 쌍)
+_EMPTY = np.uint32(0xFFFFFFFF)  # 값이 없는 필드의 서명
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_text(text):
+    """NFKC(Ⅹ → X 등 호환 문자 통일) + 소문자 + 글자·숫자만."""
+    text = unicodedata.normalize("NFKC", text).lower()
+    return _NON_WORD.sub("", text)
+
+
+def _shingles(values):
+    """값별 문자 k-gram 집합을 CSR로: (값 시작 위치, shingle 해시 uint64). 짧은 글자는 통째로 한 개."""
+    grams, counts = [], np.zeros(len(values), dtype=np.int64)
+    for i, value in enumerate(values):
+        text = normalize_text(str(value))
+        row = {text[j:j + SHINGLE_SIZE] for j in range(max(len(text) - SHINGLE_SIZE + 1, 1))} if text else set()
+        grams.extend(row)
+        counts[i] = len(row)
+    hashes = pd.util.hash_array(np.asarray(grams, dtype=object)) if grams else np.empty(0, dtype=np.uint64)
+    return np.r_[0, np.cumsum(counts)], hashes
+
+
+def minhash_signatures(values, size=SIGNATURE_SIZE, seed=0):
+    """(행별 값 코드, 값별 uint32 MinHash 서명 (고유 값 수 + 1, size)).
+    같은 글자(권별 보고서명 등)는 한 번만 계산한다. 결측 행의 코드는 -1 → 마지막 행(전부 _EMPTY).
+    해시 함수는 multiply-shift((a·x + b) mod 2^64의 상위 32비트, a는 홀수) — 나머지 연산 없이 벡터화."""
+    codes, _, signatures = _value_signatures(values, size, seed)
+    return codes, signatures
+
+
+def _value_signatures(values, size=SIGNATURE_SIZE, seed=0):
+    """minhash_signatures + 값별 64비트 해시(묶음끼리 같은 값을 맞추는 키)."""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    value_hashes = pd.util.hash_array(np.asarray(uniques, dtype=object).astype(str).astype(object))
+    indptr, x = _shingles(uniques)
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 1 << 63, size, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 1 << 63, size, dtype=np.uint64)
+    # 같은 shingle(예: "발굴조", "보고서")이 여러 값에 반복되므로 고유 shingle만 해시하고 값에는 색인으로
+    vocab, inverse = np.unique(x, return_inverse=True)
+    hashed = np.asfortranarray(((vocab[:, None] * a + b) >> np.uint64(32)).astype(np.uint32))
+    signatures = np.full((len(uniques) + 1, size), _EMPTY, dtype=np.uint32)
+    nonempty = np.flatnonzero(indptr[1:] > indptr[:-1])
+    if len(nonempty):
+        # 해시 함수마다 1차원 gather + 값별 최솟값(reduceat) — (shingle 수 × size) 2차원 행렬을 만들지 않는다
+        for k in range(size):
+            signatures[nonempty, k] = np.minimum.reduceat(hashed[:, k][inverse], indptr[nonempty])
+    return codes, value_hashes, signatures
+
+
+def _bucket_pairs(keys, rows, window=BUCKET_WINDOW):
+    """같은 키(버킷)를 가진 행들의 후보 쌍 + 버킷별 첫 행과 그 키.
+    버킷 안에서 각 행을 바로 앞 window개 행과 잇는다 → window + 1개 이하인 버킷은 모든 쌍을 비교하고,
+    더 큰 버킷(흔한 보고서명 등)은 행마다 window개로 잘라 쌍 수를 버킷 크기에 선형으로 묶는다.
+    재현율 손실: 큰 버킷에서 연번이 window개 넘게 떨어진 두 행은 사이의 행들을 거쳐 연결될 때만 같은
+    묶음이 된다(첫 행과만 비교하던 방식보다는 덜 놓침 — 첫 행과 다르지만 서로 닮은 행끼리도 비교)."""
+    order = np.argsort(keys, kind="stable")
+    keys, rows = keys[order], rows[order]
+    start = np.r_[True, keys[1:] != keys[:-1]] if len(keys) else np.empty(0, dtype=bool)
+    # 혼자인 버킷은 쌍이 없으므로 빼고 비교(대부분의 밴드 키는 한 행뿐)
+    size = np.diff(np.r_[np.flatnonzero(start), len(keys)])
+    shared = np.repeat(size > 1, size)
+    bucket_keys, bucket_rows = keys[shared], rows[shared]
+    pairs = []
+    for offset in range(1, min(window, int(size.max(initial=1)) - 1) + 1):
+        same = bucket_keys[offset:] == bucket_keys[:-offset]
+        pairs.append(np.stack([bucket_rows[:-offset][same], bucket_rows[offset:][same]], axis=1))
+    pairs = np.concatenate(pairs) if pairs else np.empty((0, 2), dtype=rows.dtype)
+    return pairs, rows[start], keys[start]
+
+
+def lsh_candidates(codes, signatures, bands=LSH_BANDS):
+    """후보 쌍 (행 i, 행 j). 값이 같은 행끼리 한 번 잇고, 밴드 비교는 고유 값 단위로 한다
+    (값마다 대표 행 하나 → 같은 밴드 값을 가진 대표 행끼리 잇기)."""
+    rows_per_band = signatures.shape[1] // bands
+    present = np.flatnonzero((codes >= 0) & (signatures[codes, 0] != _EMPTY))
+    same_value, value_rows, value_codes = _bucket_pairs(codes[present], present)
+    # 값 대표 행을 행 순서로 → 밴드 버킷 안 순서가 값 코드 번호(묶음을 합친 순서)와 무관
+    by_row = np.argsort(value_rows, kind="stable")
+    value_rows, value_codes = value_rows[by_row], value_codes[by_row]
+    pairs = [same_value]
+    for band in range(bands):
+        cols = signatures[value_codes, band * rows_per_band:(band + 1) * rows_per_band].astype(np.uint64)
+        key = np.full(len(value_codes), band, dtype=np.uint64)
+        for j in range(rows_per_band):
+            key = key * np.uint64(1_000_003) ^ cols[:, j]  # uint64 곱은 자리 넘침을 버림(해시 용도)
+        pairs.append(_bucket_pairs(key, value_rows)[0])
+    return np.concatenate(pairs)
+
+
+def unique_pairs(pairs, n):
+    """(i, j) 쌍 → i < j로 정렬해 중복 제거(1차원 키로 — np.unique(axis=0)보다 빠름)."""
+    lo, hi = np.minimum(pairs[:, 0], pairs[:, 1]), np.maximum(pairs[:, 0], pairs[:, 1])
+    key = np.unique(lo.astype(np.int64) * n + hi)
+    return np.stack([key // n, key % n], axis=1)
+
+
+def pair_similarity(fields, pairs, chunk=100_000):
+    """후보 쌍의 필드 가중 유사도(양쪽 다 값이 있는 필드만으로 가중치 재정규화). fields={컬럼: (코드, 서명)}."""
+    similarity = np.zeros(len(pairs))
+    for lo in range(0, len(pairs), chunk):
+        i, j = pairs[lo:lo + chunk, 0], pairs[lo:lo + chunk, 1]
+        total = np.zeros(len(i))
+        weight = np.zeros(len(i))
+        for column, (codes, signatures) in fields.items():
+            ci, cj = codes[i], codes[j]
+            both = (signatures[ci, 0] != _EMPTY) & (signatures[cj, 0] != _EMPTY)
+            # 같은 값이면 1, 다른 값만 서명 비교
+            agreement = (ci == cj).astype(np.float64)
+            differ = np.flatnonzero(both & (ci != cj))
+            agreement[differ] = np.count_nonzero(
+                signatures[ci[differ]] == signatures[cj[differ]], axis=1
+            ) / signatures.shape[1]
+            total += np.where(both, SIMILARITY_WEIGHTS[column] * agreement, 0.0)
+            weight += np.where(both, SIMILARITY_WEIGHTS[column], 0.0)
+        similarity[lo:lo + chunk] = np.divide(total, weight, out=np.zeros(len(i)), where=weight > 0)
+    return similarity
+
+
+def connected_components(n, pairs):
+    """간선 목록의 연결 요소 → 행별 요소 대표(요소의 가장 작은 행 번호). 최솟값 전파 + 포인터 점프."""
+    labels = np.arange(n)
+    if not len(pairs):
+        return labels
+    i, j = pairs[:, 0], pairs[:, 1]
+    while True:
+        low = np.minimum(labels[i], labels[j])
+        updated = labels.copy()
+        np.minimum.at(updated, i, low)
+        np.minimum.at(updated, j, low)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+class Signatures:
+    """행별 필드 서명: 연번 + {컬럼: (행별 값 코드, 값별 64비트 해시, 값별 서명 (고유 값 수 + 1, size))}.
+    원천 묶음마다 of()로 만들고 concat()으로 합친다(같은 값은 해시로 맞춰 서명 한 벌만 남김)."""
+
+    def __init__(self, keys, fields):
+        self.keys = np.asarray(keys, dtype=np.int64)
+        self.fields = fields
+
+    @classmethod
+    def of(cls, frame):
+        keys = frame[KEY_COLUMN].to_numpy(dtype=np.int64)
+        return cls(keys, {
+            c: _value_signatures(frame[c].to_numpy(dtype=object)) for c in DEDUP_COLUMNS if c in frame.columns
+        })
+
+    @classmethod
+    def concat(cls, parts):
+        parts = list(parts)
+        parts = [p for p in parts if len(p.keys)] or parts[:1]
+        if not parts:
+            return cls(np.empty(0, dtype=np.int64), {})
+        columns = [c for c in DEDUP_COLUMNS if all(c in p.fields for p in parts)]
+        fields = {}
+        for c in columns:
+            hashes = np.concatenate([p.fields[c][1] for p in parts])
+            values = np.concatenate([p.fields[c][2][:-1] for p in parts])
+            unique, first, inverse = np.unique(hashes, return_index=True, return_inverse=True)
+            offsets = np.r_[0, np.cumsum([len(p.fields[c][1]) for p in parts])]
+            codes = np.concatenate([
+                np.where(p.fields[c][0] >= 0, inverse[np.maximum(p.fields[c][0], 0) + offset], -1)
+                for p, offset in zip(parts, offsets)
+            ])
+            empty = np.full((1, values.shape[1]), _EMPTY, dtype=np.uint32)
+            fields[c] = (codes, unique, np.concatenate([values[first], empty]))
+        return cls(np.concatenate([p.keys for p in parts]), fields)
+
+    @classmethod
+    def of_chunks(cls, chunks):
+        return cls.concat([cls.of(chunk) for chunk in chunks])
+
+    def without(self, keys):
+        """연번 keys의 행을 뺀 서명(재적재로 바뀐 행 교체용). 값 표는 그대로 둔다."""
+        keep = ~np.isin(self.keys, np.asarray(keys, dtype=np.int64))
+        return Signatures(self.keys[keep], {c: (codes[keep], h, v) for c, (codes, h, v) in self.fields.items()})
+
+    def save(self, directory):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "keys.npy", self.keys)
+        for i, (c, arrays) in enumerate(self.fields.items()):
+            for name, array in zip(("codes", "hashes", "values"), arrays):
+                np.save(directory / f"{i}_{name}.npy", array)
+        with open(directory / "meta.json", "w", encoding="utf-8") as f:
+            json.dump({"columns": list(self.fields), "shingle": SHINGLE_SIZE, "signature": SIGNATURE_SIZE}, f,
+                      ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory):
+        directory = Path(directory)
+        with open(directory / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("shingle") != SHINGLE_SIZE or meta.get("signature") != SIGNATURE_SIZE:
+            raise ValueError("서명 설정이 다름")
+        fields = {
+            c: tuple(np.load(directory / f"{i}_{name}.npy", mmap_mode="r") for name in ("codes", "hashes", "values"))
+            for i, c in enumerate(meta["columns"])
+        }
+        return cls(np.load(directory / "keys.npy"), fields)
+
+
+SIGNATURE_DIR = "signatures"
+
+
+def load_store_signatures(store_dir=STORE_DIR, manifest=None, partitions=None):
+    """저장소 파티션별 서명(ingest.py가 파티션과 함께 기록)을 합친 Signatures. partitions를 주면 그 파티션만.
+    서명이 없는 파티션(옛 저장소)이 하나라도 있거나 설정이 다르면 None."""
+    manifest = manifest or store_manifest(store_dir)
+    names = sorted(manifest["partitions"]) if partitions is None else sorted(partitions)
+    try:
+        return Signatures.concat(Signatures.load(Path(store_dir) / name / SIGNATURE_DIR) for name in names)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+class NearDuplicates:
+    """연번 → 유사 중복 묶음 대표 연번. 묶음이 없는 보고서는 자기 자신."""
+
+    def __init__(self, keys, cluster):
+        order = np.argsort(keys, kind="stable")
+        self.keys = np.asarray(keys)[order]
+        self.cluster = np.asarray(cluster)[order]
+
+    @classmethod
+    def build(cls, df):
+        return cls.from_signatures(Signatures.of(df))
+
+    @classmethod
+    def from_signatures(cls, signatures):
+        # 연번 순서로 처리 → 원천(CSV·저장소 파티션 순서, 묶음을 합친 순서)과 무관하게 같은 묶음
+        order = np.argsort(signatures.keys, kind="stable")
+        keys = signatures.keys[order]
+        fields = {c: (np.asarray(codes)[order], values) for c, (codes, _, values) in signatures.fields.items()}
+        candidates = [lsh_candidates(*fields[c]) for c in LSH_COLUMNS if c in fields]
+        candidates = np.concatenate(candidates) if candidates else np.empty((0, 2), dtype=np.int64)
+        pairs = unique_pairs(candidates, len(keys))
+        pairs = pairs[pair_similarity(fields, pairs) >= SIMILARITY_THRESHOLD]
+        labels = connected_components(len(keys), pairs)
+        # 묶음 대표는 가장 작은 연번(행 순서와 무관하게 같은 결과)
+        representative = pd.Series(keys).groupby(labels).transform("min").to_numpy()
+        self = cls(keys, representative)
+        self.n_candidates = int(len(pairs))
+        return self
+
+    def clusters_of(self, keys):
+        """연번 배열 → 묶음 대표 연번. 모르는 연번(산출물 이후 적재 등)은 자기 자신."""
+        keys = np.asarray(keys, dtype=np.int64)
+        pos = np.clip(np.searchsorted(self.keys, keys), 0, max(len(self.keys) - 1, 0))
+        known = (self.keys[pos] == keys) if len(self.keys) else np.zeros(len(keys), dtype=bool)
+        return np.where(known, self.cluster[pos] if len(self.keys) else keys, keys)
+
+    def summary(self, keys):
+        """연번 목록(필터 결과) 안에서: 2건 이상 묶음 수, 그 묶음에 속한 보고서 수, 묶음을 1건으로 센 보고서 수."""
+        sizes = pd.Series(self.clusters_of(keys)).value_counts()
+        repeated = sizes[sizes > 1]
+        return {"clusters": int(len(repeated)), "reports": int(repeated.sum()), "deduplicated": int(len(sizes))}
+
+    def first_of_cluster(self, keys):
+        """묶음마다 처음 나온 행만 True인 bool 배열(중복 묶음을 1건으로 세는 KPI용)."""
+        return ~pd.Series(self.clusters_of(keys)).duplicated().to_numpy()
+
+    def save(self, directory):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "keys.npy", self.keys)
+        np.save(directory / "cluster.npy", self.cluster)
+        with open(directory / "meta.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "columns": DEDUP_COLUMNS, "weights": SIMILARITY_WEIGHTS, "threshold": SIMILARITY_THRESHOLD,
+                "shingle": SHINGLE_SIZE, "signature": SIGNATURE_SIZE, "bands": LSH_BANDS,
+            }, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory):
+        directory = Path(directory)
+        self = cls.__new__(cls)
+        self.keys = np.load(directory / "keys.npy", mmap_mode="r")
+        self.cluster = np.load(directory / "cluster.npy", mmap_mode="r")
+        return self
@@ -0,0 +1,71 @@
+#######################
+# 패널 병렬 계산 (워커 스레드 풀)
+#
+#   batch = PanelBatch(executor, timeout=10)
+#   batch.submit("figure.heatmap", build_heatmap, view)   # 필터 뷰가 정해지자마자 전부 제출
+#   ...
+#   fig, ms = batch.result("figure.heatmap")              # 렌더링은 메인 스레드에서 레이아웃 순서대로
+#
+# 세 컬럼의 패널(KPI·도넛, 히트맵, 랭킹·산점도)은 같은 불변 필터 뷰를 읽는 독립 작업이라,
+# 풀에 한꺼번에 넘기면 리런 지연이 패널 합이 아니라 가장 느린 패널에 가까워진다.
+# - 프로세스 풀이 아닌 스레드 풀: 뷰·큐브·Figure 캐시를 복사 없이 공유한다(프로세스 풀은 패널마다
+#   뷰를 직렬화해야 함). pandas/numpy 집계와 sqlite 질의는 대부분 GIL을 놓고 실행된다.
+# - 작업 함수 안에서는 st.* 를 쓰지 않는다(세션 상태·테마는 제출 전에 메인 스레드에서 읽어 인자로).
+# - 제한 시간은 제출 시점부터 패널별로 센다. 넘기면 PanelTimeout → 화면은 자리표시로 대체하고,
+#   작업은 계속 돌아 Figure 캐시를 채우므로 다음 리런에서 적중한다.
+# executor가 None이면 순차 모드: result()를 부를 때 그 자리에서 실행한다(기존 동작과 같음).
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+PANEL_WORKERS = int(os.environ.get("DASHBOARD_PANEL_WORKERS", "0"))
+PANEL_TIMEOUT_S = float(os.environ.get("DASHBOARD_PANEL_TIMEOUT", "10"))
+
+
+class PanelTimeout(Exception):
+    """패널 작업이 제한 시간 안에 끝나지 않음."""
+
+
+def make_executor(workers=PANEL_WORKERS):
+    """패널 워커 풀(프로세스당 하나, 세션 공유). workers가 0 이하면 None = 순차 모드."""
+    if workers <= 0:
+        return None
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="panel")
+
+
+def _timed(fn, args):
+    t0 = time.perf_counter()
+    value = fn(*args)
+    return value, (time.perf_counter() - t0) * 1000
+
+
+class PanelBatch:
+    """리런 하나의 패널 작업 묶음. timeout=None이면 제한 없음."""
+
+    def __init__(self, executor=None, timeout=PANEL_TIMEOUT_S):
+        self.executor = executor
+        self.timeout = timeout
+        self._jobs = {}
+
+    @property
+    def parallel(self):
+        return self.executor is not None
+
+    def submit(self, name, fn, *args):
+        if self.executor is None:
+            self._jobs[name] = (fn, args)
+        else:
+            self._jobs[name] = (self.executor.submit(_timed, fn, args), time.perf_counter())
+
+    def result(self, name):
+        """(값, 작업 실행 ms). 작업의 예외는 그대로 다시 발생한다."""
+        job = self._jobs.pop(name)
+        if self.executor is None:
+            return _timed(*job)
+        future, submitted = job
+        remaining = None if self.timeout is None else max(0.0, submitted + self.timeout - time.perf_counter())
+        try:
+            return future.result(timeout=remaining)
+        except FutureTimeout:
+            raise PanelTimeout(name) from None
@@ -0,0 +1,209 @@
+#######################
+# 구간별 성능 계측 (리런 단위 트레이스)
+#
+#   tracer = Tracer(enabled=True, log_path=".cache/perf_trace.jsonl")
+#   with tracer.section("filter", rows_in=n) as rec:
+#       view = ...
+#       rec.rows_out = view.n_rows
+#   tracer.flush(engine="pandas")      # 리런 하나 = JSON 한 줄
+#
+# 꺼져 있으면 section()은 공유 no-op 컨텍스트를 돌려주므로 비용은 함수 호출 한 번뿐이다.
+# 켜져 있으면 tracemalloc으로 구간별 최대 메모리 증가량도 잰다(tracemalloc은 프로세스 전역이라
+# 계측 중에는 다른 세션도 할당 추적 비용을 같이 부담한다). 켜고 끄기는 보유자(세션) 단위로 세어서
+# 한 세션이 계측을 꺼도 아직 계측 중인 다른 세션의 추적은 유지된다.
+import json
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+from pathlib import Path
+
+from data_layer import CACHE_DIR
+
+TRACE_LOG_PATH = Path(os.environ.get("DASHBOARD_TRACE_LOG", CACHE_DIR / "perf_trace.jsonl"))
+
+_log_lock = threading.Lock()
+_started_here = False
+_memory_lock = threading.Lock()
+# tracemalloc 보유자. 약한 참조라 세션이 사라지면 보유도 같이 사라진다(다음 확인 때 추적 종료)
+_memory_holders = weakref.WeakSet()
+
+
+def trace_enabled_by_env():
+    return os.environ.get("DASHBOARD_TRACE", "").lower() in ("1", "true", "yes")
+
+
+class _NoopRecord:
+    """계측이 꺼졌을 때 쓰는 공유 컨텍스트. 속성 대입은 버린다."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NOOP = _NoopRecord()
+
+
+class _Section:
+    __slots__ = ("tracer", "name", "rows_in", "rows_out", "start", "elapsed_ms", "mem_before", "peak", "error")
+
+    def __init__(self, tracer, name, rows_in):
+        self.tracer = tracer
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.elapsed_ms = None
+        self.peak = 0
+        self.error = None
+
+    def __enter__(self):
+        self.tracer._enter(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed_ms = (time.perf_counter() - self.start) * 1000
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        self.tracer._exit(self)
+        return False
+
+    def as_dict(self):
+        return {
+            "section": self.name,
+            "ms": round(self.elapsed_ms, 3),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "peak_mem_delta": self.peak,
+            **({"error": self.error} if self.error else {}),
+        }
+
+
+class Tracer:
+    """리런 하나의 구간 기록. 구간은 중첩 가능(바깥 구간의 최대 메모리에 안쪽 최대치가 반영됨)."""
+
+    def __init__(self, enabled=False, track_memory=True, log_path=TRACE_LOG_PATH, memory_holder=None):
+        """memory_holder: tracemalloc을 붙잡는 주체(세션별 MemoryHold). 없으면 이 Tracer 자신."""
+        self.enabled = enabled
+        self.track_memory = enabled and track_memory
+        self.log_path = Path(log_path) if log_path else None
+        self.records = []
+        self._stack = []
+        self._t0 = time.perf_counter()
+        self.run_ended = False
+        if self.track_memory:
+            hold_memory_tracking(memory_holder if memory_holder is not None else self)
+        else:
+            _stop_if_unheld()
+
+    def section(self, name, rows_in=None):
+        if not self.enabled:
+            return _NOOP
+        return _Section(self, name, rows_in)
+
+    def _enter(self, sec):
+        if self._t0 is None:
+            self._t0 = time.perf_counter()
+        if self.track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # 안쪽 구간이 peak를 초기화하기 전에 바깥 구간의 최대치를 보존
+            for outer in self._stack:
+                outer.peak = max(outer.peak, peak - outer.mem_before)
+            tracemalloc.reset_peak()
+            sec.mem_before = current
+        self._stack.append(sec)
+
+    def _exit(self, sec):
+        self._stack.pop()
+        if self.track_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            sec.peak = max(sec.peak, peak - sec.mem_before, 0)
+            for outer in self._stack:
+                outer.peak = max(outer.peak, peak - outer.mem_before)
+        self.records.append(sec)
+
+    def add(self, name, ms, rows_in=None, rows_out=None, error=None):
+        """다른 스레드에서 잰 구간(패널 워커 등)을 기록. tracemalloc은 스레드를 구분하지 못해 메모리는 비움."""
+        if not self.enabled:
+            return
+        sec = _Section(self, name, rows_in)
+        sec.rows_out = rows_out
+        sec.elapsed_ms = ms
+        sec.peak = None
+        sec.error = error
+        self.records.append(sec)
+
+    def table(self):
+        """기록된 구간(종료 순서)을 dict 목록으로."""
+        return [r.as_dict() for r in self.records]
+
+    def flush(self, **context):
+        """지금까지의 구간을 JSON 한 줄로 로그에 추가하고 비운다. 꺼져 있으면 아무것도 하지 않음."""
+        if not self.enabled or not self.records:
+            return None
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "total_ms": round((time.perf_counter() - self._t0) * 1000, 3),
+            **context,
+            "sections": self.table(),
+        }
+        self.records = []
+        self._t0 = None  # 이후 구간(예: 리런 뒤 다운로드 콜백)은 새 트레이스로 시간 측정
+        if self.log_path is not None:
+            try:
+                os.makedirs(self.log_path.parent, exist_ok=True)
+                line = json.dumps(entry, ensure_ascii=False, default=str)
+                with _log_lock, open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except OSError:
+                pass  # 읽기 전용 환경 → 화면 표시만
+        return entry
+
+    def end_run(self, **context):
+        """스크립트 끝에서 호출. 이후 조각(fragment) 단독 리런은 각자 flush한다."""
+        self.run_ended = True
+        return self.flush(**context)
+
+
+class MemoryHold:
+    """tracemalloc 보유 표식(세션 상태에 하나씩 둔다). 약한 참조가 가능해야 해서 object() 대신 클래스."""
+    __slots__ = ("__weakref__",)
+
+
+def hold_memory_tracking(holder):
+    """holder가 계측 중임을 등록하고, 꺼져 있으면 tracemalloc을 켠다."""
+    global _started_here
+    with _memory_lock:
+        _memory_holders.add(holder)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_here = True
+
+
+def release_memory_tracking(holder):
+    """holder의 보유를 반납. 남은 보유자가 없을 때만, 이 모듈이 켠 tracemalloc만 끈다
+    (-X tracemalloc 등 외부 설정은 유지)."""
+    with _memory_lock:
+        _memory_holders.discard(holder)
+        _stop_unheld_locked()
+
+
+def _stop_if_unheld():
+    # 계측 없는 리런마다 호출: 보유 세션이 모두 사라졌는데(세션 만료 등) 켜 둔 추적이 남아 있으면 끈다
+    if _started_here:
+        with _memory_lock:
+            _stop_unheld_locked()
+
+
+def _stop_unheld_locked():
+    global _started_here
+    if _started_here and not _memory_holders:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        _started_here = False
@@ -0,0 +1,272 @@
+#######################
+# 필터 상태 → 불변 필터 뷰
+#
+# 파생 컬럼은 로드 단계에서 모두 만들어 두므로, 리런마다 하는 일은
+# "비트맵 → 행 선택 + 큐브 슬라이스" 한 번뿐이다. 세 패널은 이 뷰를 복사 없이 읽는다.
+# 필터가 하나도 걸리지 않으면 기준 프레임을 그대로 공유해 추가 메모리가 0이다.
+#
+# 질의 엔진은 두 가지다.
+# - PandasEngine: 메모리 내 프레임 + 비트맵/검색 색인/집계 큐브 (기본값)
+# - sql_backend.SqlEngine: 임베디드 SQLite에 필터·집계를 SQL로 위임
+# 사이드바와 패널은 아래 공통 인터페이스만 사용한다.
+#   엔진: columns, has_values(col), facet_values(col, within), value_range(col),
+#         quantiles(col, qs), view(key, spec, selection=None), base_bytes()
+#   뷰:   key, cube, n_rows, columns, has_values(col), count(notna, isna), tag_counts(col),
+#         rows(columns, sort_by, ascending, limit, offset, notna), chunks(columns, notna), cached(name, build)
+# spec = {"facets", "facet_modes", "year_range", "area_range", "keyword", "keyword_columns"}
+# 패널은 필터 결과 행 전체를 요구하지 않는다: 집계는 cube(큐브 슬라이스/GROUP BY), 행이 필요한 패널은
+# rows()로 필요한 컬럼·행 수만 꺼낸다(SQL 엔진은 이때만 DB에서 읽음 — 뷰 자체는 행을 들고 있지 않다).
+#
+# 뷰는 세션에 두지 않는다. 프로세스 전체가 ViewCache 하나를 공유하고(같은 필터면 세션이 달라도 같은 뷰),
+# 세션에는 필터 키·스펙·선택 비트맵(view.selection, 행 수/8 바이트)만 남긴다.
+# 캐시에서 밀려난 뷰는 선택 비트맵으로 다시 만든다(검색·패싯 재계산 없음).
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from search_index import SEARCH_COLUMNS
+
+
+@dataclass(frozen=True)
+class FilteredView:
+    """필터 상태 하나에 대한 읽기 전용 결과. frame은 수정하지 말 것."""
+
+    key: tuple
+    frame: pd.DataFrame
+    mask: np.ndarray = field(repr=False)
+    cube: object = field(repr=False)
+    index: object = field(repr=False, default=None)
+    shares_base: bool = False
+    memo: dict = field(repr=False, compare=False, default_factory=dict)
+
+    @property
+    def n_rows(self):
+        return len(self.frame)
+
+    @cached_property
+    def extra_bytes(self):
+        """기준 프레임 외에 이 뷰가 추가로 점유하는 메모리(얕은 측정: 배열 + 포인터)."""
+        if self.shares_base:
+            return 0
+        return int(self.frame.memory_usage(index=True, deep=False).sum() + self.mask.nbytes)
+
+    @property
+    def selection(self):
+        """세션에 남길 행 선택(비트맵). view(key, spec, selection)으로 같은 뷰를 다시 만들 수 있다."""
+        return self.mask
+
+    @property
+    def columns(self):
+        return list(self.frame.columns)
+
+    def has_values(self, column):
+        return column in self.frame.columns and self.cached(
+            ("has_values", column), lambda: bool(self.frame[column].notna().any())
+        )
+
+    def count(self, notna=(), isna=()):
+        """notna 컬럼은 모두 값이 있고 isna 컬럼은 모두 결측인 행 수."""
+        return self.cached(("count", tuple(notna), tuple(isna)), lambda: int(self._where(notna, isna).sum()))
+
+    def _where(self, notna=(), isna=()):
+        ok = np.ones(len(self.frame), dtype=bool)
+        for c in notna:
+            ok &= self.frame[c].notna().to_numpy()
+        for c in isna:
+            ok &= self.frame[c].isna().to_numpy()
+        return ok
+
+    def tag_counts(self, column):
+        return self.index.tag_counts(column, self.mask)
+
+    def rows(self, columns=None, sort_by=None, ascending=True, limit=None, offset=0, notna=()):
+        """필터 결과 행 일부. sort_by 순서(결측은 뒤, 같은 값은 원래 순서)로 offset부터 limit행.
+        정렬 순서는 뷰에 메모(같은 필터·기준의 페이지 넘김은 정렬하지 않음)."""
+        frame = self.frame
+        if notna:
+            frame = frame[self._where(notna)]
+        stop = None if limit is None else offset + limit
+        if sort_by is not None:
+            if notna:
+                order = sorted_positions(frame, sort_by, ascending)
+            else:
+                order = self.cached(("order", sort_by, ascending), lambda: sorted_positions(frame, sort_by, ascending))
+            frame = frame.iloc[order[offset:stop]]
+        elif offset or stop is not None:
+            frame = frame.iloc[offset:stop]
+        if columns is not None and list(columns) != list(frame.columns):
+            frame = frame[list(columns)]
+        return frame
+
+    def chunks(self, columns=None, notna=(), chunk_rows=None):
+        """rows()를 묶음 단위로(메모리 프레임은 이미 올라와 있으므로 한 묶음)."""
+        yield self.rows(columns, notna=notna)
+
+    def cached(self, name, build):
+        """패널 집계 메모. 뷰가 공유 캐시에 있는 동안 같은 필터의 모든 세션이 재사용한다(값은 수정 금지)."""
+        return view_memo(self, name, build)
+
+
+def sorted_positions(frame, sort_by, ascending=True):
+    """sort_by 기준 정렬 순서(행 위치 배열, 결측은 뒤로, 같은 값은 원래 순서)."""
+    s = frame[sort_by].reset_index(drop=True)
+    return s.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+
+
+def view_memo(view, name, build):
+    if name not in view.memo:
+        view.memo[name] = build()
+    return view.memo[name]
+
+
+def build_view(key, base, filter_index, report_cube, mask):
+    """필터 비트맵으로 뷰를 만든다. 전체 선택이면 기준 프레임·전체 큐브를 그대로 공유."""
+    if filter_index.count(mask) == filter_index.n_rows:
+        return FilteredView(key, base, mask, report_cube.slice(), filter_index, shares_base=True)
+    frame = filter_index.select(base, mask)
+    cube = report_cube.slice(filter_index.to_bool(mask))
+    return FilteredView(key, frame, mask, cube, filter_index)
+
+
+def frame_bytes(df):
+    """기준 프레임 메모리(문자열 포함, deep)."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class PandasEngine:
+    """메모리 내 프레임과 사전 구축 색인으로 사이드바·패널 질의에 답한다."""
+
+    name = "pandas"
+
+    def __init__(self, df, filter_index, search_index, report_cube):
+        self.df = df
+        self.filter_index = filter_index
+        self.search_index = search_index
+        self.report_cube = report_cube
+        self.columns = list(df.columns)
+
+    def has_values(self, column):
+        return column in self.df.columns and bool(self.df[column].notna().any())
+
+    def facet_values(self, column, within=None):
+        """패싯 선택지(결측은 "미상"). within={컬럼: 선택값}이면 그 조건 안에서 관측된 값만."""
+        values = self.filter_index.facet_values(column)
+        if not within or not any(within.values()):
+            return values
+        hierarchy = self.filter_index.hierarchy.get(column)
+        if hierarchy is not None and set(within) == {hierarchy[0]}:
+            return self.filter_index.child_values(column, within[hierarchy[0]])
+        scope = self.filter_index.mask(facets=within)
+        table = self.filter_index.bitmaps[column]
+        return [v for v in values if (table[v] & scope).any()]
+
+    def value_range(self, column):
+        s = self.df[column].dropna()
+        if s.empty:
+            return None
+        return s.min(), s.max()
+
+    def quantiles(self, column, qs):
+        return [float(self.df[column].quantile(q)) for q in qs]
+
+    def base_bytes(self):
+        return frame_bytes(self.df)
+
+    def facet_counts(self, spec):
+        """사이드바 선택지 옆 건수. 패싯마다 자기 선택을 뺀 나머지 필터(키워드 포함) 기준."""
+        return self.filter_index.facet_counts(
+            facets=spec.get("facets"),
+            year_range=spec.get("year_range"),
+            area_range=spec.get("area_range"),
+            facet_modes=spec.get("facet_modes"),
+            base=self._keyword_mask(spec),
+        )
+
+    def _keyword_mask(self, spec):
+        # 키워드: n-gram 역색인으로 찾은 행 위치를 비트맵으로(검색어가 없으면 None)
+        keyword = (spec.get("keyword") or "").strip()
+        if keyword:
+            rows = self.search_index.search(keyword, spec.get("keyword_columns") or SEARCH_COLUMNS)
+            if rows is not None:
+                return self.filter_index.from_positions(rows)
+        return None
+
+    def view(self, key, spec, selection=None):
+        # 세션에 남아 있던 선택 비트맵이 있으면 그대로 사용(공유 캐시에서 밀려난 뷰 복원)
+        if selection is not None:
+            return build_view(key, self.df, self.filter_index, self.report_cube, selection)
+
+        # 패싯별 비트맵을 OR/AND로 조합하고, 행은 마지막에 한 번만 꺼냄
+        mask = self.filter_index.mask(
+            facets=spec.get("facets"),
+            year_range=spec.get("year_range"),
+            area_range=spec.get("area_range"),
+            facet_modes=spec.get("facet_modes"),
+        )
+
+        # 키워드 검색 결과도 같은 마스크에 AND
+        keyword_mask = self._keyword_mask(spec)
+        if keyword_mask is not None:
+            mask &= keyword_mask
+
+        # 행 선택 + 큐브 슬라이스를 묶은 불변 뷰 → 세 패널이 복사 없이 공유
+        return build_view(key, self.df, self.filter_index, self.report_cube, mask)
+
+
+class ViewCache:
+    """필터 키 → 필터 뷰 LRU(프로세스 전체 공유). 기준 프레임을 공유하는 뷰는 0바이트로 센다.
+    ttl_s가 있으면 만든 지 그만큼 지난 뷰는 다시 만든다(메모된 패널 집계도 함께 갱신)."""
+
+    def __init__(self, max_entries=64, max_bytes=256 * 2**20, ttl_s=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._entries = OrderedDict()
+        self._built_at = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def _drop(self, key):
+        old = self._entries.pop(key)
+        self._built_at.pop(key, None)
+        self._bytes -= old.extra_bytes
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            if key in self._entries and self.ttl_s is not None and time.monotonic() - self._built_at[key] > self.ttl_s:
+                self._drop(key)
+                self.expired += 1
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        view = build()
+        size = view.extra_bytes
+
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]  # 다른 세션이 먼저 만든 뷰를 공유
+            if size <= self.max_bytes:
+                self._entries[key] = view
+                self._built_at[key] = time.monotonic()
+                self._bytes += size
+                while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                    self._drop(next(iter(self._entries)))
+        return view
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries), "bytes": self._bytes,
+                "hits": self.hits, "misses": self.misses, "expired": self.expired,
+            }
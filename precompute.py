@@ -0,0 +1,330 @@
+#######################
+# 서빙 산출물 사전 계산 (배포·오토스케일 직후 콜드 스타트 단축)
+#
+#   $ python precompute.py                  # artifacts/<데이터 키>-v<포맷>/ 에 기록
+#   $ python precompute.py --no-geo --keep 1
+#   $ python precompute.py --update         # 저장소 이전 버전 산출물에서 바뀐 파티션만 반영(ingest.py가 적재 뒤 자동 실행)
+#
+# 대시보드가 시작할 때 하던 일(CSV 파싱·타입 고정·조사기간 파싱, 필터 비트맵/시대 태그 행렬,
+# 검색 색인, 집계 큐브, 행정구역 경계 단순화)을 미리 해 두고, 앱은 산출물을 mmap으로 연다.
+# 프레임은 전부 mmap으로 남지 않는다: Arrow 기반 dtype(자유 텍스트 str, date32)은 매핑된 버퍼를 그대로 쓰고,
+# category 코드·nullable 정수·float64처럼 numpy로 옮기는 컬럼만 복사된다(Artifacts.frame 참고).
+#   frame.arrow       타입 고정 프레임(Arrow IPC, 무압축 → memory map)
+#   filter/           패싯·시대 태그·연도 비트맵 행렬(.npy), 면적 정렬 순서
+#   search/           필드별 n-gram 포스팅(CSR .npy) + 정규화 원문
+#   cube/             집계 큐브 셀 + 행→셀 대응 배열
+#   dedup/            유사 중복 묶음(연번 → 묶음 대표 연번, MinHash/LSH) + 행별 필드 서명(signatures/)
+#   summaries/        파티션 요약(sketches.Summary)과 가지치기 통계 — 앱은 데이터를 읽지 않고 범위 통계를 낸다
+#   manifest.json     포맷 버전·데이터 키·행 수·빌드 시각(+ 저장소 id·버전·파티션별 행 수 — 증분 갱신 기준)
+# 데이터 키는 원본 내용 기준(CSV sha1 또는 저장소 버전)이라 배포로 mtime이 바뀌어도 유효하다.
+# 산출물이 없거나 키가 다르면 앱은 기존처럼 원본에서 만든다.
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from data_layer import (
+    DATA_PATH, STORE_DIR, compact_frame, frame_summaries, load_dataset, load_store,
+    load_store_summaries, source_fingerprint, store_changes, store_manifest,
+)
+from filter_engine import FilterIndex
+from geo_assets import LEVELS, asset_path, build_asset, find_raw
+from near_duplicates import SIGNATURE_DIR, NearDuplicates, Signatures, load_store_signatures
+from report_cube import ReportCube
+from search_index import SearchIndex
+from sketches import Summary
+
+ARTIFACT_DIR = Path(__file__).with_name("artifacts")
+# 산출물 구조가 바뀌면 올려서 기존 산출물을 무효화
+ARTIFACT_FORMAT = 4
+
+
+def artifact_key(path=DATA_PATH, store_dir=STORE_DIR):
+    """데이터 원천의 내용 키: 저장소가 있으면 저장소 버전, 없으면 CSV sha1."""
+    manifest = store_manifest(store_dir)
+    if manifest is not None:
+        return f"store-{manifest['version']}"
+    return f"csv-{source_fingerprint(path)['sha1'][:16]}"
+
+
+def artifact_dir(key, root=ARTIFACT_DIR):
+    return Path(root) / f"{key}-v{ARTIFACT_FORMAT}"
+
+
+#######################
+# 빌드
+def build_artifacts(path=DATA_PATH, store_dir=STORE_DIR, root=ARTIFACT_DIR, keep=2):
+    """산출물을 임시 디렉터리에 만든 뒤 교체. 최근 keep개만 남긴다. (경로, 단계별 초)를 반환."""
+
+    def write(tmp, step):
+        df = step("load", lambda: load_dataset(path, store_dir))
+        step("frame", lambda: _write_ipc(pa.Table.from_pandas(df, preserve_index=False), tmp / "frame.arrow"))
+        step("filter", lambda: FilterIndex(df).save(tmp / "filter"))
+        step("search", lambda: SearchIndex(df).save(tmp / "search"))
+        step("cube", lambda: ReportCube(df).save(tmp / "cube"))
+        step("dedup", lambda: _write_dedup(df, store_dir, tmp / "dedup"))
+        step("summaries", lambda: _write_summaries(*_summaries(df, store_dir), tmp / "summaries"))
+        return df
+
+    return _publish(artifact_key(path, store_dir), store_manifest(store_dir), root, keep, write)
+
+
+def update_artifacts(path=DATA_PATH, store_dir=STORE_DIR, root=ARTIFACT_DIR, keep=2):
+    """저장소 배치 적재 뒤: 이전 버전 산출물에서 바뀐 파티션만 반영해 새 버전 산출물을 만든다.
+    프레임은 파티션 순서로 이어 붙인 것이라, 처음 바뀐 파티션 앞의 행(start)은 그대로 두고
+    인덱스·큐브·검색 색인은 그 뒤 행만 다시 만들어 잇는다(FilterIndex/SearchIndex/ReportCube.update).
+    유사 중복 서명·파티션 요약은 저장소의 파티션별 파일에서 바뀐 파티션 것만 가져온다.
+    이어 받을 산출물이 없거나 변경 기록이 그 사이 버전을 덮지 못하면 build_artifacts(전체)."""
+    manifest = store_manifest(store_dir)
+    previous = _previous_artifacts(manifest, root) if manifest is not None else None
+    if previous is None:
+        return build_artifacts(path, store_dir, root, keep)
+    artifacts, changed = previous
+    layout = artifacts.manifest["store"]["partitions"]
+    first = min(changed, default=None)
+    head = [name for name in sorted(layout) if first is None or name < first]
+    if any(manifest["partitions"].get(name, {}).get("rows") != layout[name] for name in head):
+        return build_artifacts(path, store_dir, root, keep)
+    start = sum(layout[name] for name in head)
+    tail_names = [name for name in sorted(manifest["partitions"]) if first is not None and name >= first]
+    changed = [name for name in sorted(changed) if name in manifest["partitions"]]
+
+    def write(tmp, step):
+        df = step("load", lambda: _splice_frame(artifacts.frame(), start, load_store(store_dir, manifest, tail_names)))
+        step("frame", lambda: _write_ipc(pa.Table.from_pandas(df, preserve_index=False), tmp / "frame.arrow"))
+        step("filter", lambda: artifacts.filter_index().update(df, start).save(tmp / "filter"))
+        step("search", lambda: artifacts.search_index().update(df, start).save(tmp / "search"))
+        step("cube", lambda: artifacts.report_cube().update(df, start).save(tmp / "cube"))
+        step("dedup", lambda: _update_dedup(artifacts, df, start, store_dir, manifest, tail_names, tmp / "dedup"))
+        step("summaries", lambda: _update_summaries(artifacts, df, store_dir, manifest, changed, tmp / "summaries"))
+        return df
+
+    return _publish(artifact_key(path, store_dir), manifest, root, keep, write)
+
+
+def _publish(key, store, root, keep, write):
+    target = artifact_dir(key, root)
+    tmp = Path(f"{target}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    timings = {}
+
+    def step(name, fn):
+        t0 = time.perf_counter()
+        result = fn()
+        timings[name] = round(time.perf_counter() - t0, 3)
+        return result
+
+    df = write(tmp, step)
+
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "key": key,
+        "n_rows": len(df),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "timings_s": timings,
+    }
+    if store is not None:
+        # 증분 갱신의 기준: 어느 저장소의 몇 버전인지와 파티션별 행 수(프레임 안 파티션 구간)
+        manifest["store"] = {
+            "id": store.get("store_id"),
+            "version": store["version"],
+            "partitions": {name: stats["rows"] for name, stats in sorted(store["partitions"].items())},
+        }
+    with open(tmp / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+    _prune(root, keep)
+    return target, timings
+
+
+def _previous_artifacts(manifest, root):
+    """같은 저장소의 이전 버전 산출물 중 가장 최근 것과 그 뒤로 바뀐 파티션 → (Artifacts, 파티션 집합) 또는 None."""
+    best = None
+    for directory in Path(root).glob(f"store-*-v{ARTIFACT_FORMAT}"):
+        try:
+            with open(directory / "manifest.json", "r", encoding="utf-8") as f:
+                built = json.load(f)
+        except (OSError, ValueError):
+            continue
+        store = built.get("store")
+        if built.get("format") != ARTIFACT_FORMAT or not store:
+            continue
+        changed = store_changes(manifest, store["id"], store["version"])
+        if changed is not None and (best is None or store["version"] > best[0].manifest["store"]["version"]):
+            best = (Artifacts(directory, built), changed)
+    return best
+
+
+def _splice_frame(frame, start, tail):
+    """산출물 프레임의 앞 start행 + 다시 읽은 뒤쪽 파티션 → load_store와 같은 타입의 프레임.
+    load_store처럼 그대로 이어 붙인 뒤 compact_frame(카테고리 목록이 같으면 유지, 다르면 값에서 다시)."""
+    parts = [part for part in (frame.iloc[:start], tail) if len(part)] or [frame.iloc[:0]]
+    return compact_frame(pd.concat(parts, ignore_index=True))
+
+
+def _write_dedup(df, store_dir, directory):
+    # 저장소에 파티션별 서명이 있으면 합치기만 하고, 없으면 프레임에서 만든다
+    manifest = store_manifest(store_dir)
+    signatures = load_store_signatures(store_dir, manifest) if manifest is not None else None
+    if signatures is None:
+        signatures = Signatures.of(df)
+    NearDuplicates.from_signatures(signatures).save(directory)
+    signatures.save(directory / SIGNATURE_DIR)
+
+
+def _update_dedup(artifacts, df, start, store_dir, manifest, tail_names, directory):
+    # 앞부분 행의 서명은 이전 산출물에서, 뒤쪽 파티션 서명은 저장소(ingest가 파티션과 함께 기록)에서
+    previous = artifacts.signatures()
+    tail = load_store_signatures(store_dir, manifest, tail_names)
+    if previous is None or tail is None:
+        return _write_dedup(df, store_dir, directory)
+    signatures = Signatures.concat([previous.without(previous.keys[start:]), tail])
+    NearDuplicates.from_signatures(signatures).save(directory)
+    signatures.save(directory / SIGNATURE_DIR)
+
+
+def _update_summaries(artifacts, df, store_dir, manifest, changed, directory):
+    # 바뀐 파티션의 요약만 저장소 summary.json(ingest가 다시 쓴 것)으로 교체, 나머지는 이전 산출물 그대로
+    previous = artifacts.summaries()
+    updated = load_store_summaries(store_dir, manifest, changed)
+    if previous is None or updated is None:
+        return _write_summaries(*_summaries(df, store_dir), directory)
+    summaries = {name: previous[1][name] for name in manifest["partitions"] if name in previous[1]}
+    summaries.update(updated)
+    if set(summaries) != set(manifest["partitions"]):
+        return _write_summaries(*_summaries(df, store_dir), directory)
+    _write_summaries(manifest["partitions"], {name: summaries[name] for name in sorted(summaries)}, directory)
+
+
+def _summaries(df, store_dir):
+    """(가지치기 통계, {파티션 이름: Summary}). 저장소는 파티션별 summary.json을 그대로, 없으면 프레임에서."""
+    manifest = store_manifest(store_dir)
+    if manifest is None:
+        return frame_summaries(df)
+    summaries = load_store_summaries(store_dir, manifest)
+    if summaries is not None:
+        return manifest["partitions"], summaries
+    return frame_summaries(df, manifest.get("subpartition_column"))
+
+
+def _write_summaries(partitions, summaries, directory):
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / "summaries.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "partitions": partitions,
+            "summaries": {name: summary.to_dict() for name, summary in summaries.items()},
+        }, f, ensure_ascii=False)
+
+
+def _write_ipc(table, path):
+    with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _prune(root, keep):
+    built = sorted(
+        (p for p in Path(root).iterdir() if p.is_dir() and (p / "manifest.json").exists()),
+        key=lambda p: (p / "manifest.json").stat().st_mtime,
+    )
+    for old in built[:-keep] if keep > 0 else []:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def build_geo_assets():
+    """원본 경계가 있는데 static/geo 자산이 없으면 만든다. [(수준, 요약)]."""
+    built = []
+    for level in LEVELS:
+        raw = find_raw(level)
+        if raw is not None and not asset_path(level).exists():
+            built.append((level, build_asset(raw, level)[1]))
+    return built
+
+
+#######################
+# 열기 (앱)
+class Artifacts:
+    """산출물 디렉터리 하나. 각 부분은 요청될 때 연다(mmap — 실제 페이지는 접근 시 적재)."""
+
+    def __init__(self, directory, manifest):
+        self.directory = Path(directory)
+        self.manifest = manifest
+
+    def frame(self):
+        """타입 고정 프레임. 텍스트·날짜 컬럼은 매핑된 Arrow 버퍼를 복사 없이 감싸고(페이지 캐시 공유),
+        category·정수·실수 컬럼은 pandas 변환 때 복사된다. 56만 행 기준 익명 RSS 증가 약 27 MB
+        (프레임 139 MB, mmap 없이 읽으면 약 177 MB)."""
+        with pa.memory_map(str(self.directory / "frame.arrow")) as source:
+            table = pa.ipc.open_file(source).read_all()
+        return table.to_pandas()
+
+    def filter_index(self):
+        return FilterIndex.load(self.directory / "filter")
+
+    def search_index(self):
+        return SearchIndex.load(self.directory / "search")
+
+    def report_cube(self):
+        return ReportCube.load(self.directory / "cube")
+
+    def near_duplicates(self):
+        return NearDuplicates.load(self.directory / "dedup")
+
+    def signatures(self):
+        """유사 중복 묶음을 만든 행별 서명. 서명을 저장하지 않은 옛 산출물이면 None."""
+        try:
+            return Signatures.load(self.directory / "dedup" / SIGNATURE_DIR)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def summaries(self):
+        """(가지치기 통계, {파티션 이름: Summary}). summaries/가 없는 옛 산출물이면 None."""
+        try:
+            with open(self.directory / "summaries" / "summaries.json", "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return data["partitions"], {name: Summary.from_dict(d) for name, d in data["summaries"].items()}
+
+
+def open_artifacts(path=DATA_PATH, store_dir=STORE_DIR, root=ARTIFACT_DIR):
+    """현재 데이터 원천에 맞는 산출물(Artifacts). 없거나 포맷·키가 다르면 None."""
+    try:
+        directory = artifact_dir(artifact_key(path, store_dir), root)
+        with open(directory / "manifest.json", "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        return None
+    return Artifacts(directory, manifest)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="대시보드 서빙 산출물(타입 고정 데이터·인덱스·큐브·경계)을 미리 만든다")
+    parser.add_argument("--out", default=str(ARTIFACT_DIR), help="산출물 루트 경로")
+    parser.add_argument("--keep", type=int, default=2, help="남겨 둘 산출물 버전 수")
+    parser.add_argument("--no-geo", action="store_true", help="행정구역 경계 자산은 만들지 않음")
+    parser.add_argument("--update", action="store_true", help="저장소 이전 버전 산출물이 있으면 바뀐 파티션만 반영")
+    args = parser.parse_args(argv)
+
+    build = update_artifacts if args.update else build_artifacts
+    target, timings = build(root=args.out, keep=args.keep)
+    print(f"{target}: " + ", ".join(f"{k} {v:.2f}s" for k, v in timings.items()))
+    if not args.no_geo:
+        for level, summary in build_geo_assets():
+            print(f"경계 {level}: {summary}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+#######################
+# 사전 집계 큐브 (KPI · 히트맵 · 지역/기관 랭킹 공용)
+#
+# 로드 시점에 (제출연도, 제출월, 조사시도, 조사시군구, 유적성격, 시대 태그, 발간기관)
+# 조합별로 건수·면적합·면적건수를 물질화한다. 각 행(시대 태그가 여럿이면 태그별로)이
+# 어느 셀에 속하는지도 함께 보관해, 현재 필터의 큐브 슬라이스는 np.bincount 한 번으로
+# 얻고 패널은 그 슬라이스(셀 수 규모)만 롤업한다.
+#
+# 시대는 다중값이므로 행 하나가 여러 셀에 걸친다. 행마다 첫 태그 셀에만 "대표" 표시를
+# 해 두고, 시대를 포함하지 않는 롤업은 대표 셀만 더해 중복 집계를 막는다.
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from filter_engine import UNKNOWN_LABEL, split_tags
+
+CUBE_DIMENSIONS = ["제출연도", "제출월", "조사시도", "조사시군구", "유적성격", "시대", "발간기관"]
+ERA_DIMENSION = "시대"
+MEASURES = ["건수", "합계면적", "면적건수"]
+_PRIMARY = "_대표"
+
+
+class ReportCube:
+    """보고서 프레임 하나에 대한 읽기 전용 집계 큐브."""
+
+    def __init__(self, df):
+        dims = [c for c in CUBE_DIMENSIONS if c in df.columns]
+        if ERA_DIMENSION in dims:
+            pairs = split_tags(df[ERA_DIMENSION])
+        else:
+            pairs = pd.DataFrame({"row": np.arange(len(df)), "tag": UNKNOWN_LABEL})
+        pairs[_PRIMARY] = ~pairs["row"].duplicated()
+
+        rows = pairs["row"].to_numpy()
+        keys = {}
+        for c in dims:
+            if c == ERA_DIMENSION:
+                keys[c] = pairs["tag"].to_numpy()
+            else:
+                col = df[c].iloc[rows].reset_index(drop=True)
+                if isinstance(col.dtype, pd.CategoricalDtype) or col.dtype == object or pd.api.types.is_string_dtype(col):
+                    col = col.astype("object").where(col.notna(), UNKNOWN_LABEL)
+                keys[c] = col
+        keys[_PRIMARY] = pairs[_PRIMARY].to_numpy()
+        keys = pd.DataFrame(keys)
+
+        if "조사면적" in df.columns:
+            area = df["조사면적"].to_numpy(dtype="float64", na_value=np.nan)[rows]
+        else:
+            area = np.full(len(rows), np.nan)
+        has_area = ~np.isnan(area)
+
+        grouped = keys.groupby(dims + [_PRIMARY], sort=True, dropna=False)
+        self.pair_row = rows
+        self.pair_cell = grouped.ngroup().to_numpy()
+        self.pair_area = np.where(has_area, area, 0.0)
+        self.pair_has_area = has_area.astype("float64")
+        self.n_rows = len(df)
+        self.dimensions = dims
+
+        self.cells = grouped.size().rename("건수").reset_index()
+        self.cells["합계면적"] = np.bincount(self.pair_cell, weights=self.pair_area, minlength=len(self.cells))
+        self.cells["면적건수"] = np.bincount(self.pair_cell, weights=self.pair_has_area, minlength=len(self.cells)).astype("int64")
+
+    def update(self, frame, start):
+        """frame(바뀐 뒤 전체 프레임)의 큐브. 앞 start행은 이 큐브의 행과 같다고 보고 그 (행, 셀) 쌍은 그대로 두고,
+        뒤쪽 행만 셀로 나눠 셀 표를 합친다(없어진 조합은 빼고 측정값은 쌍에서 다시 합산 — 셀 수·쌍 수 규모)."""
+        if [c for c in CUBE_DIMENSIONS if c in frame.columns] != self.dimensions:
+            return ReportCube(frame)  # 차원 구성이 바뀌면 전체 빌드
+        tail = ReportCube(frame.iloc[start:].reset_index(drop=True))
+        keys = self.dimensions + [_PRIMARY]
+        cut = int(np.searchsorted(self.pair_row, start))  # 쌍은 행 순서
+
+        # 기존 셀과 새 셀을 같은 정렬 기준으로 합쳐 새 셀 번호를 매긴다
+        cells = pd.concat([self.cells[keys], tail.cells[keys]], ignore_index=True)
+        cell_id = cells.groupby(keys, sort=True, dropna=False).ngroup().to_numpy()
+        pair_cell = np.concatenate([
+            cell_id[:len(self.cells)][np.asarray(self.pair_cell[:cut])],
+            cell_id[len(self.cells):][tail.pair_cell],
+        ])
+        n_cells = int(cell_id.max()) + 1 if len(cell_id) else 0
+        counts = np.bincount(pair_cell, minlength=n_cells)
+        used = counts > 0
+        first = np.empty(n_cells, dtype=np.int64)
+        first[cell_id[::-1]] = np.arange(len(cell_id))[::-1]
+
+        cube = ReportCube.__new__(ReportCube)
+        cube.pair_row = np.concatenate([np.asarray(self.pair_row[:cut]), tail.pair_row + start])
+        cube.pair_cell = (np.cumsum(used) - 1)[pair_cell]
+        cube.pair_area = np.concatenate([np.asarray(self.pair_area[:cut]), tail.pair_area])
+        cube.pair_has_area = np.concatenate([np.asarray(self.pair_has_area[:cut]), tail.pair_has_area])
+        cube.n_rows = len(frame)
+        cube.dimensions = self.dimensions
+        cube.cells = cells.iloc[first[used]].reset_index(drop=True)
+        cube.cells["건수"] = counts[used]
+        n_used = int(used.sum())
+        cube.cells["합계면적"] = np.bincount(cube.pair_cell, weights=cube.pair_area, minlength=n_used)
+        cube.cells["면적건수"] = np.bincount(cube.pair_cell, weights=cube.pair_has_area, minlength=n_used).astype("int64")
+        return cube
+
+    def save(self, directory):
+        """셀 표는 Parquet, 행→셀 대응 배열은 .npy(precompute.py 산출물)."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.cells.to_parquet(directory / "cells.parquet", index=False)
+        for name in ("pair_row", "pair_cell", "pair_area", "pair_has_area"):
+            np.save(directory / f"{name}.npy", getattr(self, name))
+        with open(directory / "meta.json", "w", encoding="utf-8") as f:
+            json.dump({"n_rows": self.n_rows, "dimensions": self.dimensions}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory):
+        directory = Path(directory)
+        with open(directory / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self = cls.__new__(cls)
+        self.n_rows = meta["n_rows"]
+        self.dimensions = meta["dimensions"]
+        self.cells = pd.read_parquet(directory / "cells.parquet")
+        for name in ("pair_row", "pair_cell", "pair_area", "pair_has_area"):
+            setattr(self, name, np.load(directory / f"{name}.npy", mmap_mode="r"))
+        return self
+
+    def slice(self, row_mask=None):
+        """필터 결과(행 단위 bool 배열)에 해당하는 큐브 슬라이스. None이면 전체."""
+        if row_mask is None:
+            return CubeSlice(self.cells, self.dimensions)
+
+        sel = row_mask[self.pair_row]
+        cell = self.pair_cell[sel]
+        n_cells = len(self.cells)
+        counts = np.bincount(cell, minlength=n_cells)
+        keep = counts > 0
+
+        cells = self.cells.loc[keep, self.dimensions + [_PRIMARY]].copy()
+        cells["건수"] = counts[keep]
+        cells["합계면적"] = np.bincount(cell, weights=self.pair_area[sel], minlength=n_cells)[keep]
+        cells["면적건수"] = np.bincount(cell, weights=self.pair_has_area[sel], minlength=n_cells)[keep].astype("int64")
+        return CubeSlice(cells, self.dimensions)
+
+
+class CubeSlice:
+    """필터가 적용된 큐브 셀. 롤업 결과는 슬라이스 안에서 재사용한다."""
+
+    def __init__(self, cells, dimensions):
+        self.cells = cells
+        self.dimensions = dimensions
+        self._rollups = {}
+
+    def _base(self, dims):
+        if ERA_DIMENSION in dims:
+            return self.cells
+        return self.cells[self.cells[_PRIMARY]]
+
+    def totals(self):
+        base = self._base([])
+        n = int(base["건수"].sum())
+        area_n = int(base["면적건수"].sum())
+        area_sum = float(base["합계면적"].sum())
+        return {
+            "건수": n,
+            "면적건수": area_n,
+            "합계면적": area_sum if area_n else None,
+            "평균면적": area_sum / area_n if area_n else None,
+        }
+
+    def rollup(self, dims):
+        """지정 차원으로 롤업한 건수/합계면적/면적건수(0건 조합 제외)."""
+        key = tuple(dims)
+        if key not in self._rollups:
+            agg = (
+                self._base(dims)
+                    .groupby(list(dims), sort=False, dropna=False)[MEASURES]
+                    .sum()
+                    .reset_index()
+            )
+            self._rollups[key] = agg[agg["건수"] > 0].reset_index(drop=True)
+        return self._rollups[key]
+
+    def pivot(self, index, columns, measure="건수"):
+        agg = self.rollup([index, columns])
+        return agg.pivot_table(index=index, columns=columns, values=measure, aggfunc="sum", fill_value=0).sort_index()
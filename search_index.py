@@ -0,0 +1,219 @@
+#######################
+# 키워드 검색용 문자 n-gram 역색인
+#
+# - 문자 unigram·bigram·trigram 포스팅을 둔다. 1~3글자 단어는 포스팅 하나가 곧 정확한 결과이고,
+#   4글자 이상은 trigram 포스팅을 교집합한 후보만 원문과 리터럴(정규식 아님)로 대조해 오탐을 제거한다.
+# - 대조는 Arrow 문자열 배열에서 한 번에(pyarrow.compute) — 흔한 단어("발굴조사")처럼 후보가
+#   대부분의 행이어도 행마다 파이썬 루프를 돌지 않는다.
+# - 질의 문법: 공백으로 나눈 단어는 AND, "따옴표 구절"은 공백 포함 리터럴,
+#   끝에 *가 붙은 단어는 어절 시작 일치(접두 검색).
+# - 포스팅 리스트는 CSR(이어 붙인 행 배열 + gram별 오프셋)로 보관해 precompute.py 산출물을 mmap으로 연다.
+import json
+import re
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+SEARCH_COLUMNS = ["보고서명", "유적사업명"]
+OPTIONAL_SEARCH_COLUMNS = ["주소", "발간기관"]
+
+_QUERY_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def normalize_text(text):
+    # NFKC: 로마 숫자(Ⅹ→X)·전각 문자 등을 통일, 대소문자 무시
+    return unicodedata.normalize("NFKC", str(text)).lower()
+
+
+GRAM_SIZE = 3  # 색인하는 가장 긴 n-gram
+
+
+def _grams(text):
+    grams = set(text)
+    for n in range(2, GRAM_SIZE + 1):
+        grams.update(text[i:i + n] for i in range(len(text) - n + 1))
+    return grams
+
+
+def _word_start_pattern(term):
+    # 어절 시작 일치(파이썬 (?<!\w)와 같은 뜻) — RE2에는 lookbehind가 없어 앞 글자를 직접 조건으로
+    return r"(?:^|[^\p{L}\p{N}_])" + "".join(f"\\x{{{ord(c):x}}}" for c in term)
+
+
+def parse_query(query):
+    """질의 문자열 → [(단어, 접두검색 여부)]."""
+    terms = []
+    for quoted, bare in _QUERY_TOKEN.findall(query or ""):
+        if quoted:
+            term, prefix = quoted, False
+        else:
+            prefix = bare.endswith("*") and len(bare) > 1
+            term = bare.rstrip("*") if prefix else bare
+        term = normalize_text(term).strip()
+        if term:
+            terms.append((term, prefix))
+    return terms
+
+
+class _FieldIndex:
+    def __init__(self, values):
+        # 같은 원문(권별 보고서명 등)은 한 번만 정규화·n-gram 분해하고, 행 포스팅은 값 코드로 펼친다
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+        texts = [normalize_text(v) if isinstance(v, str) and v.strip() else "" for v in uniques] + [""]
+        codes = np.where(codes < 0, len(uniques), codes)  # 결측 → 빈 글자
+        self.texts = pa.array(texts, type=pa.large_string()).take(pa.array(codes))
+
+        value_grams = []
+        lengths = np.zeros(len(texts), dtype=np.int64)
+        for i, text in enumerate(texts):
+            row = _grams(text)
+            value_grams.extend(row)
+            lengths[i] = len(row)
+        value_grams, vocab = pd.factorize(np.asarray(value_grams, dtype=object))
+        value_grams = value_grams.astype(np.int32)
+        grams = {g: i for i, g in enumerate(vocab)}
+        value_start = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+
+        # 행 순서대로 (gram, 행) 항목을 만들고 gram 기준 안정 정렬 → gram별 행 목록이 이미 오름차순
+        per_row = lengths[codes]
+        entry = np.arange(int(per_row.sum()), dtype=np.int64)
+        entry += np.repeat(value_start[codes] - (np.cumsum(per_row) - per_row), per_row)
+        entry_gram = value_grams[entry]
+        del entry
+        order = np.argsort(entry_gram, kind="stable")
+        self.rows = np.repeat(np.arange(len(codes), dtype=np.int32), per_row)[order]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(entry_gram, minlength=len(grams)))])
+        self.grams = grams
+
+    def update(self, values, start):
+        """앞 start행은 그대로 두고 그 뒤 행을 values로 바꾼 색인. n-gram 분해는 values만 하고,
+        기존 포스팅은 start 앞 행만 남겨 gram 기준으로 이어 붙인다(gram별 행 목록은 계속 오름차순)."""
+        tail = _FieldIndex(values)
+        rows = np.asarray(self.rows)
+        gram = np.repeat(np.arange(len(self.grams), dtype=np.int64), np.diff(self.offsets))
+        keep = rows < start
+
+        merged = dict(self.grams)
+        for g in tail.grams:
+            merged.setdefault(g, len(merged))
+        tail_ids = np.fromiter((merged[g] for g in tail.grams), dtype=np.int64, count=len(tail.grams))
+        tail_gram = tail_ids[np.repeat(np.arange(len(tail.grams)), np.diff(tail.offsets))]
+
+        # 기존 항목(gram 순) 뒤에 새 항목을 붙여 gram 기준 안정 정렬 → 같은 gram 안에서 앞부분 행이 먼저
+        gram = np.concatenate([gram[keep], tail_gram])
+        order = np.argsort(gram, kind="stable")
+        counts = np.bincount(gram, minlength=len(merged))
+        used = counts > 0  # 앞부분에서 빠진 행에만 있던 gram은 없앤다
+
+        field = _FieldIndex.__new__(_FieldIndex)
+        field.texts = pa.concat_arrays([self.texts.slice(0, start), tail.texts])
+        field.rows = np.concatenate([rows[keep], tail.rows + np.int32(start)])[order]
+        field.offsets = np.concatenate([[0], np.cumsum(counts[used])])
+        field.grams = {g: i for i, g in enumerate(g for g, u in zip(merged, used) if u)}
+        return field
+
+    def postings(self, gram):
+        i = self.grams.get(gram)
+        if i is None:
+            return None
+        return self.rows[self.offsets[i]:self.offsets[i + 1]]
+
+    def candidates(self, term):
+        n = min(len(term), GRAM_SIZE)
+        grams = sorted({term[i:i + n] for i in range(len(term) - n + 1)})
+        lists = []
+        for g in grams:
+            rows = self.postings(g)
+            if rows is None:
+                return np.empty(0, dtype=np.int32)
+            lists.append(rows)
+        lists.sort(key=len)
+        result = lists[0]
+        for rows in lists[1:]:
+            result = np.intersect1d(result, rows, assume_unique=True)
+            if not len(result):
+                break
+        return result
+
+    def match(self, term, prefix, within=None):
+        """단어와 일치하는 행. within(행 수 길이 bool)이 있으면 그 안의 행만 원문 대조."""
+        rows = np.asarray(self.candidates(term))
+        if within is not None:
+            rows = rows[within[rows]]
+        if not len(rows) or (len(term) <= GRAM_SIZE and not prefix):
+            return rows  # 1~3글자는 포스팅 자체가 정확한 결과
+        texts = self.texts.take(pa.array(rows))
+        if prefix:
+            keep = pc.match_substring_regex(texts, _word_start_pattern(term))
+        else:
+            keep = pc.match_substring(texts, term)
+        return rows[keep.to_numpy(zero_copy_only=False)]
+
+
+class SearchIndex:
+    """보고서 프레임의 텍스트 컬럼별 n-gram 역색인(읽기 전용)."""
+
+    def __init__(self, df, columns=SEARCH_COLUMNS + OPTIONAL_SEARCH_COLUMNS):
+        self.fields = {c: _FieldIndex(df[c].tolist()) for c in columns if c in df.columns}
+
+    def update(self, frame, start):
+        """frame(바뀐 뒤 전체 프레임)의 색인. 앞 start행은 이 색인의 행과 같다고 보고 뒤쪽 행만 n-gram으로 분해한다."""
+        columns = [c for c in SEARCH_COLUMNS + OPTIONAL_SEARCH_COLUMNS if c in frame.columns]
+        if columns != list(self.fields):
+            return SearchIndex(frame)  # 컬럼 구성이 바뀌면 전체 빌드
+        index = SearchIndex.__new__(SearchIndex)
+        index.fields = {c: f.update(frame[c].iloc[start:].tolist(), start) for c, f in self.fields.items()}
+        return index
+
+    def save(self, directory):
+        """필드별 포스팅(CSR .npy)·gram 목록(JSON)과 정규화 원문(Parquet)을 저장(precompute.py 산출물)."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        meta = {}
+        for i, (column, field) in enumerate(self.fields.items()):
+            np.save(directory / f"field{i}.rows.npy", field.rows)
+            np.save(directory / f"field{i}.offsets.npy", field.offsets)
+            meta[column] = {"prefix": f"field{i}", "grams": list(field.grams)}
+        pq.write_table(pa.table({c: f.texts for c, f in self.fields.items()}), directory / "texts.parquet")
+        with open(directory / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory):
+        directory = Path(directory)
+        with open(directory / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        texts = pq.read_table(directory / "texts.parquet")
+        self = cls.__new__(cls)
+        self.fields = {}
+        for column, info in meta.items():
+            field = _FieldIndex.__new__(_FieldIndex)
+            field.texts = texts[column].combine_chunks().cast(pa.large_string())
+            field.grams = {g: i for i, g in enumerate(info["grams"])}
+            field.rows = np.load(directory / f"{info['prefix']}.rows.npy", mmap_mode="r")
+            field.offsets = np.load(directory / f"{info['prefix']}.offsets.npy", mmap_mode="r")
+            self.fields[column] = field
+        return self
+
+    def search(self, query, columns=SEARCH_COLUMNS):
+        """질의와 일치하는 행 위치(정렬된 int 배열). 각 단어는 지정 컬럼 중 어디든 있으면 일치."""
+        terms = parse_query(query)
+        fields = [self.fields[c] for c in columns if c in self.fields]
+        if not terms or not fields:
+            return None  # 검색 조건 없음
+
+        # 행 수 길이 bool 마스크로 합집합(컬럼)·교집합(단어) — 정렬 없이 선형, 앞 단어 결과 밖은 대조하지 않음
+        result = None
+        for term, prefix in terms:
+            hit = np.zeros(len(fields[0].texts), dtype=bool)
+            for f in fields:
+                hit[f.match(term, prefix, within=result)] = True
+            result = hit
+            if not result.any():
+                break
+        return np.flatnonzero(result)
@@ -0,0 +1,252 @@
+#######################
+# 병합 가능한 스트리밍 요약 (파티션 단위 통계)
+#
+# 파티션(저장소) 또는 (제출연도, 조사시도) 묶음마다 작은 요약을 만들어 두고, 선택한 범위의 통계는
+# 행을 다시 읽지 않고 요약을 병합해서 답한다.
+#   - 정확한 카운터: 행 수, 컬럼별 결측 수, 수치 컬럼의 건수·합계·최솟값·최댓값
+#   - t-digest: 조사면적·조사_일수 분위수 (면적 슬라이더의 1–99% 경계 등)
+#   - HyperLogLog: 발간기관·조사시군구 고유 개수
+#
+# 오차(SKETCH_ERROR_BOUNDS, benchmark.py가 정확값과 비교해 기록·회귀 판정)
+#   - t-digest(compression=200, k1 척도): 분위 q 근처 중심의 폭이 약 2π·√(q(1−q))/δ 이므로
+#     순위 오차는 그 절반 이하 — q=0.01/0.99에서 약 0.16%p, 중앙값에서 약 0.8%p.
+#     값이 EXACT_LIMIT(1만 개) 이하인 요약은 압축하지 않고 값을 그대로 두므로 pandas 선형 보간 분위수와
+#     정확히 같다(번들 CSV 규모에서는 슬라이더 경계가 기존 정확값과 동일).
+#     최악의 경우를 보장하는 구조는 아니므로(경험적 한계) 벤치마크로 확인한다.
+#   - HyperLogLog(p=12, 레지스터 4096개): 표준오차 1.04/√4096 ≈ 1.6%.
+#     추정치가 2.5·4096 이하이면 linear counting을 써서 작은 개수에서는 거의 정확하다.
+#   - 카운터는 정확(병합 = 덧셈/최솟값/최댓값).
+import base64
+import math
+
+import numpy as np
+import pandas as pd
+
+QUANTILE_COLUMNS = ["조사면적", "조사_일수"]
+DISTINCT_COLUMNS = ["발간기관", "조사시군구"]
+COUNTER_COLUMNS = ["조사면적", "조사_일수"]
+NULL_COLUMNS = ["조사면적", "조사기간", "조사_일수", "발간기관", "조사시군구"]
+
+# 문서화된 오차 한계: 분위수는 순위 오차(0~1), 고유 개수는 상대 오차
+SKETCH_ERROR_BOUNDS = {"rank": {0.01: 0.002, 0.5: 0.01, 0.99: 0.002}, "distinct": 0.05}
+EXACT_LIMIT = 10_000
+
+
+def _encode(array):
+    return base64.b64encode(np.ascontiguousarray(array).tobytes()).decode("ascii")
+
+
+def _decode(text, dtype):
+    return np.frombuffer(base64.b64decode(text), dtype=dtype).copy()
+
+
+class TDigest:
+    """병합형 t-digest. 중심(평균, 가중치)을 평균 순으로 보관한다."""
+
+    def __init__(self, compression=200):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = math.inf
+        self.max = -math.inf
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def update(self, values):
+        values = np.asarray(values, dtype="float64")
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+            self._compress(np.concatenate([self.means, values]), np.concatenate([self.weights, np.ones(len(values))]))
+        return self
+
+    def merge(self, other):
+        if other.count:
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._compress(np.concatenate([self.means, other.means]), np.concatenate([self.weights, other.weights]))
+        return self
+
+    def _compress(self, means, weights):
+        # 누적 분위(왼쪽 끝)를 k1 척도 k(q) = δ/2π·asin(2q−1)로 옮겨 정수 구간마다 한 중심으로 합친다
+        # → 한 중심이 차지하는 k 폭은 1 미만(꼬리일수록 중심이 작아 극단 분위수가 정확)
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        if total <= EXACT_LIMIT:
+            # 작은 요약은 정확 버퍼(압축된 요약은 항상 EXACT_LIMIT보다 크므로 여기서는 전부 가중치 1)
+            self.means, self.weights = means, weights
+            return
+        left = (np.cumsum(weights) - weights) / total
+        bucket = np.floor(self.compression / (2 * math.pi) * np.arcsin(2 * left - 1)).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        merged_w = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / merged_w
+        self.weights = merged_w
+
+    def quantile(self, q):
+        """분위수(pandas 기본과 같은 선형 보간 기준 위치 q·(n−1)). 비어 있으면 None."""
+        total = self.count
+        if not total:
+            return None
+        centers = np.cumsum(self.weights) - self.weights / 2
+        xs, ys = centers, self.means
+        # 양 끝 중심이 여러 점을 합친 것이면 최솟값·최댓값까지 보간
+        if self.weights[0] > 1:
+            xs, ys = np.r_[0.0, xs], np.r_[self.min, ys]
+        if self.weights[-1] > 1:
+            xs, ys = np.r_[xs, total], np.r_[ys, self.max]
+        return float(np.interp(q * (total - 1) + 0.5, xs, ys))
+
+    def to_dict(self):
+        return {
+            "compression": self.compression, "min": self.min, "max": self.max,
+            "means": _encode(self.means), "weights": _encode(self.weights),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        self = cls(data["compression"])
+        self.min, self.max = data["min"], data["max"]
+        self.means = _decode(data["means"], np.float64)
+        self.weights = _decode(data["weights"], np.float64)
+        return self
+
+
+class HyperLogLog:
+    """HyperLogLog(64비트 해시, 레지스터 2^p개). 병합 = 레지스터별 최댓값."""
+
+    def __init__(self, p=12):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def update(self, values):
+        values = pd.Series(values).dropna()
+        if len(values):
+            # 실행마다 같은 값(고정 키 해시) → 파티션 요약을 다른 프로세스에서 만들어도 병합 가능
+            h = pd.util.hash_array(values.astype("object").astype(str).to_numpy(dtype=object))
+            idx = (h >> np.uint64(64 - self.p)).astype(np.int64)
+            rest = h & np.uint64((1 << (64 - self.p)) - 1)
+            # 나머지 비트의 선행 0 개수 + 1 (64−p ≤ 52비트라 float64 지수로 정확히 계산)
+            bit_length = np.where(rest > 0, np.frexp(rest.astype("float64"))[1], 0)
+            rank = (64 - self.p - bit_length + 1).astype(np.uint8)
+            np.maximum.at(self.registers, idx, rank)
+        return self
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)  # linear counting
+        return raw
+
+    def to_dict(self):
+        return {"p": self.p, "registers": _encode(self.registers)}
+
+    @classmethod
+    def from_dict(cls, data):
+        self = cls(data["p"])
+        self.registers = _decode(data["registers"], np.uint8)
+        return self
+
+
+class Summary:
+    """행 묶음 하나의 요약. merge()로 합치면 합친 행 전체의 요약과 같다(스케치는 오차 한계 안에서)."""
+
+    def __init__(self):
+        self.rows = 0
+        self.nulls = {}
+        self.counters = {}
+        self.digests = {}
+        self.distinct = {}
+
+    @classmethod
+    def of(cls, frame):
+        self = cls()
+        self.rows = len(frame)
+        for c in NULL_COLUMNS:
+            if c in frame.columns:
+                self.nulls[c] = int(frame[c].isna().sum())
+        for c in COUNTER_COLUMNS:
+            if c in frame.columns:
+                values = frame[c].to_numpy(dtype="float64", na_value=np.nan)
+                values = values[~np.isnan(values)]
+                self.counters[c] = {
+                    "count": int(len(values)),
+                    "sum": float(values.sum()),
+                    "min": float(values.min()) if len(values) else None,
+                    "max": float(values.max()) if len(values) else None,
+                }
+        for c in QUANTILE_COLUMNS:
+            if c in frame.columns:
+                self.digests[c] = TDigest().update(frame[c].to_numpy(dtype="float64", na_value=np.nan))
+        for c in DISTINCT_COLUMNS:
+            if c in frame.columns:
+                self.distinct[c] = HyperLogLog().update(frame[c])
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        for c, n in other.nulls.items():
+            self.nulls[c] = self.nulls.get(c, 0) + n
+        for c, o in other.counters.items():
+            mine = self.counters.setdefault(c, {"count": 0, "sum": 0.0, "min": None, "max": None})
+            mine["count"] += o["count"]
+            mine["sum"] += o["sum"]
+            mine["min"] = o["min"] if mine["min"] is None else (mine["min"] if o["min"] is None else min(mine["min"], o["min"]))
+            mine["max"] = o["max"] if mine["max"] is None else (mine["max"] if o["max"] is None else max(mine["max"], o["max"]))
+        for c, d in other.digests.items():
+            self.digests.setdefault(c, TDigest(d.compression)).merge(d)
+        for c, h in other.distinct.items():
+            self.distinct.setdefault(c, HyperLogLog(h.p)).merge(h)
+        return self
+
+    #######################
+    # 질의
+    def quantiles(self, column, qs):
+        digest = self.digests.get(column)
+        return [None if digest is None else digest.quantile(q) for q in qs]
+
+    def mean(self, column):
+        c = self.counters.get(column)
+        return c["sum"] / c["count"] if c and c["count"] else None
+
+    def n_distinct(self, column):
+        h = self.distinct.get(column)
+        return None if h is None else int(round(h.estimate()))
+
+    def to_dict(self):
+        return {
+            "rows": self.rows,
+            "nulls": self.nulls,
+            "counters": self.counters,
+            "digests": {c: d.to_dict() for c, d in self.digests.items()},
+            "distinct": {c: h.to_dict() for c, h in self.distinct.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        self = cls()
+        self.rows = data["rows"]
+        self.nulls = dict(data["nulls"])
+        self.counters = {c: dict(v) for c, v in data["counters"].items()}
+        self.digests = {c: TDigest.from_dict(d) for c, d in data["digests"].items()}
+        self.distinct = {c: HyperLogLog.from_dict(h) for c, h in data["distinct"].items()}
+        return self
+
+
+def merge_summaries(summaries):
+    """요약 여러 개를 새 요약 하나로(입력은 바꾸지 않음)."""
+    merged = Summary()
+    for s in summaries:
+        merged.merge(s)
+    return merged
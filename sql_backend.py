@@ -0,0 +1,562 @@
+#######################
+# 임베디드 SQL 질의 엔진 (SQLite)
+#
+# DASHBOARD_ENGINE=sqlite 로 선택한다. 데이터 원천(CSV 또는 ingest 저장소)을 묶음 단위로 읽어 로컬 SQLite 파일에 적재하고
+# (제출일·제출연도·조사시도·조사시군구·유적성격·발간기관 인덱스), 사이드바 필터와 패널 집계
+# (groupby·pivot·top-N의 원천 롤업)를 SQL로 위임한다. 필터 뷰는 행을 올리지 않고, 패널이 요청한
+# 컬럼·행(정렬·LIMIT)만 읽는다.
+#
+# 결과는 pandas 엔진(pipeline.PandasEngine)과 같아야 한다.
+# - 결측 패싯 값은 "미상", 시대는 쉼표 태그 단위(report_tags 테이블)
+# - 키워드는 search_index와 같은 정규화(NFKC·소문자)·질의 문법
+# - 분위수는 pandas 기본값과 같은 선형 보간
+import json
+import os
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_layer import (
+    CACHE_DIR, DATA_PATH, SIDECAR_VERSION, STORE_DIR, SUBPARTITION_COLUMN, UNKNOWN_LABEL,
+    chunk_summaries, iter_dataset_chunks, load_partition, partition_names, source_fingerprint, store_changes,
+    store_manifest,
+)
+from filter_engine import FACET_COLUMNS, FACET_HIERARCHY, TAG_COLUMNS, split_tags
+from pipeline import view_memo
+from report_cube import CUBE_DIMENSIONS, ERA_DIMENSION, CubeSlice
+from search_index import OPTIONAL_SEARCH_COLUMNS, SEARCH_COLUMNS, normalize_text, parse_query
+from sketches import Summary
+
+INGEST_CHUNK_ROWS = 50_000
+INDEXED_COLUMNS = ["제출일", "제출연도", "조사시도", "조사시군구", "유적성격", "발간기관"]
+YEAR_COLUMN = "제출연도"
+AREA_COLUMN = "조사면적"
+_KW_PREFIX = "_kw_"
+# DB 스키마가 바뀌면 올려서 기존 DB를 무효화(파일 이름에 포함)
+DATABASE_FORMAT = 2
+# 행이 속한 저장소 파티션(CSV 원천은 NULL). 증분 갱신은 이 단위로 지우고 다시 넣고, 행 순서는 (파티션, rid)
+_PARTITION = "_partition"
+
+
+def _q(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _regexp(pattern, text):
+    return text is not None and re.search(pattern, text) is not None
+
+
+#######################
+# 적재
+def database_path(path=DATA_PATH, cache_dir=CACHE_DIR, store_dir=STORE_DIR):
+    """DB 파일 경로. CSV 원천은 내용 해시별, 저장소는 하나(버전이 올라가면 바뀐 파티션만 반영 — sync_database)."""
+    manifest = store_manifest(store_dir)
+    if manifest is not None:
+        tag = "store"
+    else:
+        tag = source_fingerprint(path, cache_dir)["sha1"][:16]
+    return Path(cache_dir) / f"{Path(path).stem}-{tag}-v{SIDECAR_VERSION}-db{DATABASE_FORMAT}.sqlite"
+
+
+def _to_sql_frame(chunk, offset, partitions=None):
+    """prepare_frame 결과를 SQLite 저장형으로: 날짜는 ISO 문자열, 카테고리는 문자열, 검색용 정규화 컬럼 추가.
+    partitions는 행별 저장소 파티션 이름(CSV 원천은 None)."""
+    out = pd.DataFrame({"rid": np.arange(offset, offset + len(chunk), dtype="int64")})
+    out[_PARTITION] = None if partitions is None else partitions.to_numpy(dtype=object)
+    for c in chunk.columns:
+        s = chunk[c].reset_index(drop=True)
+        if pd.api.types.is_datetime64_any_dtype(s):
+            s = s.dt.strftime("%Y-%m-%d")
+        if isinstance(s.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(s):
+            s = s.astype("object").where(s.notna(), None)
+        elif pd.api.types.is_extension_array_dtype(s):
+            s = s.astype("object").where(s.notna(), None)
+        out[c] = s
+    for c in SEARCH_COLUMNS + OPTIONAL_SEARCH_COLUMNS:
+        if c in chunk.columns:
+            out[_KW_PREFIX + c] = [
+                normalize_text(v) if isinstance(v, str) and v.strip() else "" for v in chunk[c].astype("object")
+            ]
+    return out
+
+
+def build_database(path=DATA_PATH, db_path=None, chunk_rows=INGEST_CHUNK_ROWS, store_dir=STORE_DIR):
+    """데이터 원천을 chunk 단위로 읽어 SQLite 파일을 만든다(임시 파일에 만든 뒤 교체).
+    파티션 요약(sketches.Summary)도 같은 순회에서 만들어 summaries 테이블에 넣는다."""
+    db_path = Path(db_path or database_path(path, store_dir=store_dir))
+    manifest = store_manifest(store_dir)
+    subpartition = manifest.get("subpartition_column") if manifest is not None else SUBPARTITION_COLUMN
+    # 요약 이름과 행별 파티션은 같은 기준(저장소면 저장소 파티션)
+    os.makedirs(db_path.parent, exist_ok=True)
+    tmp = Path(f"{db_path}.tmp-{os.getpid()}")
+    tmp.unlink(missing_ok=True)
+
+    conn = sqlite3.connect(tmp)
+    try:
+        offset = 0
+        dtypes = None
+        summaries = ({}, {})
+        for chunk in iter_dataset_chunks(path, store_dir, chunk_rows):
+            chunk_summaries([chunk], subpartition, into=summaries)
+            if dtypes is None:
+                dtypes = {c: str(t) for c, t in chunk.dtypes.items()}
+            partitions = partition_names(chunk, subpartition) if manifest is not None else None
+            _to_sql_frame(chunk, offset, partitions).to_sql("reports", conn, if_exists="append", index=False)
+            _tag_frame(chunk, offset).to_sql("report_tags", conn, if_exists="append", index=False)
+            offset += len(chunk)
+
+        conn.execute("CREATE UNIQUE INDEX idx_reports_rid ON reports(rid)")
+        conn.execute(f"CREATE INDEX idx_reports_order ON reports({_PARTITION}, rid)")
+        for c in INDEXED_COLUMNS:
+            if c in (dtypes or {}):
+                conn.execute(f"CREATE INDEX {_q('idx_' + c)} ON reports({_q(c)})")
+        conn.execute("CREATE INDEX idx_tags ON report_tags(col, tag, rid)")
+        conn.execute("CREATE INDEX idx_tags_rid ON report_tags(rid)")
+        conn.execute("CREATE TABLE meta(key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("INSERT INTO meta VALUES ('dtypes', ?)", (json.dumps(dtypes or {}, ensure_ascii=False),))
+        conn.execute("INSERT INTO meta VALUES ('n_rows', ?)", (str(offset),))
+        if manifest is not None:
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", _store_meta(manifest))
+        conn.execute("CREATE TABLE summaries(name TEXT PRIMARY KEY, stats TEXT, summary TEXT)")
+        conn.executemany("INSERT INTO summaries VALUES (?, ?, ?)", _summary_rows(*summaries))
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp, db_path)
+    return db_path
+
+
+def _tag_frame(chunk, offset):
+    """report_tags 행: 태그 컬럼별 (rid, 컬럼, 태그)."""
+    frames = []
+    for c in TAG_COLUMNS:
+        if c in chunk.columns:
+            pairs = split_tags(chunk[c])
+            frames.append(pd.DataFrame({"rid": pairs["row"] + offset, "col": c, "tag": pairs["tag"]}))
+    if not frames:
+        return pd.DataFrame({"rid": pd.Series(dtype="int64"), "col": pd.Series(dtype=object),
+                             "tag": pd.Series(dtype=object)})
+    return pd.concat(frames, ignore_index=True)
+
+
+def _summary_rows(stats, summaries):
+    return [
+        (name, json.dumps(stats[name], ensure_ascii=False), json.dumps(summaries[name].to_dict()))
+        for name in stats
+    ]
+
+
+def _store_meta(manifest):
+    return [("store_id", manifest.get("store_id")), ("store_version", str(manifest["version"]))]
+
+
+def _insert(conn, table, frame):
+    # to_sql은 자체 커밋을 하므로 증분 갱신(한 트랜잭션)에서는 executemany로 직접 넣는다
+    records = frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None)
+    conn.executemany(
+        f"INSERT INTO {table} ({', '.join(_q(c) for c in frame.columns)}) VALUES ({', '.join('?' * frame.shape[1])})",
+        records,
+    )
+
+
+def update_database(db_path, partitions, manifest, store_dir=STORE_DIR):
+    """저장소에서 다시 쓴 파티션만 DB에 반영(upsert): 그 파티션의 행·태그·요약을 지우고 파티션 파일에서 다시 넣는다.
+    새 행의 rid는 뒤에 이어 붙이고, 파티션 안에서는 연번 순이라 (파티션, rid) 순서가 저장소 행 순서와 같다.
+    한 트랜잭션 — 읽는 쪽은 갱신 전이나 후 중 하나만 본다."""
+    subpartition = manifest.get("subpartition_column")
+    names = sorted(partitions)
+    marks = ", ".join("?" * len(names))
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(
+            f"DELETE FROM report_tags WHERE rid IN (SELECT rid FROM reports WHERE {_PARTITION} IN ({marks}))", names
+        )
+        conn.execute(f"DELETE FROM reports WHERE {_PARTITION} IN ({marks})", names)
+        conn.execute(f"DELETE FROM summaries WHERE name IN ({marks})", names)
+        offset, = conn.execute("SELECT COALESCE(MAX(rid) + 1, 0) FROM reports").fetchone()
+        for name in names:
+            if name not in manifest["partitions"]:
+                continue  # 재제출로 비어 없어진 파티션
+            part = load_partition(name, store_dir)
+            _insert(conn, "reports", _to_sql_frame(part, offset, partition_names(part, subpartition)))
+            _insert(conn, "report_tags", _tag_frame(part, offset))
+            conn.executemany("INSERT INTO summaries VALUES (?, ?, ?)", _summary_rows(*chunk_summaries([part], subpartition)))
+            offset += len(part)
+        n_rows, = conn.execute("SELECT COUNT(*) FROM reports").fetchone()
+        conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [("n_rows", str(n_rows)), *_store_meta(manifest)])
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return db_path
+
+
+def _database_store(db_path):
+    """DB가 반영한 저장소 (store_id, 버전). 기록이 없는 DB(CSV 원천·옛 DB)면 (None, None)."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        meta = dict(conn.execute("SELECT key, value FROM meta WHERE key IN ('store_id', 'store_version')"))
+    except sqlite3.Error:
+        return None, None
+    finally:
+        conn.close()
+    version = meta.get("store_version")
+    return meta.get("store_id"), int(version) if version is not None else None
+
+
+def sync_database(path=DATA_PATH, cache_dir=CACHE_DIR, store_dir=STORE_DIR):
+    """현재 데이터 원천에 맞는 DB 경로. 저장소 DB가 예전 버전이면 변경 기록(manifest["changes"])의
+    파티션만 upsert하고, 기록이 그 사이를 덮지 못하거나(재초기화·오래된 DB) 갱신이 실패하면 새로 만든다."""
+    db_path = database_path(path, cache_dir, store_dir)
+    manifest = store_manifest(store_dir)
+    if db_path.exists() and manifest is not None:
+        store_id, version = _database_store(db_path)
+        changed = store_changes(manifest, store_id, version)
+        if changed is None:
+            db_path.unlink()
+        elif version != manifest["version"]:
+            try:
+                update_database(db_path, changed, manifest, store_dir)
+            except (sqlite3.Error, KeyError, ValueError):
+                db_path.unlink()  # 스키마가 바뀐 배치 등 → 전체 재구성
+    if not db_path.exists():
+        build_database(path, db_path, store_dir=store_dir)
+        # 같은 원천의 다른 DB(이전 CSV 해시 등) 정리
+        for old in Path(cache_dir).glob(f"{Path(path).stem}-*.sqlite"):
+            if old != db_path:
+                old.unlink(missing_ok=True)
+    return db_path
+
+
+def restore_types(frame, dtypes):
+    """SQLite에서 읽은 행을 pandas 엔진 프레임과 같은 dtype으로 되돌린다."""
+    for c, t in dtypes.items():
+        if c not in frame.columns:
+            continue
+        if t.startswith("datetime64") or t.startswith("date32"):
+            frame[c] = pd.to_datetime(frame[c], errors="coerce").astype(t)
+        elif t == "category":
+            cat = frame[c].astype("category")
+            if UNKNOWN_LABEL not in cat.cat.categories:
+                cat = cat.cat.add_categories([UNKNOWN_LABEL])
+            frame[c] = cat
+        elif t in ("Int8", "Int16", "Int32", "Int64", "int32", "int64", "float32", "float64"):
+            frame[c] = pd.to_numeric(frame[c], errors="coerce").astype(t)
+        elif t == "str":
+            # pandas 3 기본 문자열 dtype(결측은 NaN 유지)
+            frame[c] = frame[c].astype(t)
+    return frame
+
+
+#######################
+# 질의
+@dataclass(frozen=True)
+class SqlView:
+    """SQL 엔진의 필터 뷰. 행을 들고 있지 않다(WHERE 절만) — 건수·집계는 SQL로, 행은 rows()로 필요한 만큼만."""
+
+    key: tuple
+    cube: object = field(repr=False)
+    engine: object = field(repr=False)
+    where: str = field(repr=False, default="1")
+    params: tuple = field(repr=False, default=())
+    shares_base: bool = False
+    memo: dict = field(repr=False, compare=False, default_factory=dict)
+
+    @cached_property
+    def n_rows(self):
+        return self.count()
+
+    @property
+    def extra_bytes(self):
+        return 0  # 행은 DB에 있고 뷰에는 WHERE 절과 메모된 패널 집계만
+
+    @property
+    def selection(self):
+        return None  # 행 선택은 WHERE 절로 다시 계산(DB 인덱스 사용)
+
+    @property
+    def columns(self):
+        return self.engine.columns
+
+    def _where(self, notna=(), isna=()):
+        return " AND ".join(
+            [self.where]
+            + [f"r.{_q(c)} IS NOT NULL" for c in notna]
+            + [f"r.{_q(c)} IS NULL" for c in isna]
+        )
+
+    def has_values(self, column):
+        return column in self.engine.columns and self.cached(("has_values", column), lambda: bool(self.engine.fetch(
+            f"SELECT 1 FROM reports r WHERE {self._where([column])} LIMIT 1", self.params
+        )))
+
+    def count(self, notna=(), isna=()):
+        """notna 컬럼은 모두 값이 있고 isna 컬럼은 모두 결측인 행 수."""
+        return self.cached(("count", tuple(notna), tuple(isna)), lambda: int(self.engine.fetch(
+            f"SELECT COUNT(*) FROM reports r WHERE {self._where(notna, isna)}", self.params
+        )[0][0]))
+
+    def tag_counts(self, column):
+        rows = self.engine.fetch(
+            f"SELECT t.tag, COUNT(*) FROM report_tags t JOIN reports r ON r.rid = t.rid "
+            f"WHERE t.col = ? AND {self.where} GROUP BY t.tag",
+            (column,) + self.params,
+        )
+        counts = pd.Series(dict(rows), dtype="int64")
+        return counts[counts > 0].sort_values(ascending=False)
+
+    def _select(self, columns, sort_by, ascending, notna):
+        columns = list(self.engine.columns if columns is None else columns)
+        # 원래 행 순서 = (저장소 파티션, rid) — 증분 갱신으로 다시 넣은 파티션도 제자리
+        order = f"r.{_PARTITION}, r.rid"
+        if sort_by is not None:
+            # pandas 엔진과 같은 순서: 결측은 뒤, 같은 값은 원래 순서
+            order = f"r.{_q(sort_by)} {'ASC' if ascending else 'DESC'} NULLS LAST, {order}"
+        sql = (
+            f"SELECT {', '.join(f'r.{_q(c)}' for c in columns)} FROM reports r "
+            f"WHERE {self._where(notna)} ORDER BY {order}"
+        )
+        return columns, sql
+
+    def rows(self, columns=None, sort_by=None, ascending=True, limit=None, offset=0, notna=()):
+        """필터 결과 행 일부를 DB에서 읽는다(LIMIT/OFFSET — 필요한 컬럼·행만 메모리에)."""
+        columns, sql = self._select(columns, sort_by, ascending, notna)
+        frame = pd.read_sql_query(
+            f"{sql} LIMIT ? OFFSET ?", self.engine._conn(),
+            params=self.params + (-1 if limit is None else int(limit), int(offset)),
+        )
+        return restore_types(frame, {c: self.engine.dtypes[c] for c in columns})
+
+    def chunks(self, columns=None, notna=(), chunk_rows=INGEST_CHUNK_ROWS):
+        """rows()를 chunk_rows행 묶음으로 순회(구간 집계처럼 행 전체를 한 번에 둘 필요가 없는 패널용)."""
+        columns, sql = self._select(columns, None, True, notna)
+        for frame in pd.read_sql_query(sql, self.engine._conn(), params=self.params, chunksize=chunk_rows):
+            yield restore_types(frame, {c: self.engine.dtypes[c] for c in columns})
+
+    def cached(self, name, build):
+        return view_memo(self, name, build)
+
+
+class SqlCubeSlice(CubeSlice):
+    """CubeSlice와 같은 인터페이스(totals/rollup/pivot)를 GROUP BY로 구현."""
+
+    def __init__(self, engine, where, params):
+        self.engine = engine
+        self.where = where
+        self.params = params
+        self.dimensions = [c for c in CUBE_DIMENSIONS if c in engine.columns]
+        self._rollups = {}
+
+    def totals(self):
+        (n, area_n, area_sum), = self.engine.fetch(
+            f"SELECT COUNT(*), COUNT(r.{_q(AREA_COLUMN)}), TOTAL(r.{_q(AREA_COLUMN)}) FROM reports r WHERE {self.where}",
+            self.params,
+        )
+        return {
+            "건수": int(n),
+            "면적건수": int(area_n),
+            "합계면적": float(area_sum) if area_n else None,
+            "평균면적": float(area_sum) / area_n if area_n else None,
+        }
+
+    def rollup(self, dims):
+        key = tuple(dims)
+        if key not in self._rollups:
+            select, join, params = [], "", ()
+            for d in dims:
+                if d == ERA_DIMENSION:
+                    select.append("t.tag")
+                    join = "JOIN report_tags t ON t.rid = r.rid AND t.col = ?"
+                    params = (ERA_DIMENSION,)
+                elif self.engine.dtypes.get(d) == "category" or self.engine.dtypes.get(d) in ("str", "object"):
+                    select.append(f"COALESCE(r.{_q(d)}, '{UNKNOWN_LABEL}')")
+                else:
+                    select.append(f"r.{_q(d)}")
+            group = ", ".join(str(i + 1) for i in range(len(dims)))
+            sql = (
+                f"SELECT {', '.join(select)}, COUNT(*), TOTAL(r.{_q(AREA_COLUMN)}), COUNT(r.{_q(AREA_COLUMN)}) "
+                f"FROM reports r {join} WHERE {self.where} GROUP BY {group}"
+            )
+            rows = self.engine.fetch(sql, params + self.params)
+            agg = pd.DataFrame(rows, columns=list(dims) + ["건수", "합계면적", "면적건수"])
+            for d in dims:
+                if self.engine.dtypes.get(d, "").startswith("Int"):
+                    agg[d] = agg[d].astype(self.engine.dtypes[d])
+            agg = agg.astype({"건수": "int64", "합계면적": "float64", "면적건수": "int64"})
+            self._rollups[key] = agg
+        return self._rollups[key]
+
+
+class SqlEngine:
+    """pipeline.PandasEngine과 같은 인터페이스를 SQLite 위에서 제공한다."""
+
+    name = "sqlite"
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        self._local = threading.local()
+        self.dtypes = json.loads(self.fetch("SELECT value FROM meta WHERE key = 'dtypes'")[0][0])
+        self.columns = list(self.dtypes)
+        self._facet_cache = {}
+
+    @classmethod
+    def from_dataset(cls, path=DATA_PATH, cache_dir=CACHE_DIR, store_dir=STORE_DIR):
+        return cls(sync_database(path, cache_dir, store_dir))
+
+    def _conn(self):
+        # Streamlit은 세션마다 다른 스레드에서 스크립트를 돌리므로 스레드별 읽기 전용 연결
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+            conn.create_function("regexp", 2, _regexp, deterministic=True)
+            self._local.conn = conn
+        return conn
+
+    def fetch(self, sql, params=()):
+        return self._conn().execute(sql, params).fetchall()
+
+    def summaries(self):
+        """적재 때 만든 (가지치기 통계, {파티션 이름: Summary}). summaries 테이블이 없는 옛 DB면 None."""
+        try:
+            rows = self.fetch("SELECT name, stats, summary FROM summaries ORDER BY name")
+        except sqlite3.OperationalError:
+            return None
+        return (
+            {name: json.loads(stats) for name, stats, _ in rows},
+            {name: Summary.from_dict(json.loads(summary)) for name, _, summary in rows},
+        )
+
+    #######################
+    # 사이드바 선택지 · 범위
+    def has_values(self, column):
+        return column in self.columns and bool(
+            self.fetch(f"SELECT 1 FROM reports WHERE {_q(column)} IS NOT NULL LIMIT 1")
+        )
+
+    def facet_values(self, column, within=None):
+        where, params = self._where({"facets": within or {}})
+        if column in TAG_COLUMNS:
+            sql = (
+                f"SELECT DISTINCT t.tag FROM report_tags t JOIN reports r ON r.rid = t.rid "
+                f"WHERE t.col = ? AND {where}"
+            )
+            params = (column,) + params
+        else:
+            sql = f"SELECT DISTINCT COALESCE(r.{_q(column)}, '{UNKNOWN_LABEL}') FROM reports r WHERE {where}"
+        return sorted(v for v, in self.fetch(sql, params))
+
+    def facet_counts(self, spec):
+        """선택지별 건수. 패싯마다 자기(와 하위 패싯) 조건만 뺀 WHERE로 GROUP BY 한 번씩."""
+        facets = spec.get("facets") or {}
+        counts = {}
+        for column in FACET_COLUMNS:
+            if column not in self.columns:
+                continue
+            skip = {column} | {child for child, parent in FACET_HIERARCHY.items() if parent == column}
+            where, params = self._where({**spec, "facets": {c: v for c, v in facets.items() if c not in skip}})
+            if column in TAG_COLUMNS:
+                sql = (
+                    f"SELECT t.tag, COUNT(*) FROM report_tags t JOIN reports r ON r.rid = t.rid "
+                    f"WHERE t.col = ? AND {where} GROUP BY t.tag"
+                )
+                params = (column,) + params
+            else:
+                sql = f"SELECT COALESCE(r.{_q(column)}, '{UNKNOWN_LABEL}'), COUNT(*) FROM reports r WHERE {where} GROUP BY 1"
+            counts[column] = dict.fromkeys(self._all_values(column), 0)
+            counts[column].update(self.fetch(sql, params))
+        return counts
+
+    def _all_values(self, column):
+        if column not in self._facet_cache:
+            self._facet_cache[column] = set(self.facet_values(column))
+        return self._facet_cache[column]
+
+    def value_range(self, column):
+        lo, hi = self.fetch(f"SELECT MIN({_q(column)}), MAX({_q(column)}) FROM reports")[0]
+        return None if lo is None else (lo, hi)
+
+    def quantiles(self, column, qs):
+        """pandas 기본(선형 보간) 분위수를 ORDER BY ... LIMIT/OFFSET으로 계산."""
+        n, = self.fetch(f"SELECT COUNT({_q(column)}) FROM reports")[0]
+        result = []
+        for q in qs:
+            pos = q * (n - 1)
+            lo = int(np.floor(pos))
+            vals = [v for v, in self.fetch(
+                f"SELECT {_q(column)} FROM reports WHERE {_q(column)} IS NOT NULL ORDER BY {_q(column)} LIMIT 2 OFFSET ?",
+                (lo,),
+            )]
+            if len(vals) == 1 or pos == lo:
+                result.append(float(vals[0]))
+            else:
+                result.append(float(vals[0] + (vals[1] - vals[0]) * (pos - lo)))
+        return result
+
+    def base_bytes(self):
+        return os.path.getsize(self.db_path)
+
+    #######################
+    # 필터 → WHERE
+    def _where(self, spec):
+        clauses, params = [], []
+        modes = spec.get("facet_modes") or {}
+
+        for column, values in (spec.get("facets") or {}).items():
+            if not values or column not in self.columns:
+                continue
+            selected = set(values)
+            if modes.get(column) != "all" and selected.issuperset(self._all_values(column)):
+                continue  # 전체 선택 = 필터 없음("모두 포함" 모드는 제외)
+            marks = ", ".join("?" * len(selected))
+            if column in TAG_COLUMNS:
+                if modes.get(column) == "all":
+                    clauses.append(
+                        f"r.rid IN (SELECT rid FROM report_tags WHERE col = ? AND tag IN ({marks}) "
+                        f"GROUP BY rid HAVING COUNT(DISTINCT tag) = ?)"
+                    )
+                    params += [column, *sorted(selected), len(selected)]
+                else:
+                    clauses.append(f"r.rid IN (SELECT rid FROM report_tags WHERE col = ? AND tag IN ({marks}))")
+                    params += [column, *sorted(selected)]
+            else:
+                clause = f"r.{_q(column)} IN ({marks})"
+                if UNKNOWN_LABEL in selected:
+                    clause = f"({clause} OR r.{_q(column)} IS NULL)"
+                clauses.append(clause)
+                params += sorted(selected)
+
+        if spec.get("year_range") and YEAR_COLUMN in self.columns:
+            clauses.append(f"r.{_q(YEAR_COLUMN)} BETWEEN ? AND ?")
+            params += list(spec["year_range"])
+        if spec.get("area_range") and AREA_COLUMN in self.columns:
+            clauses.append(f"r.{_q(AREA_COLUMN)} BETWEEN ? AND ?")
+            params += list(spec["area_range"])
+
+        keyword = (spec.get("keyword") or "").strip()
+        kw_columns = [c for c in (spec.get("keyword_columns") or SEARCH_COLUMNS) if c in self.columns]
+        for term, prefix in parse_query(keyword) if kw_columns else []:
+            if prefix:
+                pattern = r"(?<!\w)" + re.escape(term)
+                ors = [f"regexp(?, r.{_q(_KW_PREFIX + c)})" for c in kw_columns]
+                params += [pattern] * len(kw_columns)
+            else:
+                ors = [f"instr(r.{_q(_KW_PREFIX + c)}, ?) > 0" for c in kw_columns]
+                params += [term] * len(kw_columns)
+            clauses.append("(" + " OR ".join(ors) + ")")
+
+        return (" AND ".join(clauses) or "1"), tuple(params)
+
+    def view(self, key, spec, selection=None):
+        # 행은 읽지 않는다 — 뷰는 WHERE 절(건수·집계·행 조회가 모두 이 조건을 씀)
+        where, params = self._where(spec)
+        return SqlView(key, SqlCubeSlice(self, where, params), self, where, params)
@@ -1,9 +1,29 @@
 #######################
 # Import libraries
+import os
+
 import streamlit as st
 import pandas as pd
-import altair as alt
-import plotly.express as px
+import charts
+from data_layer import (
+    DATA_PATH, SUBPARTITION_COLUMN, chunk_summaries, dataset_version, frame_summaries, iter_dataset_chunks,
+    load_dataset, load_store_summaries, memory_report, prune_partitions, store_catalog,
+    store_manifest,
+)
+from export_service import EXPORT_FORMATS, EXPORT_MAX_ROWS, ExportCache, available_formats
+from figure_cache import FigureCache, fingerprint
+from filter_engine import FilterIndex
+from filter_signature import canonical_spec, clamp_range, filter_signature, from_query_params, to_query_params
+from panel_pool import PANEL_TIMEOUT_S, PanelBatch, PanelTimeout, make_executor
+from geo_assets import STATIC_DIR, load_boundaries
+from near_duplicates import NearDuplicates, Signatures, load_store_signatures
+from perf_trace import MemoryHold, Tracer, release_memory_tracking, trace_enabled_by_env
+from pipeline import PandasEngine, ViewCache
+from precompute import open_artifacts
+from report_cube import ReportCube
+from search_index import OPTIONAL_SEARCH_COLUMNS, SEARCH_COLUMNS, SearchIndex
+from sketches import merge_summaries
+from sql_backend import SqlEngine
 
 #######################
 # Page configuration
@@ -13,8 +33,6 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded")
 
-alt.themes.enable("default")
-
 #######################
 # CSS styling
 st.markdown("""
@@ -67,7 +85,264 @@ st.markdown("""
 
 #######################
 # Load data
-df_reshaped = pd.read_csv('국가유산청_발굴보고서.csv', encoding = "cp949") ## 분석 데이터 넣기
+# 파싱·타입 고정은 data_layer에서 한 번만 수행하고, 결과는 프로세스 전체(모든 세션·리런)에서 공유
+# 원본 CSV가 바뀌거나(mtime) ingest.py로 배치가 적재되면(저장소 버전) 캐시 키가 바뀜
+# partitions: 파티션 저장소에서 읽을 파티션(prune_partitions 결과, None = 전체). 조합마다 엔진이 따로 생기므로 개수 제한
+SCAN_CACHE_ENTRIES = 8
+
+
+# precompute.py 산출물(전체 데이터 기준)이 현재 데이터와 맞으면 원본 파싱·인덱스 빌드 대신 mmap으로 연다
+@st.cache_resource
+def load_artifacts(version: str):
+    return open_artifacts()
+
+
+def _artifacts(version, partitions):
+    return load_artifacts(version) if partitions is None else None
+
+
+@st.cache_resource(show_spinner="발굴보고서 데이터를 불러오는 중...", max_entries=SCAN_CACHE_ENTRIES)
+def load_data(path: str, version: str, partitions=None) -> pd.DataFrame:
+    artifacts = _artifacts(version, partitions)
+    if artifacts is not None:
+        return artifacts.frame()
+    return load_dataset(path, partitions=partitions)
+
+
+@st.cache_resource(show_spinner="필터 인덱스를 만드는 중...", max_entries=SCAN_CACHE_ENTRIES)
+def load_filter_index(path: str, version: str, partitions=None) -> FilterIndex:
+    artifacts = _artifacts(version, partitions)
+    if artifacts is not None:
+        return artifacts.filter_index()
+    return FilterIndex(load_data(path, version, partitions))
+
+
+@st.cache_resource(show_spinner="집계 큐브를 만드는 중...", max_entries=SCAN_CACHE_ENTRIES)
+def load_report_cube(path: str, version: str, partitions=None) -> ReportCube:
+    artifacts = _artifacts(version, partitions)
+    if artifacts is not None:
+        return artifacts.report_cube()
+    return ReportCube(load_data(path, version, partitions))
+
+
+@st.cache_resource(show_spinner="검색 색인을 만드는 중...", max_entries=SCAN_CACHE_ENTRIES)
+def load_search_index(path: str, version: str, partitions=None) -> SearchIndex:
+    artifacts = _artifacts(version, partitions)
+    if artifacts is not None:
+        return artifacts.search_index()
+    return SearchIndex(load_data(path, version, partitions))
+
+
+# 저장소 파티션 통계(연도 범위·시도 선택지). 데이터 파일은 읽지 않음. CSV 원천이거나 옛 저장소면 None
+@st.cache_resource
+def load_catalog(version: str):
+    manifest = store_manifest()
+    return store_catalog(manifest) if manifest is not None else None
+
+
+# 파티션 요약(sketches.Summary): precompute.py 산출물의 summaries/, 없으면 저장소의 파티션별 summary.json,
+# sqlite 엔진은 DB 적재 때 만든 summaries 테이블. 그 밖(요약이 없는 옛 저장소 등)은 버전당 한 번
+# 원천을 묶음 단위로 읽어 (제출연도, 조사시도) 단위로 만든다 → (가지치기 통계, {파티션 이름: 요약})
+@st.cache_resource(show_spinner="파티션 요약을 만드는 중...")
+def load_summaries(path: str, version: str):
+    artifacts = load_artifacts(version)
+    summaries = artifacts.summaries() if artifacts is not None else None
+    if summaries is not None:
+        return summaries
+    manifest = store_manifest()
+    if manifest is not None:
+        summaries = load_store_summaries(manifest=manifest)
+        if summaries is not None:
+            return manifest["partitions"], summaries
+    if ENGINE == "sqlite":
+        summaries = load_engine(ENGINE, path, version).summaries()
+        if summaries is not None:
+            return summaries
+    if ENGINE == "pandas" and manifest is None:
+        # CSV 원천 + pandas 엔진은 전체 프레임이 이미 공유 메모리에 있으므로 그대로 요약
+        return frame_summaries(load_data(path, version))
+    subpartition = manifest.get("subpartition_column") if manifest is not None else SUBPARTITION_COLUMN
+    return chunk_summaries(iter_dataset_chunks(path), subpartition)
+
+
+# 파티션 조합별 병합 요약. 면적 슬라이더 기준(1–99 분위)은 가지치기와 무관하게 전체(partitions=None)
+@st.cache_resource(max_entries=32)
+def load_range_summary(path: str, version: str, partitions=None):
+    _, summaries = load_summaries(path, version)
+    return merge_summaries(summaries[name] for name in (sorted(summaries) if partitions is None else partitions))
+
+
+# 유사 중복 묶음(연번 기준 → 가지치기·엔진과 무관, 데이터 버전당 한 번). precompute.py 산출물이 있으면 열고,
+# 없으면 저장소의 파티션별 서명(ingest.py가 기록)을 합치거나 원천을 묶음 단위로 읽어 서명만 만든다
+@st.cache_resource(show_spinner="유사 중복 보고서를 찾는 중...")
+def load_near_duplicates(path: str, version: str) -> NearDuplicates:
+    artifacts = load_artifacts(version)
+    if artifacts is not None:
+        return artifacts.near_duplicates()
+    manifest = store_manifest()
+    if manifest is None and ENGINE == "pandas":
+        # CSV 원천 + pandas 엔진은 전체 프레임이 이미 공유 메모리에 있음
+        return NearDuplicates.build(load_data(path, version))
+    signatures = load_store_signatures(manifest=manifest) if manifest is not None else None
+    if signatures is None:
+        signatures = Signatures.of_chunks(iter_dataset_chunks(path))
+    return NearDuplicates.from_signatures(signatures)
+
+
+# 내보내기 결과 캐시는 프로세스 전체에서 공유(같은 필터 조건이면 세션이 달라도 재사용)
+@st.cache_resource
+def get_export_cache() -> ExportCache:
+    return ExportCache()
+
+
+# 필터 뷰도 프로세스 전체 공유(세션에는 필터 키·스펙·선택 비트맵만 저장)
+# 키는 정규화된 필터 시그니처, 뷰에 메모된 패널 집계도 뷰와 함께 공유·만료
+VIEW_CACHE_TTL_S = float(os.environ.get("DASHBOARD_VIEW_TTL", "1800"))
+
+
+@st.cache_resource
+def get_view_cache() -> ViewCache:
+    return ViewCache(ttl_s=VIEW_CACHE_TTL_S)
+
+
+# plotly Figure 캐시도 프로세스 전체 공유(입력 집계·파라미터가 같으면 세션이 달라도 재사용)
+@st.cache_resource
+def get_figure_cache() -> FigureCache:
+    return FigureCache()
+
+
+# 패널 워커 풀(DASHBOARD_PANEL_WORKERS > 0일 때만, 세션 공유). None이면 패널을 순차 계산
+@st.cache_resource
+def get_panel_executor():
+    return make_executor()
+
+
+# 행정구역 경계(geo_assets로 가공된 자산). 정적 파일 서빙이 켜져 있고 자산이 static/ 아래면 URL을 넘긴다
+@st.cache_resource(show_spinner="행정구역 경계를 불러오는 중...")
+def load_geo(level: str):
+    """(plotly geojson 인자, 캐시 키용 버전). 경계가 없으면 (None, None)."""
+    collection, path = load_boundaries(level)
+    if collection is None:
+        return None, None
+    version = f"{path}:{path.stat().st_mtime_ns}" if path is not None else level
+    if path is not None and st.get_option("server.enableStaticServing"):
+        try:
+            return f"app/static/{path.resolve().relative_to(STATIC_DIR.resolve()).as_posix()}", version
+        except ValueError:
+            pass  # .cache에 가공된 경우 → 객체 그대로
+    return collection, version
+
+
+# 질의 엔진 선택: pandas(기본, 메모리 내) 또는 sqlite(임베디드 DB로 필터·집계 위임)
+ENGINE = os.environ.get("DASHBOARD_ENGINE", "pandas").lower()
+
+# 필터 결과가 이 행 수를 넘으면 대용량 모드: 산점도 → 서버 측 2D 구간 집계, 요약 테이블 → 서버 측 페이지 나누기
+LARGE_N_ROWS = int(os.environ.get("DASHBOARD_LARGE_N_ROWS", "20000"))
+
+
+@st.cache_resource(show_spinner="질의 엔진을 준비하는 중...", max_entries=SCAN_CACHE_ENTRIES)
+def load_engine(engine: str, path: str, version: str, partitions=None):
+    if engine == "sqlite":
+        return SqlEngine.from_dataset(path)
+    return PandasEngine(
+        load_data(path, version, partitions),
+        load_filter_index(path, version, partitions),
+        load_search_index(path, version, partitions),
+        load_report_cube(path, version, partitions),
+    )
+
+
+@st.cache_resource(max_entries=SCAN_CACHE_ENTRIES)
+def load_base_bytes(engine: str, path: str, version: str, partitions=None) -> int:
+    return load_engine(engine, path, version, partitions).base_bytes()
+
+
+# 컬럼별 메모리 표(운영 확인용). 데이터 버전(과 파티션 조합)별로 한 번만 계산
+@st.cache_resource(max_entries=SCAN_CACHE_ENTRIES)
+def load_memory_report(path: str, version: str, partitions=None) -> pd.DataFrame:
+    return memory_report(load_data(path, version, partitions))
+
+
+# 성능 계측: 사이드바 "성능" 토글(세션 상태) 또는 DASHBOARD_TRACE=1. 꺼져 있으면 section()은 no-op
+# tracemalloc은 프로세스 전역 → 세션마다 보유 표식을 하나 두고 켜고 끄기를 세션 단위로 센다
+memory_hold = st.session_state.setdefault("perf_memory_hold", MemoryHold())
+tracer = Tracer(enabled=trace_enabled_by_env() or st.session_state.get("perf_trace", False), memory_holder=memory_hold)
+
+with tracer.section("load"):
+    DATA_VERSION = dataset_version(DATA_PATH)
+    # 파티션 저장소 + pandas 엔진이면 엔진은 사이드바에서 연도·시도를 고른 뒤 겹치는 파티션만으로 만든다
+    # (sqlite 엔진은 제출연도·조사시도 인덱스로 같은 가지치기를 DB가 수행)
+    catalog = load_catalog(DATA_VERSION) if ENGINE == "pandas" else None
+    scan = None
+    engine = None if catalog is not None else load_engine(ENGINE, str(DATA_PATH), DATA_VERSION)  ## 분석 데이터 넣기
+
+
+def session_view(state=None):
+    """세션 필터 상태 → 공유 필터 뷰. 캐시에서 밀려났으면 세션에 남은 선택 비트맵으로 다시 만든다."""
+    state = state or st.session_state["filter_state"]
+    return get_view_cache().get_or_build(
+        state["key"], lambda: engine.view(state["key"], state["spec"], state["selection"])
+    )
+
+
+#######################
+# 패싯 실시간 건수
+# 선택지마다 "다른 필터는 그대로 두고 이 값을 고르면 몇 건인지"를 붙인다. 건수는 위젯을 그리기 전에
+# 이번 리런의 필터 값(세션 상태)으로 모든 패싯을 한 번에 계산한다(엔진.facet_counts — 비트맵 교집합).
+# 건수가 라벨에 들어가므로 건수가 바뀐 멀티셀렉트는 새 위젯 키로 다시 그리고,
+# 선택값은 facet_<컬럼>에 원래 값으로 보관해 라벨이 바뀌어도 선택이 유지되게 한다.
+def facet_selection(column, default):
+    """위젯을 그리기 전 시점의 선택값(직전 위젯 값 → 보관한 선택 → 기본값)."""
+    widget_key = st.session_state.get(f"facet_key_{column}")
+    if widget_key in st.session_state:
+        return list(st.session_state[widget_key])
+    return list(st.session_state.get(f"facet_{column}", default))
+
+
+def facet_multiselect(label, column, options, selection, counts, **kwargs):
+    # 엔진에 없는 값(가지치기로 읽지 않은 파티션의 시도 등)은 건수를 모르므로 이름만
+    counts = counts.get(column, {})
+    labels = {v: v if counts.get(v) is None else f"{v} ({counts[v]:,})" for v in options}
+    widget_key = f"facet_{column}_{fingerprint(list(labels.values()))[:12]}"
+    value = st.multiselect(
+        label,
+        options=options,
+        default=[v for v in selection if v in labels],
+        format_func=labels.get,
+        key=widget_key,
+        **kwargs
+    )
+    st.session_state[f"facet_{column}"] = value
+    st.session_state[f"facet_key_{column}"] = widget_key
+    return value
+
+
+# 시대 "모두 포함" 모드의 기본 선택은 빈 목록(= 시대 필터 없음). 전체 선택이 기본인 "하나라도 포함" 모드에서
+# 그대로 넘어오면 23개 시대를 모두 가진 보고서만 남아 0건이 되므로, 모드를 바꿀 때 전체 선택이면 비운다.
+def era_default(mode, options):
+    return list(options or []) if mode == "any" else []
+
+
+def reset_full_era_selection():
+    options = st.session_state.get("era_options") or []
+    if st.session_state.get("f_era_mode") == "all" and set(facet_selection("시대", options)) >= set(options):
+        # 위젯 상태는 지우기만(값을 넣으면 기본값과 충돌) → facet_selection이 보관한 빈 선택을 읽는다
+        st.session_state.pop(st.session_state.get("facet_key_시대"), None)
+        st.session_state["facet_시대"] = []
+
+
+def range_caption(summary, scope):
+    """병합 요약 → 사이드바 한 줄. 고유 개수(HyperLogLog)와 중앙값(t-digest)은 근사라 "약"."""
+    parts = [f"선택 {scope} 범위: 보고서 {summary.rows:,}건"]
+    for column, unit in (("발간기관", "곳"), ("조사시군구", "곳")):
+        n = summary.n_distinct(column)
+        if n is not None:
+            parts.append(f"{column.removeprefix('조사')} 약 {n:,}{unit}")
+    for column, label, unit in (("조사면적", "조사면적 중앙값", "㎡"), ("조사_일수", "조사 일수 중앙값", "일")):
+        median, = summary.quantiles(column, [0.5])
+        if median is not None:
+            parts.append(f"{label} 약 {median:,.0f}{unit}")
+    return " · ".join(parts)
 
 
 #######################
@@ -76,28 +351,97 @@ with st.sidebar:
     st.markdown("## 국가유산 발굴보고서 대시보드")
     st.caption("필터를 변경하면 전체 차트가 동기화되도록 설계")
 
-    df = df_reshaped.copy()
-
-    # ---- 파생 컬럼 준비(있을 때만) ----
-    # 제출연도
-    if "제출일" in df.columns:
-        df["제출일"] = pd.to_datetime(df["제출일"], errors="coerce")
-        df["제출연도"] = df["제출일"].dt.year
+    # 공유 링크: 세션의 첫 실행에서만 URL 쿼리 파라미터를 위젯 초기값으로 읽는다(이후는 위젯 상태가 우선)
+    if "url_state" not in st.session_state:
+        st.session_state["url_state"] = from_query_params({k: st.query_params.get_all(k) for k in st.query_params})
+        for column, values in st.session_state["url_state"]["facets"].items():
+            st.session_state[f"facet_{column}"] = values
+    url_state = st.session_state["url_state"]
+
+    # 선택지·범위는 엔진에 질의(제출일/제출연도/제출월은 로드 단계에서 이미 파생됨)
+    # 파티션 저장소면 연도 범위·시도 선택지는 파티션 통계에서(데이터를 읽기 전에 필요)
+    if catalog is not None:
+        year_bounds = catalog["years"]
+        sido_options = catalog["regions"]
+    else:
+        year_bounds = None
+        if "제출연도" in engine.columns and engine.has_values("제출연도"):
+            year_bounds = tuple(int(y) for y in engine.value_range("제출연도"))
+        sido_options = None
+        if "조사시도" in engine.columns and engine.has_values("조사시도"):
+            sido_options = engine.facet_values("조사시도")
+
+    # 이번 리런의 연도 범위·시도 선택(위젯을 그리기 전) → 파티션 가지치기와 패싯 건수에 사용
+    year_default = (clamp_range(url_state.get("year"), year_bounds) or year_bounds) if year_bounds else None
+    pre_year = st.session_state.get("f_year", year_default) if year_bounds else None
+    pre_sido = facet_selection("조사시도", sido_options) if sido_options else None
+
+    # 파티션 가지치기: 고른 연도 범위·시도와 겹치는 파티션만 읽는다(같은 파티션 조합이면 엔진 캐시 공유)
+    if engine is None:
+        with tracer.section("load.partitions", rows_in=sum(p["rows"] for p in catalog["partitions"].values())) as rec:
+            scan = prune_partitions(catalog["partitions"], pre_year, pre_sido)
+            if len(scan) == len(catalog["partitions"]):
+                scan = None  # 전체 = 가지치기 없음(기본 선택과 캐시 공유)
+            engine = load_engine(ENGINE, str(DATA_PATH), DATA_VERSION, scan)
+            rec.rows_out = len(engine.df)
+    columns = engine.columns
+
+    # 시군구 선택지는 사전 계산된 시도→시군구 계층에서. 선택지가 바뀌면(시도 변경) 전체 선택으로 초기화
+    sigungu_options = None
+    pre_sigungu = None
+    if pre_sido is not None and "조사시군구" in columns and engine.has_values("조사시군구"):
+        sigungu_options = engine.facet_values("조사시군구", within={"조사시도": pre_sido})
+        shown = st.session_state.get("facet_options_조사시군구")
+        if shown is None or tuple(sigungu_options) == shown:
+            pre_sigungu = facet_selection("조사시군구", sigungu_options)
+        else:
+            pre_sigungu = sigungu_options
+
+    era_options = engine.facet_values("시대") if "시대" in columns and engine.has_values("시대") else None
+    era_mode_pre = st.session_state.get("f_era_mode", url_state.get("era_mode", "any"))
+    type_options = engine.facet_values("유적성격") if "유적성격" in columns and engine.has_values("유적성격") else None
+    org_options = engine.facet_values("발간기관") if "발간기관" in columns and engine.has_values("발간기관") else None
+
+    area_bounds = None
+    if "조사면적" in columns and engine.has_values("조사면적"):
+        with tracer.section("area_bounds"):
+            q01, q99 = load_range_summary(str(DATA_PATH), DATA_VERSION).quantiles("조사면적", [0.01, 0.99])
+        area_bounds = (int(max(0.0, q01)), int(q99))
+    area_default = (clamp_range(url_state.get("area"), area_bounds) or area_bounds) if area_bounds else None
+
+    # 선택지별 건수(각 패싯은 자기 선택만 뺀 나머지 필터 기준, 시도는 시군구 선택도 뺌)
+    with tracer.section("facet_counts") as rec:
+        kw_extended_pre = st.session_state.get("f_kw_extended", url_state.get("kw_extended", False))
+        facet_counts = engine.facet_counts({
+            "facets": {
+                "조사시도": pre_sido,
+                "조사시군구": pre_sigungu,
+                "시대": facet_selection("시대", era_default(era_mode_pre, era_options)),
+                "유적성격": facet_selection("유적성격", type_options or []),
+                "발간기관": facet_selection("발간기관", []),
+            },
+            "facet_modes": {"시대": era_mode_pre},
+            "year_range": pre_year,
+            "area_range": st.session_state.get("f_area", area_default) if area_bounds else None,
+            "keyword": st.session_state.get("f_keyword", url_state.get("keyword", "")).strip(),
+            "keyword_columns": SEARCH_COLUMNS + (OPTIONAL_SEARCH_COLUMNS if kw_extended_pre else []),
+        })
+        rec.rows_out = sum(len(c) for c in facet_counts.values())
 
     # 위젯 배치용 컨테이너
     st.write("### 필터")
 
     # 1) 연도(단일/범위 자동)
     year_range = None
-    if "제출연도" in df.columns and df["제출연도"].notna().any():
-        y_min = int(df["제출연도"].min())
-        y_max = int(df["제출연도"].max())
+    if year_bounds:
+        y_min, y_max = year_bounds
         year_range = st.slider(
             "연도 범위",
             min_value=y_min,
             max_value=y_max,
-            value=(y_min, y_max),
+            value=year_default,
             step=1,
+            key="f_year",
             help="제출연도 기준으로 데이터 범위를 제한"
         )
 
@@ -105,141 +449,500 @@ with st.sidebar:
     selected_sido = None
     selected_sigungu = None
 
-    if "조사시도" in df.columns and df["조사시도"].notna().any():
-        sido_options = sorted(df["조사시도"].dropna().unique().tolist())
-        selected_sido = st.multiselect(
-            "시도 선택",
-            options=sido_options,
-            default=sido_options,
+    if sido_options:
+        selected_sido = facet_multiselect(
+            "시도 선택", "조사시도", sido_options, pre_sido, facet_counts,
             help="선택한 시도만 분석"
         )
 
-        if "조사시군구" in df.columns and df["조사시군구"].notna().any():
-            _df_sido = df[df["조사시도"].isin(selected_sido)] if selected_sido else df
-            sigungu_options = sorted(_df_sido["조사시군구"].fillna("미상").unique().tolist())
-            selected_sigungu = st.multiselect(
-                "시군구 선택",
-                options=sigungu_options,
-                default=sigungu_options,
-                help="시군구 단위로 세분화"
-            )
+    if sigungu_options is not None:
+        selected_sigungu = facet_multiselect(
+            "시군구 선택", "조사시군구", sigungu_options, pre_sigungu, facet_counts,
+            help="시군구 단위로 세분화"
+        )
+        st.session_state["facet_options_조사시군구"] = tuple(sigungu_options)
+
+    # 고른 연도·시도 범위의 요약: 겹치는 파티션 요약을 병합(행을 읽지 않음, 시군구 이하 필터는 반영하지 않음)
+    if year_bounds or sido_options:
+        with tracer.section("range_summary"):
+            summary_stats, _ = load_summaries(str(DATA_PATH), DATA_VERSION)
+            summary_parts = prune_partitions(summary_stats, year_range, selected_sido)
+            range_summary = load_range_summary(str(DATA_PATH), DATA_VERSION, summary_parts)
+        # 시도 하위 파티션이 없는 저장소면 시도 선택은 파티션을 고르는 데만 쓰여 요약에 다른 시도가 섞인다
+        aligned = not selected_sido or all(
+            set(summary_stats[name].get("regions") or ()) <= set(selected_sido) for name in summary_parts
+        )
+        st.caption(range_caption(range_summary, "연도·시도" if aligned else "연도"))
 
-    # 3) 시대
+    # 3) 시대 (쉼표로 이어진 복수 시대 → 개별 태그로 선택)
     selected_era = None
-    if "시대" in df.columns and df["시대"].notna().any():
-        era_options = sorted(df["시대"].fillna("미상").unique().tolist())
-        selected_era = st.multiselect(
-            "시대",
-            options=era_options,
-            default=era_options
+    era_mode = "any"
+    if era_options:
+        selected_era = facet_multiselect(
+            "시대", "시대", era_options, facet_selection("시대", era_default(era_mode_pre, era_options)), facet_counts,
+            help="비워 두면 시대 조건 없음"
+        )
+        st.session_state["era_options"] = era_options
+        era_mode = st.radio(
+            "시대 조건",
+            options=["any", "all"],
+            format_func={"any": "하나라도 포함", "all": "모두 포함"}.get,
+            index=["any", "all"].index(url_state.get("era_mode", "any")),
+            horizontal=True,
+            key="f_era_mode",
+            on_change=reset_full_era_selection,
+            help="복수 시대 보고서(예: 청동기,삼국)를 선택한 시대 중 하나라도/모두 포함하는지로 판단"
         )
 
     # 4) 유적성격
     selected_type = None
-    if "유적성격" in df.columns and df["유적성격"].notna().any():
-        type_options = sorted(df["유적성격"].fillna("미상").unique().tolist())
-        selected_type = st.multiselect(
-            "유적성격",
-            options=type_options,
-            default=type_options
+    if type_options:
+        selected_type = facet_multiselect(
+            "유적성격", "유적성격", type_options, facet_selection("유적성격", type_options), facet_counts
         )
 
     # 5) 발간기관
     selected_org = None
-    if "발간기관" in df.columns and df["발간기관"].notna().any():
-        org_options = sorted(df["발간기관"].fillna("미상").unique().tolist())
-        selected_org = st.multiselect(
-            "발간기관",
-            options=org_options,
-            default=None,
+    if org_options:
+        selected_org = facet_multiselect(
+            "발간기관", "발간기관", org_options, facet_selection("발간기관", []), facet_counts,
             help="선택 시 해당 기관만 표시(미선택=전체)"
         )
 
     # 6) 조사면적 범위 (상위 99% 캡)
     area_range = None
-    if "조사면적" in df.columns and df["조사면적"].notna().any():
-        q01 = float(max(0, df["조사면적"].quantile(0.01)))
-        q99 = float(df["조사면적"].quantile(0.99))
-        min_area = int(q01)
-        max_area = int(q99)
+    if area_bounds:
+        min_area, max_area = area_bounds
         area_range = st.slider(
             "조사면적(㎡) 범위",
             min_value=min_area,
             max_value=max_area,
-            value=(min_area, max_area),
+            value=area_default,
             step=max(1, (max_area - min_area) // 100),
+            key="f_area",
             help="극단값 영향을 줄이기 위해 1–99 분위로 기본 제한"
         )
 
-    # 7) 키워드 검색(보고서명/유적사업명)
+    # 7) 키워드 검색(보고서명/유적사업명, 선택 시 주소/발간기관까지)
     keyword = st.text_input(
         "키워드 검색",
-        value="",
-        placeholder="보고서명 또는 유적사업명에서 검색"
+        value=url_state.get("keyword", ""),
+        placeholder="보고서명 또는 유적사업명에서 검색",
+        key="f_keyword",
+        help='공백으로 구분한 단어는 모두 포함(AND), "따옴표"는 구절 그대로, 단어* 는 접두 검색'
     )
+    kw_extended = st.checkbox("주소·발간기관도 검색", value=url_state.get("kw_extended", False), key="f_kw_extended")
+
+    # 8) 테마 선택(표시용 상태값) — 조각 리런이라 바꿔도 필터·패널은 다시 계산하지 않음
+    @st.fragment
+    def theme_picker():
+        st.session_state["theme_pref"] = st.radio(
+            "대시보드 테마",
+            options=["Dark", "Light"],
+            index=0,
+            horizontal=True
+        )
 
-    # 8) 테마 선택(표시용 상태값)
-    theme = st.radio(
-        "대시보드 테마",
-        options=["Dark", "Light"],
-        index=0,
-        horizontal=True
-    )
-    st.session_state["theme_pref"] = theme
+    theme_picker()
 
     # ---- 필터 적용 로직(사이드바에서 미리 계산하여 세션에 저장) ----
-    filtered = df.copy()
-
-    if year_range and "제출연도" in filtered.columns:
-        filtered = filtered[(filtered["제출연도"] >= year_range[0]) & (filtered["제출연도"] <= year_range[1])]
-
-    if selected_sido is not None and len(selected_sido) > 0 and "조사시도" in filtered.columns:
-        filtered = filtered[filtered["조사시도"].isin(selected_sido)]
-
-    if selected_sigungu is not None and len(selected_sigungu) > 0 and "조사시군구" in filtered.columns:
-        filtered = filtered[filtered["조사시군구"].fillna("미상").isin(selected_sigungu)]
-
-    if selected_era is not None and len(selected_era) > 0 and "시대" in filtered.columns:
-        filtered = filtered[filtered["시대"].fillna("미상").isin(selected_era)]
-
-    if selected_type is not None and len(selected_type) > 0 and "유적성격" in filtered.columns:
-        filtered = filtered[filtered["유적성격"].fillna("미상").isin(selected_type)]
-
-    if selected_org is not None and len(selected_org) > 0 and "발간기관" in filtered.columns:
-        filtered = filtered[filtered["발간기관"].fillna("미상").isin(selected_org)]
-
-    if area_range and "조사면적" in filtered.columns:
-        filtered = filtered[filtered["조사면적"].between(area_range[0], area_range[1], inclusive="both")]
-
-    if keyword:
-        mask = pd.Series([True] * len(filtered))
-        cols_for_kw = [c for c in ["보고서명", "유적사업명"] if c in filtered.columns]
-        if cols_for_kw:
-            kw = keyword.strip().lower()
-            mask = False
-            for c in cols_for_kw:
-                mask = mask | filtered[c].astype(str).str.lower().str.contains(kw, na=False)
-            filtered = filtered[mask]
-
-    # 세션에 저장 → 본문(메인 패널)에서 사용
-    st.session_state["filtered_df"] = filtered
+    facets = {
+        "조사시도": selected_sido,
+        "조사시군구": selected_sigungu,
+        "시대": selected_era,
+        "유적성격": selected_type,
+        "발간기관": selected_org,
+    }
+    spec = {
+        "facets": facets,
+        "facet_modes": {"시대": era_mode},
+        "year_range": year_range,
+        "area_range": area_range,
+        "keyword": keyword.strip(),
+        "keyword_columns": SEARCH_COLUMNS + (OPTIONAL_SEARCH_COLUMNS if kw_extended else []),
+    }
+    # 정규화된 필터 시그니처: 결과가 같은 상태(순서만 다른 선택, 전체 선택 = 미선택, 공백만 다른 키워드 등)는
+    # 세션이 달라도 같은 키 → 공유 뷰·메모된 집계·내보내기 캐시를 그대로 사용
+    spec = canonical_spec(
+        spec,
+        options={"조사시도": sido_options, "조사시군구": sigungu_options, "시대": era_options, "유적성격": type_options, "발간기관": org_options},
+        year_bounds=year_bounds,
+        area_bounds=area_bounds,
+    )
+    signature = filter_signature(spec)
+    view_key = (ENGINE, DATA_VERSION, scan, signature)
+
+    # 같은 상태를 URL에도 적어 공유 링크가 같은 시그니처(캐시 적중)로 열리게 한다
+    query = to_query_params(spec, kw_extended, year_bounds, area_bounds)
+    if query != {k: st.query_params.get_all(k) for k in st.query_params}:
+        st.query_params.from_dict(query)
+
+    # 뷰 = 필터 결과 행 + 집계 슬라이스(불변) → 세 패널이 복사 없이 공유
+    # 뷰 자체는 공유 캐시에 두고, 세션에는 필터 키·스펙·선택 비트맵만 남긴다(세션당 메모리 = 행 수/8 바이트)
+    state = st.session_state.get("filter_state")
+    if state is None or state["key"] != view_key:
+        state = {"key": view_key, "spec": spec, "selection": None}
+    with tracer.section("filter") as rec:
+        view = session_view(state)
+        rec.rows_out = view.n_rows
+    state = {**state, "selection": view.selection}
+    st.session_state["filter_state"] = state
+
+    # 다운로드(현재 필터 결과) — 버튼을 눌렀을 때만 직렬화, 결과는 필터 키별로 캐시
+    export_format = st.selectbox(
+        "다운로드 형식",
+        options=available_formats(min(view.n_rows, EXPORT_MAX_ROWS)),
+        format_func=lambda f: EXPORT_FORMATS[f]["label"],
+    )
+    export_cache = get_export_cache()
+
+    def export_data(state=state, engine=engine, view_cache=get_view_cache()):
+        # 다운로드 콜백은 리런이 끝난 뒤 스크립트 컨텍스트 밖(작업 스레드)에서 실행되므로 별도 트레이스 한 줄로 기록
+        # 콜백이 뷰를 붙잡지 않도록 리런 시점의 필터 상태(키·스펙·선택 비트맵)·엔진·뷰 캐시만 잡아 두고
+        # 공유 뷰를 다시 찾는다 — 이 스레드에서는 st.session_state를 읽을 수 없다
+        current = view_cache.get_or_build(
+            state["key"], lambda: engine.view(state["key"], state["spec"], state["selection"])
+        )
+        with tracer.section(f"export.{export_format}", rows_in=current.n_rows) as rec:
+            # 행은 이때 엔진에서 읽는다(최대 EXPORT_MAX_ROWS행)
+            data = export_cache.export(current.key, lambda: current.rows(limit=EXPORT_MAX_ROWS), export_format)
+            rec.rows_out = len(data)
+        tracer.flush(kind="export", engine=ENGINE, data_version=DATA_VERSION)
+        return data
 
-    # 다운로드(현재 필터 결과)
     st.download_button(
-        "현재 필터 결과 다운로드 (CSV)",
-        data=filtered.to_csv(index=False).encode("utf-8-sig"),
-        file_name="filtered_excavation_reports.csv",
-        mime="text/csv",
+        f"현재 필터 결과 다운로드 ({EXPORT_FORMATS[export_format]['label']})",
+        data=export_data,
+        file_name=f"filtered_excavation_reports.{EXPORT_FORMATS[export_format]['ext']}",
+        mime=EXPORT_FORMATS[export_format]["mime"],
+        on_click="ignore",
         use_container_width=True
     )
 
     # 요약 뱃지
-    st.success(f"현재 조건에 해당하는 보고서: **{len(filtered):,}건**")
+    if view.n_rows > EXPORT_MAX_ROWS:
+        st.caption(f"다운로드는 앞 {EXPORT_MAX_ROWS:,}건까지만 포함합니다.")
+
+    # 요약 뱃지
+    st.success(f"현재 조건에 해당하는 보고서: **{view.n_rows:,}건**")
+    st.caption(
+        f"필터 뷰 추가 메모리 {view.extra_bytes / 2**20:,.1f} MB "
+        f"(공유 기준 데이터 {load_base_bytes(ENGINE, str(DATA_PATH), DATA_VERSION, scan) / 2**20:,.1f} MB, {engine.name} 엔진) · "
+        f"공유 뷰 캐시 {get_view_cache().stats()['entries']}개 · 세션 선택 상태 {getattr(view.selection, 'nbytes', 0):,} B"
+    )
+
+    # 성능 계측 결과(이번 리런) — 표는 스크립트 끝에서 채움
+    with st.expander("성능", expanded=False):
+        st.checkbox(
+            "구간별 실행 시간 측정",
+            key="perf_trace",
+            # 끌 때는 이 세션의 보유만 반납(다른 세션이 계측 중이면 추적은 유지)
+            on_change=lambda: None if st.session_state["perf_trace"] else release_memory_tracking(memory_hold),
+            help=f"리런마다 구간별 시간·행 수·최대 메모리 증가량을 기록하고 {tracer.log_path}에 JSON으로 추가"
+        )
+        perf_slot = st.empty()
+        # 공유 결과 캐시 적중 현황(프로세스 전체 누적)
+        view_stats, export_stats = get_view_cache().stats(), export_cache.stats()
+        st.caption(
+            f"필터 시그니처 `{signature}` · 뷰 캐시 적중 {view_stats['hits']:,}/{view_stats['hits'] + view_stats['misses']:,} "
+            f"(만료 {view_stats['expired']:,}) · 내보내기 캐시 적중 {export_stats['hits']:,}/{export_stats['hits'] + export_stats['misses']:,}"
+        )
+        if ENGINE == "pandas" and st.checkbox("컬럼별 메모리 사용량", key="memory_report"):
+            mem = load_memory_report(str(DATA_PATH), DATA_VERSION, scan)
+            st.dataframe(mem, hide_index=True, use_container_width=True)
+            st.caption(f"object dtype 대비 {mem['압축비'].iloc[-1]:.1f}배 압축")
 
 
 #######################
 # Plots
+# 패널별 집계 준비·차트 생성 함수는 charts.py (benchmark.py와 공유)
+#
+# 패널 안 위젯(지표 라디오, Top N 슬라이더)이 있는 카드는 st.fragment로 감싼다.
+# 위젯을 바꾸면 해당 카드만 다시 실행되어, 이미 만든 필터 뷰에서 자기 집계·차트만 새로 만든다.
+# (로드·필터·다른 패널·내보내기는 다시 돌지 않음)
+def cached_figure(name, build, data, *params, key=None):
+    """build(data, *params)를 Figure 캐시로 감싼다. 키 = 입력 집계 지문(또는 key) + 파라미터 + 테마."""
+    return build_figure(get_figure_cache(), st.session_state.get("theme_pref"), name, build, data, *params, key=key)
+
+
+def build_figure(figure_cache, theme, name, build, data, *params, key=None):
+    """cached_figure 본체. 세션 상태를 읽지 않으므로 패널 워커 스레드에서도 부를 수 있다."""
+    key = fingerprint(data) if key is None else key
+    return figure_cache.get_or_build(name, key, params + (theme,), lambda: build(data, *params))
+
+
+def _fragment_trace(name):
+    """조각 단독 리런이면 여기서 트레이스 기록(전체 리런 중에는 스크립트 끝에서 한꺼번에)."""
+    if tracer.run_ended:
+        tracer.flush(kind="fragment", fragment=name, engine=ENGINE, data_version=DATA_VERSION)
+
+
+@st.fragment
+def sido_card():
+    """시도 분포(Choropleth or Bar fallback)."""
+    view = session_view()
+    cube = view.cube
+    if view.has_values("조사시도"):
+        sido_agg = view.cached("sido_agg", lambda: charts.prepare_sido_agg(cube))
+        metric = st.radio("색상 기준", options=["건수", "합계면적"], index=0, horizontal=True, key="metric_sido")
+
+        # 경계는 프로세스당 한 번 로드(가공된 자산) — 정적 서빙이면 URL만 넘겨 재그리기 때 색상 값만 전송
+        geojson, geo_version = load_geo("sido")
+        if geojson is not None:
+            with tracer.section("figure.sido_map", rows_in=view.n_rows):
+                fig_map = cached_figure(
+                    "sido_map",
+                    lambda agg, version, m: charts.fig_sido_choropleth(agg, geojson, m),
+                    sido_agg, geo_version, metric
+                )
+            st.plotly_chart(fig_map, use_container_width=True)
+        else:
+            st.info("행정구역 GeoJSON 파일을 찾지 못해 막대그래프로 대체합니다.")
+            with tracer.section("figure.sido_bar", rows_in=view.n_rows):
+                fig_bar = cached_figure("sido_bar", charts.fig_sido_bar, sido_agg, metric)
+            st.plotly_chart(fig_bar, use_container_width=True)
+    else:
+        st.info("지역(조사시도) 정보가 없습니다.")
+    _fragment_trace("sido_card")
+
+
+@st.fragment
+def sigungu_card():
+    """시군구 Top N."""
+    view = session_view()
+    cube = view.cube
+    if "조사시도" in view.columns and view.has_values("조사시군구"):
+        metric2 = st.radio("정렬 기준", options=["건수", "합계면적"], index=0, horizontal=True, key="metric_sigungu")
+        geojson, geo_version = load_geo("sigungu")
+        show_map = geojson is not None and st.toggle("지도로 보기", value=False, key="sigungu_map")
+        if show_map:
+            with tracer.section("figure.sigungu_map", rows_in=view.n_rows):
+                fig_map = cached_figure(
+                    "sigungu_map",
+                    lambda agg, version, m: charts.fig_sigungu_choropleth(agg, geojson, m),
+                    view.cached("sigungu_agg", lambda: charts.prepare_sigungu_agg(cube)), geo_version, metric2
+                )
+            st.plotly_chart(fig_map, use_container_width=True)
+        else:
+            topN = st.slider("표시 개수", min_value=5, max_value=30, value=15, step=1, key="sigungu_topN")
+            with tracer.section("figure.sigungu_rank", rows_in=view.n_rows):
+                top = view.cached(("sigungu_top", metric2, topN), lambda: charts.prepare_sigungu_top(cube, metric2, topN))
+                fig_rank = cached_figure("sigungu_rank", charts.fig_sigungu_rank, top, metric2)
+            st.plotly_chart(fig_rank, use_container_width=True)
+    else:
+        st.info("시군구 정보가 없습니다.")
+    _fragment_trace("sigungu_card")
+
+
+@st.fragment
+def summary_table_card():
+    """요약 테이블. 대용량 모드에서는 서버에서 정렬·페이지를 잘라 보이는 페이지만 전송."""
+    view = session_view()
+    with tracer.section("table", rows_in=view.n_rows) as rec:
+        if view.n_rows <= LARGE_N_ROWS:
+            show_df = view.cached("summary_table", lambda: charts.prepare_summary_table(view, limit=LARGE_N_ROWS))
+            if show_df is not None:
+                st.dataframe(show_df, use_container_width=True, height=350)
+                rec.rows_out = len(show_df)
+            else:
+                st.info("요약 테이블에 표시할 핵심 컬럼이 없습니다.")
+        elif not charts.summary_columns(view):
+            st.info("요약 테이블에 표시할 핵심 컬럼이 없습니다.")
+        else:
+            cols = charts.summary_columns(view)
+            c1, c2, c3, c4 = st.columns((2, 1, 1, 1))
+            sort_by = c1.selectbox("정렬 기준", cols, index=cols.index("제출일") if "제출일" in cols else 0, key="table_sort")
+            ascending = c2.radio("순서", ["오름차순", "내림차순"], key="table_order") == "오름차순"
+            page_size = c3.selectbox("페이지 크기", [50, 100, 500], index=1, key="table_page_size")
+            n_pages = max(1, -(-view.n_rows // page_size))
+            page = c4.number_input(f"페이지 (/{n_pages:,})", min_value=1, max_value=n_pages, value=1, key="table_page") - 1
+
+            # 보이는 페이지만 엔진에서 꺼냄(pandas는 (기준, 방향)별 정렬 순서를 공유 뷰에 메모, SQL은 ORDER BY … LIMIT)
+            page_df = charts.table_page(view, sort_by, ascending, min(page, n_pages - 1), page_size)
+            st.dataframe(page_df, use_container_width=True, height=350)
+            st.caption(f"{view.n_rows:,}건 중 {page * page_size + 1:,}–{page * page_size + len(page_df):,}번째 (대용량 모드: 서버에서 정렬·페이지 나누기)")
+            rec.rows_out = len(page_df)
+    _fragment_trace("summary_table")
+
+
+@st.fragment
+def rank_card(column, key_prefix, empty_message):
+    """랭킹 탭의 Top 시도 / Top 발간기관 (정렬 기준·표시 개수는 카드 안에서만 리런)."""
+    view = session_view()
+    cube = view.cube
+    if view.has_values(column):
+        agg = view.cached(("rank", column), lambda: charts.prepare_rank_agg(cube, column, with_area="조사면적" in view.columns))
+
+        metric = st.radio(
+            "정렬 기준",
+            ["건수"] + (["합계면적"] if "합계면적" in agg.columns else []),
+            horizontal=True, index=0, key=f"{key_prefix}_metric"
+        )
+        topN = st.slider("표시 개수", 5, 20, 10, 1, key=f"{key_prefix}_topN")
+
+        with tracer.section(f"figure.{key_prefix}", rows_in=view.n_rows):
+            fig = cached_figure(key_prefix, charts.fig_rank_bar, agg, column, metric, topN)
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.info(empty_message)
+    _fragment_trace(key_prefix)
+
 
+#######################
+# 패널 작업(프래그먼트가 아닌 패널의 집계 + Figure 생성)
+# 필터 뷰가 정해지면 한꺼번에 제출하고, 아래 레이아웃에서 순서대로 결과를 받아 그린다.
+# DASHBOARD_PANEL_WORKERS > 0이면 워커 스레드에서 동시에 계산(그 밖에는 받는 자리에서 순차 계산).
+# 작업 함수는 st.*를 부르지 않는다 — Figure 캐시·테마는 메인 스레드에서 넘긴다.
+# 프래그먼트 카드(시도·시군구·표·랭킹)는 카드 안 위젯 값이 필요하고 단독 리런도 하므로 메인 스레드에 둔다.
+# 집계는 view.cached로 뷰에 메모 — 같은 시그니처의 다른 세션·리런은 다시 집계하지 않는다.
+def kpi_panel(view, duplicates=None, dedupe=False):
+    if dedupe and duplicates is not None:
+        return view.cached("kpi_dedupe", lambda: _kpi_dedupe(view, duplicates))
+    return view.cached("kpi", lambda: _kpi(view.cube))
+
+
+def _kpi(cube):
+    totals = cube.totals()
+    by_year = None
+    if "제출연도" in cube.dimensions:
+        by_year = cube.rollup(["제출연도"]).dropna(subset=["제출연도"]).set_index("제출연도")["건수"]
+    return totals, by_year
+
+
+def _kpi_dedupe(view, duplicates):
+    """유사 중복 묶음을 1건으로: 묶음마다 필터 결과에서 처음 나온 보고서만 센다(큐브 대신 행 기준 — 필요한 세 컬럼만)."""
+    df = view.rows([c for c in ("연번", "조사면적", "제출연도") if c in view.columns])
+    first = df[duplicates.first_of_cluster(df["연번"].to_numpy())]
+    area = first["조사면적"] if "조사면적" in first.columns else pd.Series(dtype="float64")
+    area_n = int(area.notna().sum())
+    area_sum = float(area.sum())
+    totals = {
+        "건수": len(first),
+        "면적건수": area_n,
+        "합계면적": area_sum if area_n else None,
+        "평균면적": area_sum / area_n if area_n else None,
+    }
+    by_year = None
+    if "제출연도" in first.columns:
+        by_year = first["제출연도"].dropna().astype(int).value_counts()
+    return totals, by_year
+
+
+def duplicate_summary(view, duplicates):
+    return view.cached("near_duplicates", lambda: duplicates.summary(view.rows(["연번"])["연번"].to_numpy()))
+
+
+def quality_panel(view, duplicates=None):
+    return view.cached("quality", lambda: _quality(view, duplicates))
+
+
+def _quality(view, duplicates):
+    notes = []
+    if duplicates is not None:
+        dup = duplicate_summary(view, duplicates)
+        if dup["clusters"]:
+            notes.append(f"유사 중복 묶음 {dup['clusters']:,}개(보고서 {dup['reports']:,}건)")
+    if "조사면적" in view.columns:
+        totals = view.cached("kpi", lambda: _kpi(view.cube))[0]
+        notes.append(f"조사면적 결측 {totals['건수'] - totals['면적건수']:,}건")
+    if "조사기간" in view.columns:
+        notes.append(f"조사기간 결측 {view.count(isna=['조사기간']):,}건")
+        # 값은 있으나 일수로 변환하지 못한 행(data_layer.period_parse_failures와 같은 기준)
+        n_fail = view.count(notna=["조사기간"], isna=["조사_일수"]) if "조사_일수" in view.columns else 0
+        if n_fail:
+            notes.append(f"조사기간 해석 실패 {n_fail:,}건")
+    return notes
+
+
+def era_donut_panel(figures, theme, view):
+    if view.has_values("시대"):
+        era_counts = view.cached("era_counts", lambda: charts.prepare_era_counts(view))
+        return build_figure(figures, theme, "era_donut", charts.fig_era_donut, era_counts)
+    return None
+
+
+def type_donut_panel(figures, theme, view):
+    if view.has_values("유적성격"):
+        type_counts = view.cached("type_counts", lambda: charts.prepare_type_counts(view.cube, top_n=6))
+        return build_figure(figures, theme, "type_donut", charts.fig_type_donut, type_counts)
+    return None
+
+
+def heatmap_panel(figures, theme, view):
+    pivot = view.cached(
+        "year_month_pivot", lambda: charts.prepare_year_month_pivot(view.cube) if charts.has_year_month(view.cube) else None
+    )
+    if pivot is None:
+        return None
+    return build_figure(figures, theme, "heatmap", charts.fig_year_month_heatmap, pivot)
+
+
+def top_area_panel(figures, theme, view):
+    if "보고서명" in view.columns and view.has_values("조사면적"):
+        top_reports = view.cached("top_area_reports", lambda: charts.prepare_top_area_reports(view, n=10))
+        return top_reports, build_figure(figures, theme, "top_area", charts.fig_top_area_reports, top_reports)
+    return None
+
+
+def scatter_panel(figures, theme, view, large):
+    # 조사_일수는 로드 단계에서 조사기간을 벡터화 파싱해 미리 계산됨
+    # 두 컬럼이 한 행에 같이 있는 경우가 없으면(컬럼별로는 값이 있어도) 그릴 점이 없음 → 빈 상태 안내
+    if not ("조사면적" in view.columns and "조사_일수" in view.columns
+            and view.count(notna=["조사면적", "조사_일수"])):
+        return None
+    # 입력이 필터 결과 전체라 지문 대신 필터 키(데이터 버전 포함)로 캐시 — 적중 시 준비 단계도 생략
+    if large:
+        # 점 하나하나 대신 로그 구간 격자의 건수만 전송(음수 면적만 남으면 격자가 없음 → None)
+        def bins_figure(view):
+            binned = charts.prepare_scatter_bins(view)
+            return None if binned is None else charts.fig_area_duration_bins(binned)
+
+        return build_figure(figures, theme, "scatter_bins", bins_figure, view, key=view.key)
+
+    def scatter_figure(view):
+        points, size_hint = charts.prepare_scatter(view)
+        return None if points.empty else charts.fig_area_duration_scatter(points, size_hint)
+
+    return build_figure(figures, theme, "scatter", scatter_figure, view, key=view.key)
+
+
+# 자리표시: 제한 시간 안에 끝나지 않은 패널
+TIMED_OUT = object()
+
+
+def panel(name):
+    """레이아웃 순서대로 패널 결과를 받는다. 순차 모드면 여기서 계산(트레이스 구간 그대로),
+    병렬 모드면 워커 실행 시간을 기록한다. 시간 초과면 자리표시를 그리고 TIMED_OUT."""
+    if not panels.parallel:
+        with tracer.section(name, rows_in=view.n_rows):
+            return panels.result(name)[0]
+    try:
+        value, ms = panels.result(name)
+    except PanelTimeout:
+        tracer.add(name, PANEL_TIMEOUT_S * 1000, rows_in=view.n_rows, error="PanelTimeout")
+        st.info(f"계산이 {PANEL_TIMEOUT_S:g}초 안에 끝나지 않아 이번에는 표시하지 않습니다. 다음 리런에서 다시 시도합니다.")
+        return TIMED_OUT
+    tracer.add(name, ms, rows_in=view.n_rows)
+    return value
+
+
+# 유사 중복 묶음: 품질 알림의 묶음 수, KPI "묶음을 1건으로 세기" 모드(아래 토글, 세션 상태에서 미리 읽음)
+duplicates = None
+if "연번" in columns:
+    with tracer.section("load.near_duplicates"):
+        duplicates = load_near_duplicates(str(DATA_PATH), DATA_VERSION)
+kpi_dedupe = duplicates is not None and st.session_state.get("kpi_dedupe", False)
+
+large_view = view.n_rows > LARGE_N_ROWS
+panel_theme = st.session_state.get("theme_pref")
+panels = PanelBatch(get_panel_executor())
+panels.submit("kpi", kpi_panel, view, duplicates, kpi_dedupe)
+panels.submit("figure.era_donut", era_donut_panel, get_figure_cache(), panel_theme, view)
+panels.submit("figure.type_donut", type_donut_panel, get_figure_cache(), panel_theme, view)
+panels.submit("quality", quality_panel, view, duplicates)
+panels.submit("figure.heatmap", heatmap_panel, get_figure_cache(), panel_theme, view)
+panels.submit("figure.top_area", top_area_panel, get_figure_cache(), panel_theme, view)
+panels.submit("figure.scatter_bins" if large_view else "figure.scatter", scatter_panel, get_figure_cache(), panel_theme, view, large_view)
 
 
 #######################
@@ -248,43 +951,49 @@ col = st.columns((1.5, 4.5, 2), gap='medium')
 
 with col[0]:
     st.markdown("### 📊 요약 KPI")
+    if duplicates is not None:
+        st.toggle(
+            "유사 중복 묶음은 1건으로 세기",
+            key="kpi_dedupe",
+            help="여러 권으로 나뉘었거나 다시 제출된 보고서(보고서명·유적사업명·주소가 거의 같은 묶음)를 한 건으로 셉니다"
+        )
 
-    # 필터된 DF (없으면 원본)
-    df = st.session_state.get("filtered_df", df_reshaped).copy()
-
-    # 제출연도 파생 (사이드바에서 못 만든 경우 대비)
-    if "제출연도" not in df.columns and "제출일" in df.columns:
-        df["제출일"] = pd.to_datetime(df["제출일"], errors="coerce")
-        df["제출연도"] = df["제출일"].dt.year
-
-    # --- KPI 3종 ---
-    k1, k2, k3 = st.columns(3)
-    with k1:
-        st.metric("보고서 수", f"{len(df):,}")
-
-    with k2:
-        if "조사면적" in df.columns and df["조사면적"].notna().any():
-            st.metric("총 조사면적 (㎡)", f"{df['조사면적'].sum():,.0f}")
-        else:
-            st.metric("총 조사면적 (㎡)", "데이터 없음")
+    # 사이드바에서 만든 필터 뷰(복사하지 않음 — 읽기 전용)의 집계는 패널 작업에서
+    kpi = panel("kpi")
+    if kpi is not TIMED_OUT:
+        totals, by_year = kpi
+        if kpi_dedupe:
+            dup = duplicate_summary(view, duplicates)
+            st.caption(f"유사 중복 묶음 {dup['clusters']:,}개를 1건씩으로 세어 {view.n_rows - totals['건수']:,}건 제외")
+
+        # --- KPI 3종 ---
+        k1, k2, k3 = st.columns(3)
+        with k1:
+            st.metric("보고서 수", f"{totals['건수']:,}")
+
+        with k2:
+            if totals["면적건수"] > 0:
+                st.metric("총 조사면적 (㎡)", f"{totals['합계면적']:,.0f}")
+            else:
+                st.metric("총 조사면적 (㎡)", "데이터 없음")
 
-    with k3:
-        if "조사면적" in df.columns and df["조사면적"].notna().any():
-            st.metric("건당 평균면적 (㎡)", f"{df['조사면적'].mean():,.0f}")
-        else:
-            st.metric("건당 평균면적 (㎡)", "데이터 없음")
-
-    # 최근연도 vs 전년 보고서 수 비교(가능할 때만)
-    if "제출연도" in df.columns and df["제출연도"].notna().any():
-        latest_year = int(df["제출연도"].max())
-        prev_year = latest_year - 1
-        cnt_latest = int((df["제출연도"] == latest_year).sum())
-        cnt_prev = int((df["제출연도"] == prev_year).sum())
-        if cnt_prev > 0:
-            delta = round((cnt_latest - cnt_prev) / cnt_prev * 100, 1)
-            st.caption(f"최근연도({latest_year}) 보고서 {cnt_latest:,}건 · 전년({prev_year}) 대비 {delta:+.1f}%")
-        else:
-            st.caption(f"최근연도({latest_year}) 보고서 {cnt_latest:,}건")
+        with k3:
+            if totals["면적건수"] > 0:
+                st.metric("건당 평균면적 (㎡)", f"{totals['평균면적']:,.0f}")
+            else:
+                st.metric("건당 평균면적 (㎡)", "데이터 없음")
+
+        # 최근연도 vs 전년 보고서 수 비교(가능할 때만)
+        if by_year is not None and len(by_year):
+            latest_year = int(by_year.index.max())
+            prev_year = latest_year - 1
+            cnt_latest = int(by_year.get(latest_year, 0))
+            cnt_prev = int(by_year.get(prev_year, 0))
+            if cnt_prev > 0:
+                delta = round((cnt_latest - cnt_prev) / cnt_prev * 100, 1)
+                st.caption(f"최근연도({latest_year}) 보고서 {cnt_latest:,}건 · 전년({prev_year}) 대비 {delta:+.1f}%")
+            else:
+                st.caption(f"최근연도({latest_year}) 보고서 {cnt_latest:,}건")
 
     st.markdown("---")
 
@@ -293,77 +1002,29 @@ with col[0]:
 
     # 시대 분포
     with p1:
-        if "시대" in df.columns and df["시대"].notna().any():
-            era_counts = df["시대"].fillna("미상").value_counts().reset_index()
-            era_counts.columns = ["시대", "건수"]
-            fig_era = px.pie(
-                era_counts,
-                names="시대",
-                values="건수",
-                hole=0.55,
-                title="시대 분포"
-            )
-            fig_era.update_layout(
-                margin=dict(l=0, r=0, t=40, b=0),
-                height=300,
-                showlegend=True
-            )
-            st.plotly_chart(fig_era, use_container_width=True)
-        else:
+        fig_era = panel("figure.era_donut")
+        if fig_era is None:
             st.info("시대 정보가 없습니다.")
+        elif fig_era is not TIMED_OUT:
+            st.plotly_chart(fig_era, use_container_width=True)
 
     # 유적성격 분포 (Top 6 + 기타)
     with p2:
-        if "유적성격" in df.columns and df["유적성격"].notna().any():
-            type_counts = df["유적성격"].fillna("미상").value_counts().reset_index()
-            type_counts.columns = ["유적성격", "건수"]
-            top_n = 6
-            if len(type_counts) > top_n:
-                top = type_counts.iloc[:top_n].copy()
-                other_sum = int(type_counts.iloc[top_n:]["건수"].sum())
-                top.loc[len(top)] = ["기타", other_sum]
-                type_counts = top
-
-            fig_type = px.pie(
-                type_counts,
-                names="유적성격",
-                values="건수",
-                hole=0.55,
-                title="유적성격 분포"
-            )
-            fig_type.update_layout(
-                margin=dict(l=0, r=0, t=40, b=0),
-                height=300,
-                showlegend=True
-            )
-            st.plotly_chart(fig_type, use_container_width=True)
-        else:
+        fig_type = panel("figure.type_donut")
+        if fig_type is None:
             st.info("유적성격 정보가 없습니다.")
+        elif fig_type is not TIMED_OUT:
+            st.plotly_chart(fig_type, use_container_width=True)
 
     # --- 데이터 품질 알림 ---
-    notes = []
-    if "조사면적" in df.columns:
-        notes.append(f"조사면적 결측 {df['조사면적'].isna().sum():,}건")
-    if "조사기간" in df.columns:
-        notes.append(f"조사기간 결측 {df['조사기간'].isna().sum():,}건")
-    if notes:
+    notes = panel("quality")
+    if notes and notes is not TIMED_OUT:
         st.warning("데이터 품질: " + " · ".join(notes))
 
 
 with col[1]:
     st.markdown("### 🗺️ 메인 시각화")
 
-    # 필터된 DF (없으면 원본)
-    df = st.session_state.get("filtered_df", df_reshaped).copy()
-
-    # 날짜 파생
-    if "제출연도" not in df.columns and "제출일" in df.columns:
-        df["제출일"] = pd.to_datetime(df["제출일"], errors="coerce")
-        df["제출연도"] = df["제출일"].dt.year
-    if "제출월" not in df.columns:
-        if "제출일" in df.columns:
-            df["제출월"] = pd.to_datetime(df["제출일"], errors="coerce").dt.month
-
     # -----------------------------
     # (1) 지역 분포
     # -----------------------------
@@ -372,93 +1033,11 @@ with col[1]:
 
     # 1-1) 시도 분포(Choropleth or Bar fallback)
     with tab_sido:
-        if "조사시도" in df.columns and df["조사시도"].notna().any():
-            sido_agg = (
-                df.groupby("조사시도", dropna=True)
-                  .agg(건수=("조사시도", "size"),
-                       합계면적=("조사면적", "sum"))
-                  .reset_index()
-            )
-            metric = st.radio("색상 기준", options=["건수", "합계면적"], index=0, horizontal=True, key="metric_sido")
-
-            geojson = None
-            try:
-                import os, json
-                for candidate in ["korea_sido.geojson", "data/korea_sido.geojson", "/mnt/data/korea_sido.geojson"]:
-                    if os.path.exists(candidate):
-                        with open(candidate, "r", encoding="utf-8") as f:
-                            geojson = json.load(f)
-                        break
-            except Exception:
-                geojson = None
-
-            if geojson is not None:
-                # GeoJSON의 시도 이름 키가 환경마다 다를 수 있어 후보 키를 순차 시도
-                fid_keys = ["properties.SIG_KOR_NM", "properties.CTP_KOR_NM", "properties.name"]
-                used_key = None
-                for k in fid_keys:
-                    # 간단 검증: 첫 피처에서 키가 존재하면 사용
-                    try:
-                        _ = geojson["features"][0]
-                        # 중첩 키 처리
-                        d = geojson["features"][0]
-                        for kk in k.split("."):
-                            d = d[kk]
-                        used_key = k
-                        break
-                    except Exception:
-                        continue
-
-                fig_map = px.choropleth(
-                    sido_agg,
-                    geojson=geojson,
-                    featureidkey=used_key if used_key else "properties.name",
-                    locations="조사시도",
-                    color=metric,
-                    hover_name="조사시도",
-                    hover_data={"건수": True, "합계면적": ":,.0f"},
-                )
-                fig_map.update_geos(fitbounds="locations", visible=False)
-                fig_map.update_layout(margin=dict(l=0, r=0, t=10, b=0), height=420)
-                st.plotly_chart(fig_map, use_container_width=True)
-            else:
-                st.info("행정구역 GeoJSON 파일을 찾지 못해 막대그래프로 대체합니다.")
-                order = sido_agg.sort_values(metric, ascending=False)
-                fig_bar = px.bar(
-                    order.head(17),
-                    x="조사시도", y=metric,
-                    hover_data=["건수", "합계면적"],
-                    title=None
-                )
-                fig_bar.update_layout(margin=dict(l=0, r=0, t=10, b=0), height=420, xaxis_tickangle=-30)
-                st.plotly_chart(fig_bar, use_container_width=True)
-        else:
-            st.info("지역(조사시도) 정보가 없습니다.")
+        sido_card()
 
     # 1-2) 시군구 Top 15
     with tab_sigungu:
-        if all(c in df.columns for c in ["조사시도", "조사시군구"]) and df["조사시군구"].notna().any():
-            by_sigungu = (
-                df.assign(조사시군구=df["조사시군구"].fillna("미상"))
-                  .groupby(["조사시도", "조사시군구"], dropna=False)
-                  .agg(건수=("조사시군구", "size"),
-                       합계면적=("조사면적", "sum"))
-                  .reset_index()
-            )
-            metric2 = st.radio("정렬 기준", options=["건수", "합계면적"], index=0, horizontal=True, key="metric_sigungu")
-            topN = st.slider("표시 개수", min_value=5, max_value=30, value=15, step=1, key="sigungu_topN")
-            top = by_sigungu.sort_values(metric2, ascending=False).head(topN).copy()
-            top["라벨"] = top["조사시도"] + " " + top["조사시군구"]
-            fig_rank = px.bar(
-                top.sort_values(metric2, ascending=True),
-                x=metric2, y="라벨", orientation="h",
-                hover_data=["건수", "합계면적"],
-                title=None
-            )
-            fig_rank.update_layout(margin=dict(l=0, r=0, t=10, b=0), height=420)
-            st.plotly_chart(fig_rank, use_container_width=True)
-        else:
-            st.info("시군구 정보가 없습니다.")
+        sigungu_card()
 
     st.markdown("---")
 
@@ -466,32 +1045,11 @@ with col[1]:
     # (2) 연-월 타임 히트맵
     # -----------------------------
     st.markdown("#### (2) 연-월 타임 히트맵")
-    if "제출연도" in df.columns and "제출월" in df.columns and df[["제출연도", "제출월"]].notna().all(axis=None):
-        pivot = (
-            df.pivot_table(index="제출연도", columns="제출월",
-                           values=("보고서명" if "보고서명" in df.columns else df.columns[0]),
-                           aggfunc="count", fill_value=0)
-              .sort_index()
-        )
-
-        # 1~12월 컬럼 보장
-        for m in range(1, 13):
-            if m not in pivot.columns:
-                pivot[m] = 0
-        pivot = pivot[sorted(pivot.columns)]
-
-        fig_heat = px.imshow(
-            pivot.values,
-            labels=dict(x="월", y="연도", color="건수"),
-            x=[f"{m}월" for m in pivot.columns],
-            y=[str(y) for y in pivot.index],
-            text_auto=True,
-            aspect="auto"
-        )
-        fig_heat.update_layout(margin=dict(l=0, r=0, t=10, b=10), height=400)
-        st.plotly_chart(fig_heat, use_container_width=True)
-    else:
+    fig_heat = panel("figure.heatmap")
+    if fig_heat is None:
         st.info("연도/월 정보가 부족하여 히트맵을 생성할 수 없습니다.")
+    elif fig_heat is not TIMED_OUT:
+        st.plotly_chart(fig_heat, use_container_width=True)
 
     st.markdown("---")
 
@@ -499,30 +1057,13 @@ with col[1]:
     # (3) 요약 테이블
     # -----------------------------
     st.markdown("#### (3) 요약 테이블")
-    base_cols = [c for c in ["보고서명", "제출일", "제출연도", "조사시도", "조사시군구", "조사면적", "시대", "유적성격", "발간기관"] if c in df.columns]
-    if base_cols:
-        if "제출일" in df.columns:
-            show_df = df[base_cols].sort_values("제출일")
-        else:
-            show_df = df[base_cols]
-        st.dataframe(show_df, use_container_width=True, height=350)
-    else:
-        st.info("요약 테이블에 표시할 핵심 컬럼이 없습니다.")
+    summary_table_card()
 
 
 
 with col[2]:
     st.markdown("### 🏆 랭킹 & 인사이트")
 
-    # 필터된 DF (없으면 원본)
-    df = st.session_state.get("filtered_df", df_reshaped).copy()
-
-    # 날짜 파생
-    if "제출일" in df.columns:
-        df["제출일"] = pd.to_datetime(df["제출일"], errors="coerce")
-        if "제출연도" not in df.columns:
-            df["제출연도"] = df["제출일"].dt.year
-
     # -----------------------------
     # 탭: 랭킹 / 인사이트 / About
     # -----------------------------
@@ -534,117 +1075,36 @@ with col[2]:
     with tab_rank:
         sub1, sub2, sub3 = st.tabs(["Top 시도", "Top 발간기관", "면적 상위 보고서"])
 
-        # Top 시도
+        # Top 시도 (지도 탭과 같은 큐브 롤업을 재사용)
         with sub1:
-            if "조사시도" in df.columns and df["조사시도"].notna().any():
-                agg = df.groupby("조사시도", dropna=True).agg(건수=("조사시도", "size"))
-                if "조사면적" in df.columns:
-                    agg["합계면적"] = df.groupby("조사시도")["조사면적"].sum()
-                agg = agg.reset_index()
-
-                metric = st.radio(
-                    "정렬 기준",
-                    ["건수"] + (["합계면적"] if "합계면적" in agg.columns else []),
-                    horizontal=True, index=0, key="rank_sido_metric"
-                )
-                topN = st.slider("표시 개수", 5, 20, 10, 1, key="rank_sido_topN")
-
-                top = agg.sort_values(metric, ascending=False).head(topN)
-                fig = px.bar(
-                    top.sort_values(metric, ascending=True),
-                    x=metric, y="조사시도", orientation="h",
-                    hover_data=agg.columns.tolist(), title=None
-                )
-                fig.update_layout(margin=dict(l=0, r=0, t=10, b=0), height=350)
-                st.plotly_chart(fig, use_container_width=True)
-            else:
-                st.info("시도 정보가 없습니다.")
+            rank_card("조사시도", "rank_sido", "시도 정보가 없습니다.")
 
         # Top 발간기관
         with sub2:
-            if "발간기관" in df.columns and df["발간기관"].notna().any():
-                agg = df.groupby("발간기관", dropna=True).agg(건수=("발간기관", "size"))
-                if "조사면적" in df.columns:
-                    agg["합계면적"] = df.groupby("발간기관")["조사면적"].sum()
-                agg = agg.reset_index()
-
-                metric2 = st.radio(
-                    "정렬 기준",
-                    ["건수"] + (["합계면적"] if "합계면적" in agg.columns else []),
-                    horizontal=True, index=0, key="rank_org_metric"
-                )
-                topN2 = st.slider("표시 개수", 5, 20, 10, 1, key="rank_org_topN")
-
-                top2 = agg.sort_values(metric2, ascending=False).head(topN2)
-                fig2 = px.bar(
-                    top2.sort_values(metric2, ascending=True),
-                    x=metric2, y="발간기관", orientation="h",
-                    hover_data=agg.columns.tolist(), title=None
-                )
-                fig2.update_layout(margin=dict(l=0, r=0, t=10, b=0), height=350)
-                st.plotly_chart(fig2, use_container_width=True)
-            else:
-                st.info("발간기관 정보가 없습니다.")
+            rank_card("발간기관", "rank_org", "발간기관 정보가 없습니다.")
 
         # 면적 상위 보고서
         with sub3:
-            if "조사면적" in df.columns and "보고서명" in df.columns and df["조사면적"].notna().any():
-                cols = ["보고서명", "조사면적", "조사시도", "조사시군구"]
-                if "제출연도" in df.columns:
-                    cols.append("제출연도")
-                top_reports = df.sort_values("조사면적", ascending=False).head(10)[cols]
-
-                fig3 = px.bar(
-                    top_reports.sort_values("조사면적"),
-                    x="조사면적", y="보고서명", orientation="h",
-                    hover_data=[c for c in top_reports.columns if c != "조사면적"],
-                    title=None
-                )
-                fig3.update_layout(margin=dict(l=0, r=0, t=10, b=0), height=350)
+            top_area = panel("figure.top_area")
+            if top_area is None:
+                st.info("면적 또는 보고서명 정보가 부족합니다.")
+            elif top_area is not TIMED_OUT:
+                top_reports, fig3 = top_area
                 st.plotly_chart(fig3, use_container_width=True)
                 st.dataframe(top_reports, use_container_width=True, height=250)
-            else:
-                st.info("면적 또는 보고서명 정보가 부족합니다.")
 
     # =============================
     # (B) 인사이트
     # =============================
     with tab_insight:
-        # 조사기간 → 조사_일수 계산(없으면 시도)
-        if "조사_일수" not in df.columns and "조사기간" in df.columns:
-            import re
-            def _days(text):
-                if pd.isna(text):
-                    return None
-                parts = re.split(r"[~\-–—to]+", str(text))
-                if len(parts) < 2:
-                    return None
-                start = pd.to_datetime(parts[0].strip(), errors="coerce")
-                end = pd.to_datetime(parts[1].strip(), errors="coerce")
-                if pd.notna(start) and pd.notna(end) and end >= start:
-                    return int((end - start).days) + 1
-                return None
-            df["조사_일수"] = df["조사기간"].map(_days)
-
-        if "조사면적" in df.columns and "조사_일수" in df.columns and df[["조사면적", "조사_일수"]].notna().any().any():
-            tmp = df[df["조사면적"].notna() & df["조사_일수"].notna()].copy()
-            tmp = tmp[tmp["조사면적"] >= 0]
-
-            size_hint = tmp["조사면적"].rank(pct=True)
-            hover_cols = [c for c in ["보고서명", "조사시도", "조사시군구", "제출연도"] if c in tmp.columns]
-
-            fig_scatter = px.scatter(
-                tmp, x="조사_일수", y="조사면적",
-                size=size_hint, size_max=18,
-                hover_data=hover_cols,
-                labels={"조사_일수": "조사 일수", "조사면적": "조사면적(㎡)"},
-                title="조사면적 vs 조사 기간(일)"
-            )
-            fig_scatter.update_layout(margin=dict(l=0, r=0, t=30, b=0), height=360)
+        fig_scatter = panel("figure.scatter_bins" if large_view else "figure.scatter")
+        if fig_scatter is None:
+            st.info("조사기간을 일수로 변환할 수 없어 산점도를 표시하지 않습니다.")
+        elif fig_scatter is not TIMED_OUT:
             st.plotly_chart(fig_scatter, use_container_width=True)
+            if large_view:
+                st.caption(f"{view.n_rows:,}건 — 대용량 모드라 로그 구간별 건수(밀도)로 표시")
             st.caption("오른쪽 위로 갈수록 대형·장기 프로젝트일 가능성이 큼")
-        else:
-            st.info("조사기간을 일수로 변환할 수 없어 산점도를 표시하지 않습니다.")
 
     # =============================
     # (C) About
@@ -656,4 +1116,23 @@ with col[2]:
                 "- 주요 지표 정의: 건수=보고서 수, 합계면적=조사면적 합, 평균면적=건당 평균\n"
                 "- 전처리: 조사면적 결측·극단값은 시각화별로 제외될 수 있음\n"
                 "- 팁: 사이드바 필터 변경 시 모든 차트가 동기화됩니다."
-            )
\ No newline at end of file
+            )
+
+
+#######################
+# 성능 계측 결과 표시 + JSON 트레이스 기록
+if tracer.enabled:
+    trace = tracer.end_run(
+        kind="rerun", engine=ENGINE, data_version=DATA_VERSION, view_rows=view.n_rows,
+        signature=signature, view_cache=get_view_cache().stats(),
+    )
+    if trace:
+        perf_df = pd.DataFrame(trace["sections"])
+        perf_df["peak_mem_delta"] = (perf_df["peak_mem_delta"] / 2**20).round(2)
+        with perf_slot.container():
+            fig_stats = get_figure_cache().stats()
+            st.caption(
+                f"이번 리런 {trace['total_ms']:,.0f} ms · 구간 {len(perf_df)}개 (메모리 단위 MB) · "
+                f"Figure 캐시 {fig_stats['entries']}개, 적중 {fig_stats['hits']:,}/{fig_stats['hits'] + fig_stats['misses']:,}"
+            )
+            st.dataframe(perf_df, use_container_width=True, hide_index=True)
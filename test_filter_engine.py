@@ -0,0 +1,88 @@
+#######################
+# filter_engine.FilterIndex 비트맵 결과 = pandas 마스크 (번들 CSV 기준)
+#   python -m pytest -q test_filter_engine.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_layer import prepare_frame, read_source_csv
+from filter_engine import TAG_SEPARATOR, UNKNOWN_LABEL, FilterIndex
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return prepare_frame(read_source_csv())
+
+
+@pytest.fixture(scope="module")
+def index(frame):
+    return FilterIndex(frame)
+
+
+def labels(frame, column):
+    return frame[column].astype("object").where(frame[column].notna(), UNKNOWN_LABEL)
+
+
+def tag_sets(frame, column):
+    return labels(frame, column).map(lambda v: {t.strip() for t in v.split(TAG_SEPARATOR)} - {""})
+
+
+def pandas_mask(frame, facets=None, year_range=None, area_range=None, facet_modes=None):
+    mask = pd.Series(True, index=frame.index)
+    for column, values in (facets or {}).items():
+        if column == "시대":
+            tags = tag_sets(frame, column)
+            wanted = set(values)
+            if (facet_modes or {}).get(column) == "all":
+                mask &= tags.map(wanted.issubset)
+            else:
+                mask &= tags.map(lambda t: not wanted.isdisjoint(t))
+        else:
+            mask &= labels(frame, column).isin(values)
+    if year_range:
+        mask &= frame["제출연도"].between(*year_range).fillna(False)
+    if area_range:
+        mask &= frame["조사면적"].between(*area_range).fillna(False)
+    return mask.to_numpy(dtype=bool)
+
+
+SPECS = [
+    {"facets": {"조사시도": ["경북", "경남", UNKNOWN_LABEL]}},
+    {"facets": {"조사시도": ["경기"], "유적성격": ["고분", UNKNOWN_LABEL]}, "year_range": (2015, 2020)},
+    {"facets": {"시대": ["삼국", "조선"]}},
+    {"facets": {"시대": ["삼국", "조선"]}, "facet_modes": {"시대": "all"}},
+    {"area_range": (1_000.0, 50_000.0), "year_range": (2010, 2024)},
+]
+
+
+@pytest.mark.parametrize("spec", SPECS)
+def test_mask_matches_pandas(frame, index, spec):
+    expected = pandas_mask(frame, **spec)
+    assert np.array_equal(index.to_bool(index.mask(**spec)), expected)
+    assert index.count(index.mask(**spec)) == expected.sum()
+
+
+def test_complement_selection_matches_pandas(frame, index):
+    # 선택하지 않은 값이 더 적으면 여집합으로 계산하는 경로
+    regions = index.facet_values("조사시도")
+    selected = [r for r in regions if r != "경북"]
+    expected = pandas_mask(frame, facets={"조사시도": selected})
+    assert np.array_equal(index.to_bool(index.mask(facets={"조사시도": selected})), expected)
+
+
+def test_facet_counts_match_pandas(frame, index):
+    spec = {"facets": {"조사시도": ["경북", "경남"], "유적성격": ["고분", "성곽"]}, "year_range": (2012, 2022)}
+    counts = index.facet_counts(**spec)
+    # 각 패싯은 자기(와 하위 패싯) 선택만 뺀 나머지 조건으로 센다
+    others = pandas_mask(frame, facets={"유적성격": spec["facets"]["유적성격"]}, year_range=spec["year_range"])
+    expected = labels(frame, "조사시도")[others].value_counts()
+    assert {v: n for v, n in counts["조사시도"].items() if n} == expected.to_dict()
+    scope = pandas_mask(frame, **spec)
+    expected = tag_sets(frame, "시대")[scope].explode().value_counts()
+    assert {v: n for v, n in counts["시대"].items() if n} == expected.to_dict()
+
+
+def test_child_values_follow_hierarchy(frame, index):
+    children = set(index.child_values("조사시군구", ["경북"]))
+    expected = set(labels(frame, "조사시군구")[labels(frame, "조사시도") == "경북"])
+    assert children == expected
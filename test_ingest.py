@@ -0,0 +1,142 @@
+#######################
+# ingest.py 증분 적재: upsert 결과 · 바뀐 파티션만 다시 쓰기 · 파생물(인덱스·큐브·SQLite DB·산출물) 증분 갱신 = 전체 재구성
+#   python -m pytest -q test_ingest.py
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_layer import (
+    KEY_COLUMN, SUMMARY_FILE, load_store, partition_names, prepare_frame, read_source_csv, store_changes,
+    store_manifest,
+)
+from filter_engine import FilterIndex
+from ingest import ingest_batch, init_store
+from precompute import build_artifacts, open_artifacts, update_artifacts
+from report_cube import ReportCube
+from search_index import SearchIndex
+from sql_backend import SqlEngine, build_database, sync_database
+
+
+@pytest.fixture(scope="module")
+def source():
+    # 최근 몇 해만(파티션 수를 줄여 빠르게) — 연도 × 시도 파티션 구조는 그대로
+    frame = prepare_frame(read_source_csv())
+    return frame[frame["제출연도"] >= frame["제출연도"].max() - 3].reset_index(drop=True)
+
+
+def make_batch(source):
+    """재제출(일부는 시도가 바뀌어 다른 파티션으로 이동) + 최근 연도 신규 연번."""
+    resubmitted = source.sample(30, random_state=7).copy()
+    resubmitted["조사시도"] = resubmitted["조사시도"].astype("object")
+    resubmitted.loc[resubmitted.index[:10], "조사시도"] = "서울"
+    latest = source[source["제출연도"] == source["제출연도"].max()].head(20).copy()
+    latest[KEY_COLUMN] = latest[KEY_COLUMN] + 1_000_000
+    return pd.concat([resubmitted, latest], ignore_index=True)
+
+
+def store_order(frame, subpartition=None):
+    names = partition_names(frame, subpartition)
+    return frame.assign(_name=names.to_numpy()).sort_values(["_name", KEY_COLUMN], kind="stable")
+
+
+@pytest.fixture(scope="module")
+def initial_store(tmp_path_factory, source):
+    directory = tmp_path_factory.mktemp("initial") / "store"
+    init_store(source, directory, by_sido=True)
+    return directory
+
+
+@pytest.fixture()
+def store(tmp_path, initial_store):
+    # 테스트마다 초기화 직후 저장소 사본(초기화는 모듈당 한 번)
+    return Path(shutil.copytree(initial_store, tmp_path / "store"))
+
+
+def test_batch_upserts_by_key(store, source):
+    batch = make_batch(source)
+    result = ingest_batch(batch, store)
+    assert result["added"] == 20 and result["replaced"] == 30
+
+    expected = pd.concat([source, batch], ignore_index=True).drop_duplicates(KEY_COLUMN, keep="last")
+    expected = store_order(expected, "조사시도")
+    actual = load_store(store)
+    assert actual[KEY_COLUMN].tolist() == expected[KEY_COLUMN].tolist()
+    assert actual["조사시도"].astype("object").tolist() == expected["조사시도"].astype("object").tolist()
+
+
+def test_only_affected_partitions_are_rewritten(store, source):
+    before = store_manifest(store)
+    stamps = {name: (store / name / "part.parquet").stat().st_mtime_ns for name in before["partitions"]}
+    summaries = {name: (store / name / SUMMARY_FILE).stat().st_mtime_ns for name in before["partitions"]}
+    result = ingest_batch(make_batch(source), store)
+
+    after = store_manifest(store)
+    affected = set(result["partitions"])
+    for name in set(before["partitions"]) - affected:
+        assert (store / name / "part.parquet").stat().st_mtime_ns == stamps[name]
+        assert (store / name / SUMMARY_FILE).stat().st_mtime_ns == summaries[name]
+        assert after["partitions"][name] == before["partitions"][name]
+    assert after["changes"][-1] == {"version": before["version"] + 1, "partitions": result["partitions"]}
+    assert store_changes(after, before["store_id"], before["version"]) == affected
+    assert store_changes(after, before["store_id"], after["version"]) == set()
+    assert store_changes(after, "다른 저장소", before["version"]) is None
+
+
+def test_index_updates_match_full_builds(store, source):
+    previous = load_store(store)
+    filters, cube, search = FilterIndex(previous), ReportCube(previous), SearchIndex(previous)
+    result = ingest_batch(make_batch(source), store)
+    frame = load_store(store)
+    start = int((partition_names(previous, "조사시도") < min(result["partitions"])).sum())
+
+    updated, full = filters.update(frame, start), FilterIndex(frame)
+    for column in full.bitmaps:
+        assert list(updated.bitmaps[column]) == list(full.bitmaps[column])
+        assert np.array_equal(updated._matrices[column], full._matrices[column])
+    assert updated.hierarchy == full.hierarchy
+    assert np.array_equal(updated._area_order, full._area_order)
+
+    updated, full = cube.update(frame, start), ReportCube(frame)
+    assert np.array_equal(updated.pair_cell, full.pair_cell)
+    pd.testing.assert_frame_equal(updated.cells, full.cells, check_dtype=False)
+
+    updated, full = search.update(frame, start), SearchIndex(frame)
+    for query in ("발굴", "유적 발굴조사", "경주*", "시굴조사"):
+        assert np.array_equal(updated.search(query), full.search(query))
+
+
+def test_database_upsert_matches_rebuild(tmp_path, store, source):
+    db_path = sync_database(cache_dir=tmp_path / "cache", store_dir=store)
+    ingest_batch(make_batch(source), store)
+    assert sync_database(cache_dir=tmp_path / "cache", store_dir=store) == db_path  # 같은 파일에 upsert
+    updated = SqlEngine(db_path)
+    full = SqlEngine(build_database(db_path=tmp_path / "full.sqlite", store_dir=store))
+
+    for spec in ({}, {"facets": {"조사시도": ["서울", "경북"]}}, {"keyword": "유적", "year_range": (2015, 2024)}):
+        a, b = updated.view(("test",), spec), full.view(("test",), spec)
+        assert a.n_rows == b.n_rows
+        pd.testing.assert_frame_equal(a.rows(sort_by="조사면적", limit=200), b.rows(sort_by="조사면적", limit=200))
+        pd.testing.assert_frame_equal(a.rows(limit=200, offset=100), b.rows(limit=200, offset=100))
+        assert updated.facet_counts(spec) == full.facet_counts(spec)
+    assert updated.summaries()[0] == full.summaries()[0]
+
+
+def test_artifact_update_matches_full_build(tmp_path, store, source):
+    build_artifacts(store_dir=store, root=tmp_path / "updated")
+    ingest_batch(make_batch(source), store)
+    update_artifacts(store_dir=store, root=tmp_path / "updated")
+    build_artifacts(store_dir=store, root=tmp_path / "full")
+    updated = open_artifacts(store_dir=store, root=tmp_path / "updated")
+    full = open_artifacts(store_dir=store, root=tmp_path / "full")
+
+    pd.testing.assert_frame_equal(updated.frame(), full.frame())
+    assert np.array_equal(updated.near_duplicates().cluster, full.near_duplicates().cluster)
+    assert updated.summaries()[0] == full.summaries()[0]
+    assert {k: s.to_dict() for k, s in updated.summaries()[1].items()} == {
+        k: s.to_dict() for k, s in full.summaries()[1].items()
+    }
+    for query in ("발굴", "경주*"):
+        assert np.array_equal(updated.search_index().search(query), full.search_index().search(query))
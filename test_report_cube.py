@@ -0,0 +1,83 @@
+#######################
+# report_cube.ReportCube 슬라이스 롤업 = 필터된 프레임의 pandas groupby (번들 CSV 기준)
+#   python -m pytest -q test_report_cube.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_layer import UNKNOWN_LABEL, prepare_frame, read_source_csv
+from filter_engine import split_tags
+from report_cube import ReportCube
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return prepare_frame(read_source_csv())
+
+
+@pytest.fixture(scope="module")
+def cube(frame):
+    return ReportCube(frame)
+
+
+def masks(frame):
+    return {
+        "전체": None,
+        "경북·경남": frame["조사시도"].isin(["경북", "경남"]).to_numpy(),
+        "2015–2020 면적 있음": (frame["제출연도"].between(2015, 2020).fillna(False) & frame["조사면적"].notna()).to_numpy(),
+        "빈 결과": np.zeros(len(frame), dtype=bool),
+    }
+
+
+def pandas_rollup(frame, dims):
+    """차원별 건수·합계면적·면적건수. 시대는 쉼표 태그로 펼쳐(행 하나가 태그마다) 센다."""
+    rows = frame.reset_index(drop=True)
+    if "시대" in dims:
+        pairs = split_tags(rows["시대"])
+        rows = rows.iloc[pairs["row"]].reset_index(drop=True).assign(시대=pairs["tag"].to_numpy())
+    keys = {}
+    for d in dims:
+        column = rows[d]
+        if not pd.api.types.is_numeric_dtype(column):
+            column = column.astype("object").where(column.notna(), UNKNOWN_LABEL)
+        keys[d] = column
+    agg = (
+        pd.DataFrame({**keys, "면적": rows["조사면적"]})
+          .groupby(list(dims), dropna=False)["면적"]
+          .agg(건수="size", 합계면적="sum", 면적건수="count")
+          .reset_index()
+    )
+    return agg.sort_values(list(dims)).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("name", ["전체", "경북·경남", "2015–2020 면적 있음", "빈 결과"])
+@pytest.mark.parametrize("dims", [["조사시도"], ["제출연도", "조사시군구"], ["시대"], ["유적성격", "시대"]])
+def test_rollup_matches_groupby(frame, cube, name, dims):
+    mask = masks(frame)[name]
+    selected = frame if mask is None else frame[mask]
+    actual = cube.slice(mask).rollup(dims).sort_values(dims).reset_index(drop=True)
+    pd.testing.assert_frame_equal(
+        actual[dims + ["건수", "합계면적", "면적건수"]], pandas_rollup(selected, dims), check_dtype=False, rtol=1e-9
+    )
+
+
+@pytest.mark.parametrize("name", ["전체", "경북·경남", "2015–2020 면적 있음", "빈 결과"])
+def test_totals_count_each_report_once(frame, cube, name):
+    mask = masks(frame)[name]
+    selected = frame if mask is None else frame[mask]
+    totals = cube.slice(mask).totals()
+    area = selected["조사면적"].dropna()
+    assert totals["건수"] == len(selected)  # 시대 태그가 여럿이어도 한 번
+    assert totals["면적건수"] == len(area)
+    if len(area):
+        assert totals["합계면적"] == pytest.approx(area.sum(), rel=1e-9)
+        assert totals["평균면적"] == pytest.approx(area.mean(), rel=1e-9)
+    else:
+        assert totals["합계면적"] is None and totals["평균면적"] is None
+
+
+def test_pivot_matches_crosstab(frame, cube):
+    mask = masks(frame)["경북·경남"]
+    actual = cube.slice(mask).pivot("제출연도", "조사시도")
+    expected = pd.crosstab(frame.loc[mask, "제출연도"], frame.loc[mask, "조사시도"].astype("object"))
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False, check_names=False)
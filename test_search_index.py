@@ -0,0 +1,58 @@
+#######################
+# search_index.SearchIndex 검색 결과 = 정규화 원문에 대한 pandas str.contains (번들 CSV 기준)
+#   python -m pytest -q test_search_index.py
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_layer import prepare_frame, read_source_csv
+from search_index import SEARCH_COLUMNS, SearchIndex, normalize_text, parse_query
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return prepare_frame(read_source_csv())
+
+
+@pytest.fixture(scope="module")
+def index(frame):
+    return SearchIndex(frame)
+
+
+def pandas_search(frame, query, columns=SEARCH_COLUMNS):
+    """단어마다 지정 컬럼 중 하나라도 포함(접두 검색은 어절 시작), 단어끼리는 AND."""
+    texts = {c: frame[c].astype("object").map(lambda v: normalize_text(v) if isinstance(v, str) else "")
+             for c in columns}
+    hit = pd.Series(True, index=frame.index)
+    for term, prefix in parse_query(query):
+        pattern = r"(?<!\w)" + re.escape(term) if prefix else re.escape(term)
+        hit &= np.logical_or.reduce([texts[c].str.contains(pattern, regex=True).to_numpy() for c in columns])
+    return np.flatnonzero(hit.to_numpy())
+
+
+QUERIES = [
+    "유",             # 1글자: unigram 포스팅 그대로
+    "발굴",           # 2글자
+    "시굴조사",        # 4글자 이상: trigram 교집합 + 원문 대조
+    "유적 발굴조사",    # 단어 AND
+    '"소규모 발굴조사"',  # 공백 포함 구절
+    "경주*",          # 어절 시작 일치
+    "ⅱ",             # NFKC(로마 숫자) · 소문자
+    "존재하지않는단어",
+]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_search_matches_str_contains(frame, index, query):
+    assert np.array_equal(index.search(query), pandas_search(frame, query))
+
+
+def test_search_optional_columns(frame, index):
+    columns = SEARCH_COLUMNS + ["발간기관"]
+    assert np.array_equal(index.search("연구원 발굴", columns), pandas_search(frame, "연구원 발굴", columns))
+
+
+def test_empty_query_means_no_filter(index):
+    assert index.search("   ") is None
@@ -0,0 +1,112 @@
+#######################
+# sketches.py 오차 한계 검증 (고정 시드, 정확값과 비교)
+#   python -m pytest -q test_sketches.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from sketches import EXACT_LIMIT, SKETCH_ERROR_BOUNDS, HyperLogLog, Summary, TDigest, merge_summaries
+
+QS = sorted(SKETCH_ERROR_BOUNDS["rank"])
+
+
+def rank_error(values, estimate, q):
+    """추정값의 실제 순위(이하 비율)와 q의 차. 연속 분포(동률 없음) 전제."""
+    return abs(np.searchsorted(values, estimate, "right") / len(values) - q)
+
+
+def report_frame(n, seed):
+    """조사면적(로그정규)·조사_일수(연속)·발간기관·조사시군구(고유 개수를 아는 문자열), 약간의 결측."""
+    rng = np.random.default_rng(seed)
+    area = rng.lognormal(7, 1.5, n)
+    days = rng.gamma(2.0, 40.0, n)
+    area[rng.random(n) < 0.03] = np.nan
+    days[rng.random(n) < 0.05] = np.nan
+    return pd.DataFrame({
+        "조사면적": area,
+        "조사_일수": days,
+        "발간기관": pd.Series([f"기관{i}" for i in rng.integers(0, 3_000, n)]),
+        "조사시군구": pd.Series([f"시군구{i}" for i in rng.integers(0, 20_000, n)]),
+    })
+
+
+def partitions_of(frame, k):
+    return [frame.iloc[idx] for idx in np.array_split(np.arange(len(frame)), k)]
+
+
+def test_tdigest_exact_below_limit():
+    values = np.random.default_rng(1).lognormal(7, 1.5, EXACT_LIMIT)
+    digest = TDigest().update(values)
+    assert len(digest.means) == EXACT_LIMIT  # 압축하지 않은 정확 버퍼
+    for q in [0.0, 0.01, 0.25, 0.5, 0.75, 0.99, 1.0]:
+        assert digest.quantile(q) == pytest.approx(np.quantile(values, q), rel=1e-12)
+
+
+@pytest.mark.parametrize("n", [EXACT_LIMIT + 1, 200_000])
+def test_tdigest_rank_error_above_limit(n):
+    values = np.random.default_rng(2).lognormal(7, 1.5, n)
+    digest = TDigest().update(values)
+    assert len(digest.means) < EXACT_LIMIT
+    ordered = np.sort(values)
+    for q in QS:
+        assert rank_error(ordered, digest.quantile(q), q) <= SKETCH_ERROR_BOUNDS["rank"][q]
+
+
+def test_tdigest_merged_rank_error():
+    # 파티션마다 만든 t-digest를 병합해도 한계 안(병합 순서는 파티션 순서)
+    values = np.random.default_rng(3).lognormal(7, 1.5, 300_000)
+    digest = TDigest()
+    for part in np.array_split(values, 60):
+        digest.merge(TDigest().update(part))
+    ordered = np.sort(values)
+    for q in QS:
+        assert rank_error(ordered, digest.quantile(q), q) <= SKETCH_ERROR_BOUNDS["rank"][q]
+
+
+@pytest.mark.parametrize("n_distinct", [10, 1_000, 20_000, 200_000])
+def test_hyperloglog_relative_error(n_distinct):
+    rng = np.random.default_rng(4)
+    values = pd.Series([f"값{i}" for i in rng.integers(0, n_distinct, 3 * n_distinct)])
+    exact = values.nunique()
+    estimate = HyperLogLog().update(values).estimate()
+    assert abs(estimate - exact) / exact <= SKETCH_ERROR_BOUNDS["distinct"]
+
+
+def test_merge_summaries_matches_single_pass():
+    frame = report_frame(120_000, seed=5)
+    partitions = [Summary.of(part) for part in partitions_of(frame, 40)]
+    merged = merge_summaries(partitions)
+    whole = Summary.of(frame)
+
+    # 카운터는 정확(합계는 부동소수 합 순서 차이만)
+    assert merged.rows == whole.rows == len(frame)
+    assert merged.nulls == whole.nulls
+    for column, counter in whole.counters.items():
+        assert merged.counters[column]["count"] == counter["count"]
+        assert merged.counters[column]["min"] == counter["min"]
+        assert merged.counters[column]["max"] == counter["max"]
+        assert merged.counters[column]["sum"] == pytest.approx(counter["sum"], rel=1e-9)
+    # HLL 병합(레지스터 최댓값)은 한 번에 만든 것과 같은 레지스터
+    for column, hll in whole.distinct.items():
+        assert np.array_equal(merged.distinct[column].registers, hll.registers)
+        exact = frame[column].nunique()
+        assert abs(merged.n_distinct(column) - exact) / exact <= SKETCH_ERROR_BOUNDS["distinct"]
+    # 분위수는 병합·단일 모두 정확값 대비 한계 안
+    for column in merged.digests:
+        ordered = np.sort(frame[column].dropna().to_numpy())
+        for q, single, combined in zip(QS, whole.quantiles(column, QS), merged.quantiles(column, QS)):
+            assert rank_error(ordered, single, q) <= SKETCH_ERROR_BOUNDS["rank"][q]
+            assert rank_error(ordered, combined, q) <= SKETCH_ERROR_BOUNDS["rank"][q]
+
+
+def test_merge_summaries_exact_when_small():
+    # 합친 값이 EXACT_LIMIT 이하이면 병합 결과가 한 번에 만든 요약과 같은 분위수(직렬화 왕복 포함)
+    frame = report_frame(EXACT_LIMIT // 2, seed=6)
+    parts = [Summary.from_dict(Summary.of(part).to_dict()) for part in partitions_of(frame, 7)]
+    before = [p.to_dict() for p in parts]
+    merged = merge_summaries(parts)
+    qs = [0.0, 0.01, 0.5, 0.99, 1.0]
+    for column in merged.digests:
+        assert merged.quantiles(column, qs) == pytest.approx(frame[column].quantile(qs).tolist(), rel=1e-12)
+    # 입력 요약은 바뀌지 않음
+    assert [p.to_dict() for p in parts] == before
@@ -0,0 +1,91 @@
+#######################
+# sql_backend.SqlEngine 결과 = pipeline.PandasEngine 결과 (번들 CSV 기준)
+#   python -m pytest -q test_sql_backend.py
+import pandas as pd
+import pytest
+
+from data_layer import DATA_PATH, UNKNOWN_LABEL, prepare_frame, read_source_csv
+from filter_engine import FilterIndex
+from pipeline import PandasEngine
+from report_cube import ReportCube
+from search_index import SearchIndex
+from sql_backend import SqlEngine, build_database
+
+SPECS = [
+    {},
+    {"facets": {"조사시도": ["경북", "경남", UNKNOWN_LABEL]}, "year_range": (2012, 2022)},
+    {"facets": {"시대": ["삼국", "조선"]}, "facet_modes": {"시대": "all"}, "area_range": (500.0, 200_000.0)},
+    {"keyword": "유적 발굴조사", "facets": {"유적성격": ["고분"]}},
+    {"keyword": "경주*"},
+]
+
+
+@pytest.fixture(scope="module")
+def engines(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp("sql")
+    db_path = build_database(DATA_PATH, tmp / "reports.sqlite", store_dir=tmp / "no-store")
+    df = prepare_frame(read_source_csv())
+    return PandasEngine(df, FilterIndex(df), SearchIndex(df), ReportCube(df)), SqlEngine(db_path)
+
+
+def views(engines, spec):
+    pandas_engine, sql_engine = engines
+    return pandas_engine.view(("test",), spec), sql_engine.view(("test",), spec)
+
+
+def assert_rows_equal(expected, actual):
+    pd.testing.assert_frame_equal(
+        expected.reset_index(drop=True), actual.reset_index(drop=True), check_dtype=False, check_categorical=False
+    )
+
+
+@pytest.mark.parametrize("spec", SPECS)
+def test_counts_match(engines, spec):
+    expected, actual = views(engines, spec)
+    assert actual.n_rows == expected.n_rows
+    assert actual.count(notna=["조사면적"]) == expected.count(notna=["조사면적"])
+    assert actual.count(notna=["조사기간"], isna=["조사_일수"]) == expected.count(notna=["조사기간"], isna=["조사_일수"])
+    assert engines[1].facet_counts(spec) == engines[0].facet_counts(spec)
+
+
+@pytest.mark.parametrize("spec", SPECS)
+@pytest.mark.parametrize("sort_by, ascending", [(None, True), ("조사면적", False), ("제출일", True)])
+def test_rows_match(engines, spec, sort_by, ascending):
+    expected, actual = views(engines, spec)
+    columns = ["연번", "보고서명", "조사시도", "조사면적", "제출일", "조사_일수"]
+    for offset in (0, 40):
+        assert_rows_equal(
+            expected.rows(columns, sort_by=sort_by, ascending=ascending, limit=25, offset=offset),
+            actual.rows(columns, sort_by=sort_by, ascending=ascending, limit=25, offset=offset),
+        )
+
+
+@pytest.mark.parametrize("spec", SPECS)
+def test_cube_matches(engines, spec):
+    expected, actual = views(engines, spec)
+    expected_totals, actual_totals = expected.cube.totals(), actual.cube.totals()
+    assert actual_totals["건수"] == expected_totals["건수"]
+    assert actual_totals["면적건수"] == expected_totals["면적건수"]
+    assert actual_totals["합계면적"] == pytest.approx(expected_totals["합계면적"], rel=1e-9)
+    for dims in (["조사시도"], ["제출연도", "시대"], ["발간기관"]):
+        pd.testing.assert_frame_equal(
+            actual.cube.rollup(dims).sort_values(dims).reset_index(drop=True),
+            expected.cube.rollup(dims).sort_values(dims).reset_index(drop=True),
+            check_dtype=False, rtol=1e-9,
+        )
+    pd.testing.assert_series_equal(
+        actual.tag_counts("시대").sort_index(), expected.tag_counts("시대").sort_index(), check_names=False
+    )
+
+
+def test_sidebar_options_match(engines):
+    pandas_engine, sql_engine = engines
+    for column in ("조사시도", "시대", "발간기관"):
+        assert sql_engine.facet_values(column) == sorted(pandas_engine.facet_values(column))
+    assert sql_engine.facet_values("조사시군구", {"조사시도": ["경북"]}) == sorted(
+        pandas_engine.facet_values("조사시군구", {"조사시도": ["경북"]})
+    )
+    assert sql_engine.value_range("제출연도") == pandas_engine.value_range("제출연도")
+    assert sql_engine.quantiles("조사면적", [0.01, 0.5, 0.99]) == pytest.approx(
+        pandas_engine.quantiles("조사면적", [0.01, 0.5, 0.99])
+    )